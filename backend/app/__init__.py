@@ -1,47 +1,64 @@
-from flask import Flask, jsonify
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from config import config
+from app.replicas import RoutingSession
 import os
-import sys
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-)
+logger = logging.getLogger(__name__)
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 
 def create_app():
     try:
         # Get environment configuration
         env = os.environ.get('FLASK_ENV', 'development')
-        logging.info(f"Starting application in {env} mode")
         config_class = config[env]
+        from app import logs
+        logs.configure(config_class)
+        logger.info("Starting application in %s mode", env)
 
         app = Flask(__name__)
         app.config.from_object(config_class)
 
-        # Log configuration
-        logging.info(f"Database URI: {app.config.get('SQLALCHEMY_DATABASE_URI')}")
-        logging.info(f"Debug mode: {app.config.get('DEBUG')}")
+        # Log configuration (never the database URI: it carries credentials)
+        logger.info("Debug mode: %s, lazy startup: %s", app.config.get('DEBUG'), app.config.get('LAZY_STARTUP'))
 
         # Initialize extensions
-        logging.info("Initializing database...")
+        logger.info("Initializing metrics...")
+        from app import metrics
+        metrics.init_app(app)
+        from app import responses
+        responses.init_app(app)
+        logger.info("Initializing database...")
         db.init_app(app)
-        logging.info("Initializing JWT...")
+        from app import replicas
+        replicas.init_app(app, db)
+        logger.info("Initializing JWT...")
         jwt.init_app(app)
+        from app import tokens
+        tokens.init_app(app, jwt)
+        logger.info("Initializing password hashing...")
+        from app import passwords
+        passwords.init_app(app)
+        from app import identity
+        identity.init_app(app)
+        from app import workdays
+        workdays.init_app(app)
+        from app import events
+        events.init_app(app)
+        from app import search
+        search.init_app(app)
         
         # Configure CORS for production
         if env == 'production':
-            logging.info("Configuring CORS for production...")
+            logger.info("Configuring CORS for production...")
             CORS(app, resources={
                 r"/api/*": {
-                    "origins": ["https://your-frontend-domain.vercel.app"],
+                    "origins": app.config['CORS_ORIGINS'],
                     "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
                     "allow_headers": ["Content-Type", "Authorization"]
                 }
@@ -49,48 +66,23 @@ def create_app():
         else:
             CORS(app)
 
-        # Add health check endpoint with diagnostics
-        @app.route('/api/health')
-        def health_check():
-            try:
-                # Test database connection
-                db.session.execute('SELECT 1')
-                db_status = "connected"
-            except Exception as e:
-                logging.error(f"Database health check failed: {str(e)}")
-                db_status = f"error: {str(e)}"
-
-            health_data = {
-                "status": "healthy",
-                "environment": env,
-                "python_version": sys.version,
-                "database_status": db_status,
-                "debug_mode": app.debug,
-                "config": {
-                    "SQLALCHEMY_DATABASE_URI": app.config.get('SQLALCHEMY_DATABASE_URI', 'not set'),
-                    "FLASK_ENV": env,
-                    "DEBUG": app.debug
-                }
-            }
-            return jsonify(health_data), 200
+        # Liveness/readiness probes, answered from the background prober's cache
+        from app import health
+        health.init_app(app)
 
         # Register blueprints
-        logging.info("Registering blueprints...")
+        logger.info("Registering blueprints...")
         from app.routes.auth import auth_bp
         from app.routes.leave import leave_bp
+        from app.routes.employees import employees_bp
 
         app.register_blueprint(auth_bp, url_prefix='/api/auth')
         app.register_blueprint(leave_bp, url_prefix='/api/leave')
+        app.register_blueprint(employees_bp, url_prefix='/api/employees')
 
-        # Create database tables
-        with app.app_context():
-            logging.info("Creating database tables...")
-            db.create_all()
-            logging.info("Database tables created successfully")
-
-        logging.info("Application startup complete")
+        logger.info("Application startup complete")
         return app
 
     except Exception as e:
-        logging.error(f"Error during application startup: {str(e)}")
+        logger.exception("Error during application startup: %s", e)
         raise 
\ No newline at end of file
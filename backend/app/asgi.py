@@ -0,0 +1,398 @@
+"""ASGI serving mode: hot endpoints on an asyncio loop, the rest through WSGI.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+Needs the packages in ``requirements-asgi.txt``. The sync ``gunicorn
+app:create_app()`` deployment does not import this module.
+
+These endpoints run natively on the event loop with an async SQLAlchemy
+engine (aiomysql, or aiosqlite for local SQLite):
+
+* ``POST /api/auth/login``
+* ``POST /api/auth/refresh``
+* ``GET /api/leave/applications``
+* ``GET /api/leave/events`` - the Server-Sent Events stream (see ``app.events``)
+
+While they wait on the database they do not hold a thread, so one process
+can keep many more requests in flight than gunicorn's 8 threads. bcrypt
+still runs on the password process pool; the loop hands it to a small thread
+pool and awaits the result. Query building and serialization are shared with
+the Flask views through ``AsyncSession.run_sync``.
+
+An open event stream holds no thread and no database connection while it
+waits. A publish wakes every stream on the loop with a single thread-safe
+call, however many are connected. Streams close after at most
+``EVENTS_STREAM_MAX_SECONDS``; run uvicorn with ``--timeout-graceful-shutdown``
+so a restart does not wait that long.
+
+Every other route is passed to the Flask app, which runs on a worker thread
+pool exactly as under gunicorn.
+"""
+import asyncio
+import logging
+import os
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt as pyjwt
+from a2wsgi import WSGIMiddleware
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route, request_response
+from werkzeug.http import parse_accept_header, parse_etags
+
+from app import create_app, events, identity, metrics, responses, tokens, versions
+from app.models.employee import Employee
+from app.models.leave import LeaveApplication
+from app.models.user import User
+from app.passwords import PasswordHasherBusy
+from app.routes.auth import BUSY_RETRY_AFTER
+from app.routes.leave import apply_application_filters, keyset_page, split_page
+from app.serializers import serialize_applications
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'mysql+mysqldb': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+
+
+class AuthError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def async_database_uri(config):
+    """``ASYNC_DATABASE_URI``, or the sync URI with its driver swapped for an async one."""
+    if config.get('ASYNC_DATABASE_URI'):
+        return config['ASYNC_DATABASE_URI']
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    scheme, rest = uri.split('://', 1)
+    if scheme not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver known for {scheme}; set ASYNC_DATABASE_URI")
+    return f'{ASYNC_DRIVERS[scheme]}://{rest}'
+
+
+def async_engine_options(config, uri):
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    # The metrics pool is a sync QueuePool; async engines need their own
+    options.pop('poolclass', None)
+    connect_args = dict(options.pop('connect_args', {}))
+    if isinstance(connect_args.get('ssl'), dict):
+        # aiomysql takes an SSLContext rather than PyMySQL's dict
+        connect_args['ssl'] = ssl.create_default_context(cafile=connect_args['ssl'].get('ca'))
+    if connect_args:
+        options['connect_args'] = connect_args
+    if uri.startswith('sqlite') and ':memory:' not in uri:
+        # aiosqlite defaults to NullPool, which would start a connection
+        # thread per session; keep connections like the sync engine does
+        options['poolclass'] = AsyncAdaptedQueuePool
+    return options
+
+
+def create_asgi_app():
+    flask_app = create_app()
+    uri = async_database_uri(flask_app.config)
+    engine = create_async_engine(uri, **async_engine_options(flask_app.config, uri))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    # Callers beyond PASSWORD_HASH_MAX_CONCURRENCY wait here for a slot (and
+    # time out with PasswordHasherBusy) without blocking the loop
+    blocking = ThreadPoolExecutor(
+        max_workers=flask_app.config.get('PASSWORD_HASH_MAX_CONCURRENCY', 8) * 2,
+        thread_name_prefix='asgi-blocking'
+    )
+    identity_claim = flask_app.config.get('JWT_IDENTITY_CLAIM', 'sub')
+
+    def json_response(data, status=200, headers=None, request=None):
+        """JSON response, compressed like the Flask app's when ``request`` accepts it."""
+        body = (flask_app.json.dumps(data) + '\n').encode()
+        headers = dict(headers or {})
+        if request is not None:
+            headers['Vary'] = 'Accept-Encoding'
+            encoding = responses.negotiate(parse_accept_header(request.headers.get('accept-encoding')))
+            if encoding is not None and responses.should_compress(status, 'application/json', len(body)):
+                body = responses.compress(body, encoding)
+                headers['Content-Encoding'] = encoding
+                if headers.get('ETag', '').startswith('"'):
+                    headers['ETag'] = 'W/' + headers['ETag']
+        return Response(body, status_code=status, headers=headers, media_type='application/json')
+
+    def decode(request, token_type):
+        header = request.headers.get('authorization', '')
+        if not header.startswith('Bearer '):
+            raise AuthError(401, 'Missing Authorization Header')
+        try:
+            with flask_app.app_context():
+                payload = decode_token(header[len('Bearer '):])
+        except pyjwt.ExpiredSignatureError:
+            raise AuthError(401, 'Token has expired')
+        except pyjwt.InvalidTokenError as e:
+            raise AuthError(422, str(e))
+        if payload.get('type') != token_type:
+            raise AuthError(422, f'Only {token_type} tokens are allowed')
+        if tokens.is_revoked(payload):
+            raise AuthError(401, 'Token has been revoked')
+        return payload
+
+    def issue_tokens(user):
+        with flask_app.app_context():
+            return (
+                create_access_token(identity=str(user.user_id), additional_claims=identity.identity_claims(user)),
+                create_refresh_token(identity=str(user.user_id))
+            )
+
+    async def run_blocking(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(blocking, fn, *args)
+
+    async def load_user(session, **criteria):
+        query = select(User).options(selectinload(User.employee)).filter_by(**criteria)
+        return (await session.scalars(query)).first()
+
+    def timed(rule):
+        """Record the native endpoints in the same histograms as the Flask views."""
+        def decorator(handler):
+            async def endpoint(request):
+                start = asyncio.get_running_loop().time()
+                try:
+                    response = await handler(request)
+                except AuthError as e:
+                    response = json_response({'msg': str(e)}, e.status)
+                elapsed = asyncio.get_running_loop().time() - start
+                metrics.REQUEST_DURATION.observe(elapsed, request.method, rule, str(response.status_code))
+                return response
+            return endpoint
+        return decorator
+
+    @timed('/api/auth/login')
+    async def login(request):
+        try:
+            data = await request.json()
+            logger.debug("Login attempt for email: %s", data.get('email'))
+            async with sessions() as session:
+                user = await load_user(session, email=data.get('email'))
+                if not user:
+                    logger.warning("No user found with email: %s", data.get('email'))
+                    return json_response({'error': 'Invalid email or password'}, 401)
+
+                if not await run_blocking(user.check_password, data.get('password')):
+                    logger.warning("Invalid password for user: %s", data.get('email'))
+                    return json_response({'error': 'Invalid email or password'}, 401)
+
+                if await run_blocking(user.password_needs_rehash):
+                    await run_blocking(user.set_password, data.get('password'))
+                    await session.commit()
+                    logger.info("Rehashed password for user: %s", user.email)
+
+            access_token, refresh_token = issue_tokens(user)
+            logger.info("Successful login for user: %s", user.email)
+            return json_response({
+                'access_token': access_token,
+                'refresh_token': refresh_token,
+                'user': {
+                    'id': user.user_id,
+                    'email': user.email,
+                    'username': user.username,
+                    'role': user.role
+                }
+            })
+
+        except PasswordHasherBusy:
+            logger.warning("Password hashing queue full, rejecting request")
+            return json_response({'error': 'Server busy, please retry shortly'}, 503,
+                                 headers={'Retry-After': str(BUSY_RETRY_AFTER)})
+        except Exception as e:
+            logger.exception("Login error: %s", e)
+            return json_response({'error': 'An error occurred during login'}, 500)
+
+    @timed('/api/auth/refresh')
+    async def refresh(request):
+        payload = decode(request, 'refresh')
+        try:
+            # Rotate: the presented refresh token is spent whether or not the
+            # rest of the exchange succeeds
+            if not tokens.revoke(payload):
+                return json_response({'error': 'Token has been revoked'}, 401)
+
+            async with sessions() as session:
+                user = await load_user(session, user_id=int(payload[identity_claim]))
+            if not user:
+                return json_response({'error': 'User not found'}, 401)
+
+            access_token, refresh_token = issue_tokens(user)
+            return json_response({'access_token': access_token, 'refresh_token': refresh_token})
+
+        except tokens.RevocationStoreFull:
+            logger.error("Refresh token revocation store full, refusing refresh")
+            return json_response({'error': 'Server busy, please retry shortly'}, 503,
+                                 headers={'Retry-After': str(BUSY_RETRY_AFTER)})
+        except Exception as e:
+            logger.exception("Token refresh error: %s", e)
+            return json_response({'error': 'An error occurred during token refresh'}, 500)
+
+    @timed('/api/leave/applications')
+    async def get_applications(request):
+        payload = decode(request, 'access')
+        args = request.query_params
+        try:
+            async with sessions() as session:
+                current_user = await session.run_sync(
+                    lambda s: identity.identity_from_token(int(payload[identity_claim]), payload, session=s)
+                )
+                if not current_user:
+                    return json_response({'error': 'User not found'}, 404)
+
+                if current_user.role == 'admin':
+                    scopes, parts = [versions.APPLICATIONS], ['admin']
+                    query = select(LeaveApplication).join(Employee)
+                else:
+                    if not current_user.employee_id:
+                        return json_response({'error': 'Employee record not found'}, 404)
+                    scopes = [versions.employee_scope(current_user.employee_id)]
+                    parts = [current_user.employee_id]
+                    query = select(LeaveApplication).join(Employee)\
+                        .where(LeaveApplication.employee_id == current_user.employee_id)
+
+                # Same key as Flask's request.full_path, so both servers agree on ETags
+                full_path = f'{request.url.path}?{request.url.query}'
+                current = await session.run_sync(lambda s: versions.current(*scopes, session=s))
+                etag = versions.make_etag(full_path, current, parts)
+                cache_headers = {'ETag': f'"{etag}"', 'Cache-Control': versions.CACHE_CONTROL}
+                if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+                    return Response(status_code=304, headers=cache_headers)
+
+                query = apply_application_filters(query, args)
+                query, limit = keyset_page(query, args)
+                applications, next_cursor = split_page((await session.scalars(query)).all(), limit)
+                include_employee = current_user.role == 'admin'
+                fields = responses.parse_fields(args.get('fields'))
+                data = await session.run_sync(lambda s: serialize_applications(
+                    applications, include_employee=include_employee, session=s, department=current_user.department,
+                    fields=fields
+                ))
+            return json_response({'applications': data, 'next_cursor': next_cursor}, headers=cache_headers,
+                                 request=request)
+
+        except ValueError as e:
+            return json_response({'error': str(e)}, 422)
+        except Exception as e:
+            logger.exception("Error fetching leave applications: %s", e)
+            return json_response({'error': 'Failed to fetch leave applications'}, 500)
+
+    keepalive = flask_app.config.get('EVENTS_KEEPALIVE_SECONDS', 15)
+    max_lifetime = flask_app.config.get('EVENTS_STREAM_MAX_SECONDS', 600)
+    # Replaced by a fresh asyncio.Event on every publish; streams wait on
+    # the one that was current when they last read the bus
+    published = {'event': asyncio.Event()}
+    background = []
+
+    def notify_streams():
+        published['event'].set()
+        published['event'] = asyncio.Event()
+
+    async def leave_events(request):
+        try:
+            payload = decode(request, 'access')
+        except AuthError as e:
+            return json_response({'msg': str(e)}, e.status)
+        # Resolve the identity up front; the stream itself never needs the database
+        async with sessions() as session:
+            current_user = await session.run_sync(
+                lambda s: identity.identity_from_token(int(payload[identity_claim]), payload, session=s)
+            )
+        if not current_user:
+            return json_response({'error': 'User not found'}, 404)
+        last_event_id = request.headers.get('last-event-id') or request.query_params.get('last_event_id')
+
+        # End the stream before the token expires (and at least every
+        # EVENTS_STREAM_MAX_SECONDS, so shutdowns are not held up); the client
+        # reconnects with Last-Event-ID and a current token
+        loop = asyncio.get_running_loop()
+        lifetime = min(max_lifetime, payload['exp'] - time.time()) if 'exp' in payload else max_lifetime
+        deadline = loop.time() + lifetime
+
+        async def stream():
+            resume = last_event_id
+            while True:
+                changed = published['event']
+                body, resume = events.backlog(current_user, resume)
+                if body:
+                    yield body
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), min(keepalive, remaining))
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+
+        return StreamingResponse(stream(), media_type='text/event-stream',
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    async def watch_versions():
+        """Tell streams to resync when another process changes applications."""
+        interval = flask_app.config.get('EVENTS_VERSION_POLL_SECONDS', 2)
+        state = {}
+        while interval:
+            try:
+                async with sessions() as session:
+                    await session.run_sync(
+                        lambda s: events.check_versions(lambda: events.read_applications_version(s), state)
+                    )
+            except Exception as e:
+                logger.warning("Event version check failed: %s", e)
+            await asyncio.sleep(interval)
+
+    async def startup():
+        loop = asyncio.get_running_loop()
+        # Publishers run on WSGI worker threads as well as on the loop
+        wake = lambda: loop.call_soon_threadsafe(notify_streams)
+        events.bus.subscribe(wake)
+        background.append((wake, asyncio.create_task(watch_versions())))
+
+    def native(path, handler, method):
+        # Flask-CORS only sees requests that reach Flask; give the native
+        # routes the same policy, preflight included
+        origins = flask_app.config['CORS_ORIGINS']
+        app = request_response(handler)
+        if origins == ['*']:
+            app = CORSMiddleware(app, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+        else:
+            app = CORSMiddleware(app, allow_origins=origins,
+                                 allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
+                                 allow_headers=['Content-Type', 'Authorization'])
+        return Route(path, app, methods=[method, 'OPTIONS'])
+
+    async def shutdown():
+        for wake, task in background:
+            events.bus.unsubscribe(wake)
+            task.cancel()
+        await engine.dispose()
+        blocking.shutdown(wait=False)
+
+    return Starlette(
+        routes=[
+            native('/api/auth/login', login, 'POST'),
+            native('/api/auth/refresh', refresh, 'POST'),
+            native('/api/leave/applications', get_applications, 'GET'),
+            native('/api/leave/events', leave_events, 'GET'),
+            Mount('/', app=WSGIMiddleware(
+                flask_app, workers=int(os.environ.get('ASGI_WSGI_THREADS', '8'))
+            )),
+        ],
+        on_startup=[startup],
+        on_shutdown=[shutdown]
+    )
@@ -0,0 +1,215 @@
+"""Per-employee leave balances kept as an incremental ledger.
+
+Like the dashboard counters in ``stats``, the ledger is written by
+``request_leave`` and the review endpoints in the same transaction as the
+change it records: submitting adds the application's working days to
+``pending_days``, acceptance moves them to ``used_days``, and denial (or
+un-accepting) takes them off again. Days are counted by ``workdays`` against
+the employee's department calendar and split per calendar year.
+
+The ledger is derived data. If holiday calendars or workweeks change, run
+``python rebuild_stats.py`` to recount it from the applications table.
+"""
+from collections import Counter, defaultdict
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app import workdays
+from app.models.balance import LeaveBalance
+from app.models.leave import LeaveApplication
+from app.models.employee import Employee
+
+REBUILD_BATCH_SIZE = 1000
+# Ledger column holding an application's days in each status; denied
+# applications hold none
+STATUS_COLUMNS = {'pending': 'pending_days', 'accepted': 'used_days'}
+
+
+def allowance(leave_type):
+    """Yearly allowance in days for ``leave_type``, or None for no limit."""
+    return (current_app.config.get('LEAVE_ALLOWANCES') or {}).get(leave_type)
+
+
+def _deltas(leave, department, status, sign):
+    deltas = Counter()
+    column = STATUS_COLUMNS.get(status)
+    if column is None:
+        return deltas
+    days = workdays.leave_days(leave.leave_mode, leave.start_date, leave.end_date, department)
+    for year, count in days.items():
+        deltas[(leave.employee_id, leave.leave_type, year, column)] += sign * count
+    return deltas
+
+
+def _apply(deltas):
+    rows = defaultdict(dict)
+    for (employee_id, leave_type, year, column), delta in deltas.items():
+        if delta:
+            rows[(employee_id, leave_type, year)][column] = delta
+
+    table = LeaveBalance.__table__
+    for (employee_id, leave_type, year), changes in rows.items():
+        key = (table.c.employee_id == employee_id) & (table.c.leave_type == leave_type) & (table.c.year == year)
+        update = table.update().where(key).values({
+            column: table.c[column] + delta for column, delta in changes.items()
+        })
+        if db.session.execute(update).rowcount:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(
+                    employee_id=employee_id, leave_type=leave_type, year=year,
+                    used_days=changes.get('used_days', 0), pending_days=changes.get('pending_days', 0)
+                ))
+        except IntegrityError:
+            # A concurrent transaction created the row first
+            db.session.execute(update)
+
+
+def record_created(leave, department):
+    """Reserve a newly submitted application's days."""
+    _apply(_deltas(leave, department, leave.status or 'pending', 1))
+
+
+def status_change_deltas(leave, old_status, new_status, department):
+    """Ledger changes for moving ``leave`` from ``old_status`` to ``new_status``.
+
+    Like ``stats.status_change_deltas``, bulk callers can sum these and pass
+    the total to ``apply_deltas``.
+    """
+    deltas = Counter()
+    if old_status == new_status:
+        return deltas
+    deltas.update(_deltas(leave, department, old_status, -1))
+    deltas.update(_deltas(leave, department, new_status, 1))
+    return deltas
+
+
+def apply_deltas(deltas):
+    _apply(deltas)
+
+
+def record_status_change(leave, old_status, new_status, department):
+    _apply(status_change_deltas(leave, old_status, new_status, department))
+
+
+def _lock_rows(employee_id, leave_type, years):
+    # FOR UPDATE cannot lock a row that does not exist yet, so create the
+    # missing years empty first; a concurrent creator wins harmlessly
+    table = LeaveBalance.__table__
+    existing = set(db.session.execute(
+        db.select(table.c.year)
+        .where(table.c.employee_id == employee_id, table.c.leave_type == leave_type, table.c.year.in_(years))
+    ).scalars())
+    for year in set(years) - existing:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(
+                    employee_id=employee_id, leave_type=leave_type, year=year, used_days=0, pending_days=0
+                ))
+        except IntegrityError:
+            pass
+
+
+def find_balance_conflicts(employee_id, leave_type, leave_mode, start_date, end_date, department):
+    """Years in which the requested days would overrun the allowance.
+
+    Pending applications count as spent, so several outstanding requests
+    cannot together exceed the allowance. Costs one primary-key read per
+    calendar year in the range, however long the employee's history is.
+
+    The rows read are locked (``SELECT ... FOR UPDATE``) until the caller's
+    transaction ends, so two concurrent requests check and reserve one after
+    the other instead of both passing against the same balance.
+    """
+    limit = allowance(leave_type)
+    if limit is None:
+        return []
+
+    days = workdays.leave_days(leave_mode, start_date, end_date, department)
+    _lock_rows(employee_id, leave_type, days)
+    rows = {
+        row.year: row for row in db.session.execute(
+            db.select(LeaveBalance)
+            .where(LeaveBalance.employee_id == employee_id, LeaveBalance.leave_type == leave_type,
+                   LeaveBalance.year.in_(days))
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        ).scalars()
+    }
+    conflicts = []
+    for year, requested in days.items():
+        balance = rows.get(year)
+        used = balance.used_days if balance else 0
+        pending = balance.pending_days if balance else 0
+        if used + pending + requested > limit:
+            conflicts.append({
+                'year': year,
+                'allowance': limit,
+                'used': used,
+                'pending': pending,
+                'requested': requested,
+                'remaining': max(limit - used - pending, 0)
+            })
+    return conflicts
+
+
+def get_balances(employee_id, year):
+    """Allowance, used, pending and remaining days per leave type for one year.
+
+    Lists every leave type with a configured allowance plus any other type
+    the employee has taken that year.
+    """
+    rows = {
+        row.leave_type: row
+        for row in LeaveBalance.query.filter_by(employee_id=employee_id, year=year)
+    }
+    leave_types = sorted(set(current_app.config.get('LEAVE_ALLOWANCES') or {}) | set(rows))
+    balances = []
+    for leave_type in leave_types:
+        row = rows.get(leave_type)
+        used = row.used_days if row else 0
+        pending = row.pending_days if row else 0
+        limit = allowance(leave_type)
+        balances.append({
+            'leave_type': leave_type,
+            'allowance': limit,
+            'used': used,
+            'pending': pending,
+            'remaining': max(limit - used - pending, 0) if limit is not None else None
+        })
+    return balances
+
+
+def rebuild():
+    """Recount the ledger from pending and accepted applications."""
+    deltas = Counter()
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            db.select(LeaveApplication, Employee.department)
+            .join(Employee)
+            .where(LeaveApplication.status.in_(STATUS_COLUMNS))
+            .where(LeaveApplication.leave_application_id > last_id)
+            .order_by(LeaveApplication.leave_application_id)
+            .limit(REBUILD_BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        for leave, department in batch:
+            deltas.update(_deltas(leave, department, leave.status, 1))
+        last_id = batch[-1][0].leave_application_id
+        db.session.expunge_all()
+
+    rows = defaultdict(lambda: {'used_days': 0, 'pending_days': 0})
+    for (employee_id, leave_type, year, column), days in deltas.items():
+        rows[(employee_id, leave_type, year)][column] += days
+
+    db.session.execute(LeaveBalance.__table__.delete())
+    if rows:
+        db.session.execute(LeaveBalance.__table__.insert(), [
+            dict(employee_id=employee_id, leave_type=leave_type, year=year, **days)
+            for (employee_id, leave_type, year), days in rows.items()
+        ])
+    db.session.commit()
+    return len(rows)
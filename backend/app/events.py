@@ -0,0 +1,203 @@
+"""Change feed behind ``GET /api/leave/events`` (Server-Sent Events).
+
+``request_leave`` and the review endpoints call ``queue`` before they
+commit. The events are published to the in-process ``bus`` only once the
+session commits. If it rolls back they are dropped. Each event is a compact
+delta: the new application, or the id, status and review of a reviewed one.
+It is never the whole listing.
+
+The bus keeps the last ``EVENTS_REPLAY_SIZE`` events in a ring buffer. A
+client that reconnects with ``Last-Event-ID`` gets what it missed. If that
+id has already left the buffer, or was issued by an earlier process, the
+client gets a ``resync`` event instead and refetches the listing. Admins
+see every event. Employees only see events for their own applications.
+
+Streams are held open by the ASGI app (``app/asgi.py``), where an idle
+connection costs a coroutine rather than a gunicorn thread. The Flask
+route in ``routes/leave.py`` answers with the backlog and closes, so a
+browser ``EventSource`` behind plain gunicorn long-polls at
+``EVENTS_WSGI_RETRY_MS``.
+
+The bus is per process. Changes committed by other workers move the
+``applications`` data version without reaching this bus. ``check_versions``
+notices the gap and publishes ``resync``.
+"""
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import responses
+from app import versions
+
+logger = logging.getLogger(__name__)
+
+RESYNC = 'resync'
+
+
+class EventBus:
+    """Bounded replay buffer plus wake-ups for waiting streams.
+
+    Publishers may be any thread; waiters register a callback that is run
+    (from the publishing thread) after each publish.
+    """
+
+    def __init__(self, replay_size=1000):
+        self._lock = threading.Lock()
+        self._buffer = deque(maxlen=replay_size)
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._waiters = set()
+        # Ids from an earlier process must not resume against this one
+        self.epoch = format(int(time.time() * 1000), 'x')
+        self.local_commits = 0
+
+    def format_id(self, number):
+        return f'{self.epoch}-{number}'
+
+    @property
+    def last_id(self):
+        return self.format_id(self._last_id)
+
+    def publish(self, events, local_commit=True):
+        with self._lock:
+            for data in events:
+                self._last_id = next(self._ids)
+                self._buffer.append((self._last_id, data))
+            if local_commit:
+                self.local_commits += 1
+            waiters = list(self._waiters)
+        for wake in waiters:
+            try:
+                wake()
+            except Exception as e:
+                # Never fail the commit that published
+                logger.warning("Event subscriber failed: %s", e)
+
+    def since(self, last_event_id):
+        """``(events, complete)`` after ``last_event_id``.
+
+        ``complete`` is False when some events in between are no longer
+        buffered (or the id is not from this process), so the caller must
+        resync.
+        """
+        with self._lock:
+            buffered = list(self._buffer)
+            last_id = self._last_id
+        if last_event_id is None:
+            return [], True
+        epoch, _, number = last_event_id.partition('-')
+        try:
+            number = int(number)
+        except ValueError:
+            return [], False
+        if epoch != self.epoch or number > last_id:
+            return [], False
+        oldest = buffered[0][0] if buffered else last_id + 1
+        if number < oldest - 1:
+            return [], False
+        return [(self.format_id(i), data) for i, data in buffered if i > number], True
+
+    def subscribe(self, wake):
+        with self._lock:
+            self._waiters.add(wake)
+
+    def unsubscribe(self, wake):
+        with self._lock:
+            self._waiters.discard(wake)
+
+
+bus = EventBus()
+
+
+def init_app(app):
+    global bus
+    bus = EventBus(app.config.get('EVENTS_REPLAY_SIZE', 1000))
+
+
+def visible_to(identity, data):
+    if data['type'] == RESYNC or identity.role == 'admin':
+        return True
+    return identity.employee_id is not None and data.get('employee_id') == identity.employee_id
+
+
+def format_event(event_id, data):
+    return f"id: {event_id}\nevent: {data['type']}\ndata: {responses.dumps(data)}\n\n"
+
+
+def backlog(identity, last_event_id):
+    """SSE text for what ``identity`` missed since ``last_event_id``, and the id to resume from."""
+    events, complete = bus.since(last_event_id)
+    if not complete:
+        return format_event(bus.last_id, {'type': RESYNC}), bus.last_id
+    chunks = [format_event(event_id, data) for event_id, data in events if visible_to(identity, data)]
+    resume = events[-1][0] if events else (last_event_id or bus.last_id)
+    if last_event_id is None:
+        # First connection: give the client an id to resume from
+        chunks.append(format_event(bus.last_id, {'type': 'ready'}))
+    return ''.join(chunks), resume
+
+
+def queue(session, data):
+    """Publish ``data`` once ``session`` commits; dropped on rollback."""
+    session.info.setdefault('leave_events', []).append(data)
+
+
+def created(application):
+    """Event for a new application, from its admin-listing serialization."""
+    return dict(application, type='application.created')
+
+
+def reviewed(leave, status, comments, reviewer_id, review_date):
+    return {
+        'type': 'application.reviewed',
+        'leave_application_id': leave.leave_application_id,
+        'employee_id': leave.employee_id,
+        'status': status,
+        'review': {
+            'review_date': review_date.isoformat() if review_date else None,
+            'comments': comments,
+            'reviewer': {'id': reviewer_id}
+        }
+    }
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish(session):
+    # Releasing a savepoint also fires after_commit; wait for the real one
+    if session.in_nested_transaction():
+        return
+    events = session.info.pop('leave_events', None)
+    if events:
+        bus.publish(events)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _discard(session, transaction):
+    # Runs after _publish on commit; on rollback or close the events are
+    # dropped. Savepoints (e.g. a lost counter-insert race) keep them.
+    if transaction.parent is None:
+        session.info.pop('leave_events', None)
+
+
+def check_versions(read_version, state):
+    """Publish ``resync`` if another process changed applications.
+
+    ``read_version`` returns the current ``applications`` data version;
+    ``state`` carries the version and local commit count seen last time.
+    """
+    version = read_version()
+    commits = bus.local_commits
+    if state.get('version') is not None:
+        if version - state['version'] > commits - state['commits']:
+            logger.debug("Applications version moved to %s outside this process", version)
+            bus.publish([{'type': RESYNC}], local_commit=False)
+    state.update(version=version, commits=commits)
+
+
+def read_applications_version(session):
+    return versions.current(versions.APPLICATIONS, session=session)[0]
@@ -0,0 +1,227 @@
+"""Liveness and readiness probes served from a background prober's cache.
+
+``/api/health/live`` only says the process is serving requests. It never
+looks at the database, so a database outage or an exhausted pool cannot get
+the container restarted.
+
+``/api/health/ready`` (and the legacy ``/api/health``) return the latest
+snapshot from a prober thread. Every ``HEALTH_PROBE_INTERVAL`` seconds the
+thread runs ``SELECT 1`` on its own single-connection engine and reads the
+request pool's counters. The endpoints never take a pool connection; they
+return a dict that is already built. Readiness fails (503) while the first
+probe is pending, when the last probe failed, or when no probe has finished
+within ``HEALTH_PROBE_STALE_AFTER`` seconds. A saturated pool is reported
+but does not fail readiness. With ``HEALTH_PROBE_INTERVAL = 0`` there is no
+thread; the endpoints run the same probe inline instead, at most once every
+``INLINE_PROBE_SECONDS`` across concurrent requests.
+
+Each read replica (see ``app.replicas``) gets the same probe. The prober
+also compares the replica's ``applications`` data version with the
+primary's and reports the result to ``replicas``. That decides whether
+``@replica_reads`` views may use the replica. Replica trouble is reported in
+the snapshot but does not fail readiness, because reads fall back to the
+primary.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from flask import jsonify
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.pool import QueuePool
+
+from app import db
+from app import replicas
+from app.models.version import DataVersion
+from app.versions import APPLICATIONS
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_snapshot = {'status': 'starting', 'database_status': 'unknown', 'checked_at': None}
+_stop = threading.Event()
+_thread = None
+_stale_after = 30.0
+# (probe_engine, pool, replica_engines) when the prober thread is disabled
+_inline = None
+_inline_lock = threading.Lock()
+INLINE_PROBE_SECONDS = 1.0
+
+
+def _pool_status(pool):
+    if not isinstance(pool, QueuePool):
+        return None
+    checked_out = pool.checkedout()
+    # pool.overflow() counts from -pool_size; connections beyond it are overflow
+    capacity = pool.size() + pool._max_overflow
+    return {
+        'size': pool.size(),
+        'checked_out': checked_out,
+        'overflow': max(pool.overflow(), 0),
+        'saturated': pool._max_overflow >= 0 and checked_out >= capacity
+    }
+
+
+def _applications_version(connection):
+    # Table columns, not the mapped class: the prober may run before every
+    # model is imported, and configuring mappers then would fail for good
+    table = DataVersion.__table__
+    return connection.execute(
+        select(table.c.version).where(table.c.scope == APPLICATIONS)
+    ).scalar() or 0
+
+
+def _primary_version(connection):
+    # Unknown (e.g. before migrations ran) leaves replicas judged on their
+    # own probe only; it must not fail the primary's
+    try:
+        with connection.begin_nested():
+            return _applications_version(connection)
+    except Exception as e:
+        logger.warning("Could not read the primary's data version: %s", e)
+        return None
+
+
+def probe_replicas(replica_engines, primary_version):
+    statuses = {}
+    for name, engine in replica_engines.items():
+        try:
+            with engine.connect() as connection:
+                version = _applications_version(connection)
+            replicas.record_probe(name, True, primary_version is not None and version < primary_version)
+            statuses[name] = dict(replicas.status(name), database_status='connected')
+        except Exception as e:
+            logger.error("Replica %s health probe failed: %s", name, e)
+            replicas.record_probe(name, False, False)
+            statuses[name] = dict(replicas.status(name), database_status=f'error: {e.__class__.__name__}')
+    return statuses
+
+
+def probe(probe_engine, pool, replica_engines=None):
+    """Run one check and publish the result."""
+    started = time.monotonic()
+    primary_version = None
+    try:
+        with probe_engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            if replica_engines:
+                primary_version = _primary_version(connection)
+        database_status = 'connected'
+    except Exception as e:
+        logger.error("Database health probe failed: %s", e)
+        database_status = f'error: {e.__class__.__name__}'
+
+    snapshot = {
+        'status': 'ready' if database_status == 'connected' else 'unavailable',
+        'database_status': database_status,
+        'probe_ms': round((time.monotonic() - started) * 1000, 1),
+        'checked_at': time.time(),
+        'pool': _pool_status(pool)
+    }
+    if replica_engines:
+        snapshot['replicas'] = probe_replicas(replica_engines, primary_version)
+    global _snapshot
+    with _lock:
+        _snapshot = snapshot
+    return snapshot
+
+
+def _run(probe_engine, pool, interval, replica_engines):
+    while not _stop.is_set():
+        probe(probe_engine, pool, replica_engines)
+        _stop.wait(interval)
+    probe_engine.dispose()
+    for engine in replica_engines.values():
+        engine.dispose()
+
+
+def _probe_inline():
+    # One request probes; the others waiting on the lock reuse its result
+    with _inline_lock:
+        with _lock:
+            checked_at = _snapshot.get('checked_at')
+        if checked_at is None or time.time() - checked_at >= INLINE_PROBE_SECONDS:
+            probe(*_inline)
+
+
+def current():
+    """The latest snapshot, marked stale when the prober has fallen behind."""
+    if _inline is not None:
+        _probe_inline()
+    with _lock:
+        snapshot = dict(_snapshot)
+    checked_at = snapshot.get('checked_at')
+    if checked_at is not None and time.time() - checked_at > _stale_after:
+        snapshot['status'] = 'stale'
+    return snapshot
+
+
+def _probe_engine(uri, engine_options):
+    options = {
+        key: value for key, value in (engine_options or {}).items()
+        if key in ('connect_args', 'pool_recycle', 'pool_pre_ping')
+    }
+    if ':memory:' not in uri and uri != 'sqlite://':
+        options.update(poolclass=QueuePool, pool_size=1, max_overflow=0)
+    return create_engine(uri, **options)
+
+
+def start(app):
+    global _thread, _stale_after, _inline
+    interval = app.config.get('HEALTH_PROBE_INTERVAL', 5)
+    _stale_after = app.config.get('HEALTH_PROBE_STALE_AFTER', interval * 3 + 5)
+    with _lock:
+        if _thread is not None or _inline is not None:
+            return
+        with app.app_context():
+            engine = db.engine
+        # A private one-connection engine: probes never queue behind requests
+        # for a pooled connection, and requests never wait on a probe
+        probe_engine = _probe_engine(
+            app.config['SQLALCHEMY_DATABASE_URI'], app.config.get('SQLALCHEMY_ENGINE_OPTIONS')
+        )
+        binds = app.config.get('SQLALCHEMY_BINDS') or {}
+        replica_engines = {}
+        for name in replicas.names():
+            bind = binds[name] if isinstance(binds[name], dict) else {'url': binds[name]}
+            replica_engines[name] = _probe_engine(bind['url'], bind)
+        if not interval:
+            _inline = (probe_engine, engine.pool, replica_engines)
+            return
+        _stop.clear()
+        _thread = threading.Thread(
+            target=_run, args=(probe_engine, engine.pool, interval, replica_engines),
+            name='health-prober', daemon=True
+        )
+        _thread.start()
+
+
+def stop():
+    global _thread, _inline
+    _stop.set()
+    thread, _thread = _thread, None
+    if thread is not None:
+        thread.join(timeout=5)
+    inline, _inline = _inline, None
+    if inline is not None:
+        probe_engine, _, replica_engines = inline
+        for engine in (probe_engine, *replica_engines.values()):
+            engine.dispose()
+
+
+atexit.register(stop)
+
+
+def init_app(app):
+    start(app)
+
+    @app.route('/api/health/live')
+    def health_live():
+        return jsonify({'status': 'alive'}), 200
+
+    @app.route('/api/health/ready')
+    @app.route('/api/health')
+    def health_ready():
+        snapshot = current()
+        return jsonify(snapshot), 200 if snapshot['status'] == 'ready' else 503
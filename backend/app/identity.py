@@ -0,0 +1,112 @@
+"""Who is calling, without a database round-trip on the hot path.
+
+Access tokens carry ``role``, ``employee_id`` and ``department`` claims (see
+``identity_claims``), so most requests build their ``Identity`` straight from
+the token. Tokens without those claims, or issued before the user's record
+last changed, fall back to a per-process TTL/LRU cache and finally to a single
+joined query.
+
+Changes to a user's role or employee record flushed in this process invalidate
+the cached entry and mark earlier tokens' claims as stale. Other processes only pick up such
+changes when their cache entry expires and the token is reissued.
+"""
+import time
+from collections import namedtuple
+
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event
+
+from app import db
+from app.cache import TTLCache
+from app.models.user import User
+from app.models.employee import Employee
+
+Identity = namedtuple('Identity', ['user_id', 'role', 'employee_id', 'department'])
+
+_cache = TTLCache(maxsize=10000, ttl=300)
+# user_id -> time.time() of the last change; claims in tokens issued before
+# it are ignored. Entries only need to outlive an access token.
+_changed_at = TTLCache(maxsize=10000, ttl=3600)
+
+
+def init_app(app):
+    global _cache, _changed_at
+    _cache = TTLCache(
+        maxsize=app.config.get('IDENTITY_CACHE_SIZE', 10000),
+        ttl=app.config.get('IDENTITY_CACHE_TTL', 300)
+    )
+    _changed_at = TTLCache(
+        maxsize=app.config.get('IDENTITY_CACHE_SIZE', 10000),
+        ttl=app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds()
+    )
+
+
+def identity_claims(user):
+    """Extra JWT claims describing ``user``; pass as ``additional_claims``."""
+    employee = user.employee
+    return {
+        'role': user.role,
+        'employee_id': employee.employee_id if employee else None,
+        'department': employee.department if employee else None
+    }
+
+
+def load_identity(user_id, session=None):
+    row = (session or db.session).query(User.user_id, User.role, Employee.employee_id, Employee.department)\
+        .outerjoin(Employee, Employee.user_id == User.user_id)\
+        .filter(User.user_id == user_id)\
+        .first()
+    return Identity(*row) if row else None
+
+
+def identity_from_token(user_id, claims, session=None):
+    """Identity for a decoded token's subject and claims.
+
+    ``session`` defaults to ``db.session``; the ASGI app passes the sync
+    facade of its async session.
+    """
+    changed_at = _changed_at.get(user_id)
+    if 'role' in claims and (changed_at is None or claims.get('iat', 0) > changed_at):
+        return Identity(user_id, claims['role'], claims.get('employee_id'), claims.get('department'))
+
+    identity = _cache.get(user_id)
+    if identity is None:
+        identity = load_identity(user_id, session)
+        if identity is not None:
+            _cache.set(user_id, identity)
+    return identity
+
+
+def current_identity():
+    """Identity of the JWT holder, or None if the user no longer exists."""
+    return identity_from_token(int(get_jwt_identity()), get_jwt())
+
+
+def invalidate(user_id):
+    _cache.pop(user_id)
+    _changed_at.set(user_id, time.time())
+
+
+def _changed(target, *attributes):
+    state = db.inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    # Password rehashes on login must not disown the token being issued
+    if _changed(target, 'role'):
+        invalidate(target.user_id)
+
+
+@event.listens_for(Employee, 'after_update')
+def _employee_updated(mapper, connection, target):
+    if _changed(target, 'user_id', 'department'):
+        invalidate(target.user_id)
+
+
+@event.listens_for(User, 'after_delete')
+@event.listens_for(Employee, 'after_insert')
+@event.listens_for(Employee, 'after_delete')
+def _identity_changed(mapper, connection, target):
+    invalidate(target.user_id)
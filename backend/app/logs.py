@@ -0,0 +1,170 @@
+"""Logging set-up: a queue between request threads and log I/O, JSON records, sampling.
+
+Request threads only put records on a bounded in-memory queue; a
+``QueueListener`` thread formats them and writes them out. If the writer
+falls behind and the queue fills up, new records are dropped and counted
+(``log_records_dropped_total`` in ``/api/metrics``) rather than blocking the
+request.
+
+Messages are formatted on the listener thread, so log calls should pass
+%-style arguments (``logger.info("Saved %s", leave_id)``) instead of
+f-strings. A disabled level then costs one level check, and an enabled one
+costs no string building in the request. Arguments must not be mutated after
+the call.
+
+INFO and DEBUG records pass through a ``SamplingFilter``: each call site
+(logger plus message template) may emit ``LOG_SAMPLE_BURST`` records and
+then ``LOG_SAMPLE_PER_SECOND`` a second. The next record that gets through
+carries the number that were skipped. Warnings and errors are never sampled.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.metrics import LOG_RECORDS_DROPPED, LOG_RECORDS_SAMPLED_OUT
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'suppressed'}
+
+_lock = threading.Lock()
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, location and ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'where': f'{record.module}:{record.lineno}',
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith('_'):
+                entry[key] = value
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, 'suppressed', 0):
+            text += f' ({record.suppressed} similar suppressed)'
+        return text
+
+
+class SamplingFilter(logging.Filter):
+    """Token bucket per call site for records below WARNING."""
+
+    def __init__(self, per_second, burst):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst
+        # (logger, template) -> [tokens, last refill, suppressed since last pass]
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.per_second:
+            return True
+        key = (record.name, record.msg if isinstance(record.msg, str) else id(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                LOG_RECORDS_SAMPLED_OUT.inc()
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """``QueueHandler`` that never waits on a full queue and leaves formatting to the listener."""
+
+    def prepare(self, record):
+        # Keep msg/args as they are so getMessage() runs on the listener
+        # thread. Render the traceback now, because the frames behind
+        # exc_info will not outlive the request.
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def _levels(level_map):
+    for name, level in level_map.items():
+        logging.getLogger(name or None).setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def configure(config, stream=None):
+    """Install handlers and levels from a config class (``LOG_*`` settings).
+
+    Safe to call more than once; a previous listener is stopped and replaced.
+    """
+    global _listener
+    formatter = JsonFormatter() if config.LOG_FORMAT == 'json' else TextFormatter(TEXT_FORMAT)
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(formatter)
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        if config.LOG_QUEUE_SIZE:
+            handler = NonBlockingQueueHandler(queue.Queue(config.LOG_QUEUE_SIZE))
+            _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+            _listener.start()
+        else:
+            handler = output
+        handler.addFilter(SamplingFilter(config.LOG_SAMPLE_PER_SECOND, config.LOG_SAMPLE_BURST))
+        root.addHandler(handler)
+        _levels(config.LOG_LEVELS)
+
+
+def shutdown():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown)
@@ -0,0 +1,274 @@
+"""Per-request timings, SQL and connection-pool metrics in Prometheus text format.
+
+``init_app`` times every request and counts the SQL statements and database
+time spent inside it, using engine events. It also swaps the engine's
+``QueuePool`` for a subclass that times how long checkouts wait for a
+connection. All of it is served at ``/api/metrics`` in the Prometheus text
+exposition format, to scrapers that send ``METRICS_TOKEN`` as a bearer
+token; without a token configured the endpoint answers 404. Responses slower
+than ``SERVER_TIMING_THRESHOLD_MS`` also carry a ``Server-Timing`` header, so
+they can be inspected from browser dev tools.
+
+Metrics live in process memory. Run one gunicorn worker per scrape target,
+or expect each scrape to see a single worker's numbers.
+"""
+import hmac
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Prometheus client defaults, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        # labelvalues -> [per-bucket counts, sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, ([*entry[0]], entry[1], entry[2])) for key, entry in self._values.items())
+        for labelvalues, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, labelvalues, ('le', _format_value(float(bound))))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request.',
+    ('method', 'endpoint', 'status')
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL statements executed per request.',
+    ('endpoint',), buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Counter(
+    'http_request_db_seconds_total', 'Time spent in SQL statements, by endpoint.',
+    ('endpoint',)
+)
+DB_QUERIES = Counter('db_queries_total', 'SQL statements executed, in or out of requests.')
+DB_QUERY_SECONDS = Counter('db_query_seconds_total', 'Time spent in SQL statements, in or out of requests.')
+POOL_CHECKOUTS = Counter('db_pool_checkouts_total', 'Connections checked out of the pool.')
+POOL_TIMEOUTS = Counter('db_pool_checkout_timeouts_total', 'Checkouts that gave up waiting for a connection.')
+POOL_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection.',
+    buckets=POOL_WAIT_BUCKETS
+)
+LOG_RECORDS_DROPPED = Counter('log_records_dropped_total', 'Log records dropped because the log queue was full.')
+LOG_RECORDS_SAMPLED_OUT = Counter('log_records_sampled_out_total', 'INFO/DEBUG log records skipped by sampling.')
+
+_registry = [
+    REQUEST_DURATION, REQUEST_DB_QUERIES, REQUEST_DB_SECONDS,
+    DB_QUERIES, DB_QUERY_SECONDS, POOL_CHECKOUTS, POOL_TIMEOUTS, POOL_WAIT,
+    LOG_RECORDS_DROPPED, LOG_RECORDS_SAMPLED_OUT
+]
+
+
+class InstrumentedQueuePool(QueuePool):
+    """``QueuePool`` that records how long each checkout waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        POOL_WAIT.observe(time.perf_counter() - start)
+        POOL_CHECKOUTS.inc()
+        return connection
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    if exception_context.connection is not None:
+        _finish_query(exception_context.connection)
+
+
+def _finish_query(conn):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.inc(elapsed)
+    if has_request_context() and 'metrics_start' in g:
+        g.metrics_db_queries += 1
+        g.metrics_db_seconds += elapsed
+
+
+def _endpoint_label():
+    # The URL rule, not the path, so ids do not blow up label cardinality
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def _pool_gauges():
+    from app import db
+    try:
+        pool = db.engine.pool
+    except Exception:
+        return []
+    if not isinstance(pool, QueuePool):
+        return []
+    gauges = (
+        ('db_pool_size', 'Configured pool size.', pool.size()),
+        ('db_pool_checked_out', 'Connections currently checked out.', pool.checkedout()),
+        ('db_pool_checked_in', 'Idle connections held by the pool.', pool.checkedin()),
+        ('db_pool_overflow', 'Connections open beyond pool_size (negative while the pool fills).', pool.overflow()),
+    )
+    lines = []
+    for name, documentation, value in gauges:
+        lines.extend([f'# HELP {name} {documentation}', f'# TYPE {name} gauge', f'{name} {value}'])
+    return lines
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    lines.extend(_pool_gauges())
+    return '\n'.join(lines) + '\n'
+
+
+def _instrumented(options, uri):
+    options = dict(options or {})
+    uri = uri or ''
+    # In-memory SQLite needs its single-connection pool
+    if 'poolclass' not in options and ':memory:' not in uri and uri != 'sqlite://':
+        options['poolclass'] = InstrumentedQueuePool
+    return options
+
+
+def init_app(app):
+    """Register request timing hooks and ``/api/metrics``.
+
+    Must run before ``db.init_app`` so the engine is built with the
+    instrumented pool.
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _instrumented(
+        app.config.get('SQLALCHEMY_ENGINE_OPTIONS'), app.config.get('SQLALCHEMY_DATABASE_URI')
+    )
+    # Replica binds carry their own options (see config.replica_binds)
+    app.config['SQLALCHEMY_BINDS'] = {
+        key: _instrumented(bind, bind.get('url')) if isinstance(bind, dict) else bind
+        for key, bind in (app.config.get('SQLALCHEMY_BINDS') or {}).items()
+    }
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_db_queries = 0
+        g.metrics_db_seconds = 0.0
+
+    @app.after_request
+    def _record_request(response):
+        if 'metrics_start' not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_start
+        endpoint = _endpoint_label()
+        REQUEST_DURATION.observe(elapsed, request.method, endpoint, str(response.status_code))
+        REQUEST_DB_QUERIES.observe(g.metrics_db_queries, endpoint)
+        REQUEST_DB_SECONDS.inc(g.metrics_db_seconds, endpoint)
+
+        threshold_ms = current_app.config.get('SERVER_TIMING_THRESHOLD_MS')
+        if threshold_ms is not None and elapsed * 1000 >= threshold_ms:
+            response.headers['Server-Timing'] = (
+                f'app;dur={elapsed * 1000:.1f}, '
+                f'db;dur={g.metrics_db_seconds * 1000:.1f};desc="{g.metrics_db_queries} queries"'
+            )
+        return response
+
+    @app.route('/api/metrics')
+    def metrics():
+        token = current_app.config.get('METRICS_TOKEN')
+        if not token:
+            return Response('not found\n', status=404, content_type='text/plain')
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response('unauthorized\n', status=401, content_type='text/plain')
+        return Response(render(), content_type=CONTENT_TYPE)
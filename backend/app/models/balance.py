@@ -0,0 +1,28 @@
+from app import db
+
+class LeaveBalance(db.Model):
+    """Running leave ledger, one row per (employee, leave_type, year).
+
+    ``pending_days`` holds the working days of applications awaiting review
+    and ``used_days`` those of accepted ones. ``request_leave`` and the review
+    endpoints move days between the two before they commit, so checking an
+    application against the allowance is one primary-key read per calendar
+    year it touches. Allowances come from ``LEAVE_ALLOWANCES`` and are not
+    stored here.
+    """
+    __tablename__ = 'Leave_Balances'
+
+    employee_id = db.Column(db.Integer, db.ForeignKey('Employees.employee_id'), primary_key=True)
+    leave_type = db.Column(db.String(50), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    used_days = db.Column(db.Float, nullable=False, default=0)
+    pending_days = db.Column(db.Float, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'employee_id': self.employee_id,
+            'leave_type': self.leave_type,
+            'year': self.year,
+            'used_days': self.used_days,
+            'pending_days': self.pending_days
+        }
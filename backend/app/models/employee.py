@@ -12,6 +12,10 @@ class Employee(db.Model):
     department = db.Column(db.String(255), nullable=False)
     position = db.Column(db.String(255), nullable=False)
     date_joined = db.Column(db.Date, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_employees_user_id', 'user_id'),
+    )
     
     # Relationships
     leave_applications = db.relationship('LeaveApplication', backref='employee')
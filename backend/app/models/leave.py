@@ -1,6 +1,5 @@
 from app import db
 from datetime import datetime
-from app.models.user import User
 
 class LeaveApplication(db.Model):
     __tablename__ = 'Leave_Applications'
@@ -14,36 +13,23 @@ class LeaveApplication(db.Model):
     reason = db.Column(db.Text, nullable=False)
     status = db.Column(db.String(20), default='pending', nullable=False)
     application_date = db.Column(db.TIMESTAMP, default=datetime.utcnow)
+
+    # Listing indexes: keyset pagination walks application_date, optionally
+    # narrowed by employee (own history) or status (admin filters)
+    __table_args__ = (
+        db.Index('ix_leave_applications_application_date', 'application_date', 'leave_application_id'),
+        db.Index('ix_leave_applications_employee_date', 'employee_id', 'application_date'),
+        db.Index('ix_leave_applications_status_date', 'status', 'application_date'),
+    )
     
     # Relationship with LeaveReview
     review = db.relationship('LeaveReview', backref='application', uselist=False)
 
     def to_dict(self):
-        review_data = None
-        if self.review:
-            reviewer = User.query.get(self.review.reviewed_by)
-            review_data = {
-                'review_date': self.review.review_date.isoformat() if self.review.review_date else None,
-                'comments': self.review.comments,
-                'reviewer': {
-                    'id': reviewer.user_id,
-                    'email': reviewer.email,
-                    'name': reviewer.username
-                } if reviewer else None
-            }
-
-        return {
-            'leave_application_id': self.leave_application_id,
-            'employee_id': self.employee_id,
-            'leave_type': self.leave_type,
-            'leave_mode': self.leave_mode,
-            'start_date': self.start_date.isoformat() if self.start_date else None,
-            'end_date': self.end_date.isoformat() if self.end_date else None,
-            'reason': self.reason,
-            'status': self.status,
-            'application_date': self.application_date.isoformat() if self.application_date else None,
-            'review': review_data
-        }
+        # Single-row convenience; listings should call serialize_applications
+        # directly so related rows are loaded in one batch.
+        from app.serializers import serialize_applications
+        return serialize_applications([self])[0]
 
 class LeaveReview(db.Model):
     __tablename__ = 'Leave_Reviews'
@@ -55,6 +41,10 @@ class LeaveReview(db.Model):
     status = db.Column(db.Enum('accepted', 'denied'), nullable=False)
     comments = db.Column(db.Text)
 
+    __table_args__ = (
+        db.Index('ix_leave_reviews_leave_application_id', 'leave_application_id'),
+    )
+
     def to_dict(self):
         return {
             'leave_review_id': self.leave_review_id,
@@ -0,0 +1,34 @@
+from app import db
+
+class LeaveOccupancy(db.Model):
+    """Materialized per-day index of accepted leave.
+
+    One row per calendar day covered by an accepted application, kept in sync
+    by ``review_leave``. Range and point "who is out" queries become index
+    range scans over ``day`` instead of overlap tests against every
+    application. ``department`` is copied from the employee at acceptance
+    time so department filters stay on the same index.
+    """
+    __tablename__ = 'Leave_Occupancy'
+
+    leave_application_id = db.Column(
+        db.Integer,
+        db.ForeignKey('Leave_Applications.leave_application_id'),
+        primary_key=True
+    )
+    day = db.Column(db.Date, primary_key=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('Employees.employee_id'), nullable=False)
+    department = db.Column(db.String(255), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_leave_occupancy_day', 'day', 'employee_id'),
+        db.Index('ix_leave_occupancy_department_day', 'department', 'day', 'employee_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'leave_application_id': self.leave_application_id,
+            'day': self.day.isoformat(),
+            'employee_id': self.employee_id,
+            'department': self.department
+        }
@@ -0,0 +1,46 @@
+from app import db
+from datetime import datetime
+
+class OutboxMessage(db.Model):
+    """A notification to deliver after the transaction that produced it commits.
+
+    Reviews insert rows here in the same transaction as the ``LeaveReview``,
+    so a message exists if and only if the review does. The dispatcher
+    (``dispatch_outbox.py``) claims due rows by pushing ``next_attempt_at``
+    forward under its ``claim_token``, delivers them, then marks them
+    ``sent``, reschedules them with backoff, or gives up (``failed``).
+    Delivery is at-least-once; receivers deduplicate on ``idempotency_key``.
+    """
+    __tablename__ = 'Outbox_Messages'
+
+    outbox_message_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    idempotency_key = db.Column(db.String(64), nullable=False, unique=True)
+    channel = db.Column(db.String(20), nullable=False)
+    topic = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = db.Column(db.String(32))
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    # The dispatcher's poll: pending rows in due order
+    __table_args__ = (
+        db.Index('ix_outbox_messages_due', 'status', 'next_attempt_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'outbox_message_id': self.outbox_message_id,
+            'idempotency_key': self.idempotency_key,
+            'channel': self.channel,
+            'topic': self.topic,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
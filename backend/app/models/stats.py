@@ -0,0 +1,22 @@
+from app import db
+
+class LeaveStatCounter(db.Model):
+    """Pre-aggregated dashboard counter, one row per (dimension, bucket).
+
+    Dimensions are ``status``, ``department`` and ``leave_type`` (application
+    counts), ``day`` (employees on accepted leave on an ISO date) and
+    ``month`` (accepted applications overlapping a ``YYYY-MM`` month). The
+    composite primary key doubles as the index for bucket range reads.
+    """
+    __tablename__ = 'Leave_Stat_Counters'
+
+    dimension = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.String(255), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'dimension': self.dimension,
+            'bucket': self.bucket,
+            'count': self.count
+        }
@@ -1,5 +1,5 @@
 from app import db
-import bcrypt
+from app import passwords
 from datetime import datetime
 
 class User(db.Model):
@@ -16,14 +16,13 @@ class User(db.Model):
     employee = db.relationship('Employee', backref='user', uselist=False)
     
     def set_password(self, password):
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        self.password_hash = passwords.hash_password(password)
     
     def check_password(self, password):
-        return bcrypt.checkpw(
-            password.encode('utf-8'),
-            self.password_hash.encode('utf-8')
-        )
+        return passwords.verify_password(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        return passwords.needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
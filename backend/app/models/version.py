@@ -0,0 +1,19 @@
+from app import db
+
+class DataVersion(db.Model):
+    """Monotonic change counter for a cache scope (e.g. ``applications``).
+
+    Writers bump the counters of the scopes they touch in the same
+    transaction; readers build ETags from them without running the query
+    they guard.
+    """
+    __tablename__ = 'Data_Versions'
+
+    scope = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'scope': self.scope,
+            'version': self.version
+        }
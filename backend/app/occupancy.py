@@ -0,0 +1,158 @@
+"""Date-range occupancy index over accepted leave.
+
+``review_leave`` calls ``record_status_change`` before committing, so the
+``Leave_Occupancy`` rows always match the set of accepted applications.
+"""
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.occupancy import LeaveOccupancy
+from app.models.stats import LeaveStatCounter
+from app.models.leave import LeaveApplication
+from app.models.employee import Employee
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _rows(leave_application_id, employee_id, department, start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield {
+            'leave_application_id': leave_application_id,
+            'day': day,
+            'employee_id': employee_id,
+            'department': department
+        }
+        day += timedelta(days=1)
+
+
+def record_status_change(leave, old_status, new_status, department):
+    """Add or drop ``leave``'s days when it enters or leaves 'accepted'."""
+    table = LeaveOccupancy.__table__
+    if new_status == 'accepted' and old_status != 'accepted':
+        db.session.execute(table.insert(), list(_rows(
+            leave.leave_application_id, leave.employee_id, department,
+            leave.start_date, leave.end_date
+        )))
+    elif old_status == 'accepted' and new_status != 'accepted':
+        db.session.execute(
+            table.delete().where(table.c.leave_application_id == leave.leave_application_id)
+        )
+
+
+def who_is_out(date_from, date_to, department=None):
+    """Return the accepted leave overlapping [date_from, date_to].
+
+    One entry per application, with the first and last day it covers inside
+    the range and the number of days out in it. Pass the same date twice for
+    a point query.
+    """
+    query = db.session.query(
+        LeaveOccupancy.leave_application_id,
+        LeaveOccupancy.employee_id,
+        LeaveOccupancy.department,
+        db.func.min(LeaveOccupancy.day).label('first_day'),
+        db.func.max(LeaveOccupancy.day).label('last_day'),
+        db.func.count().label('days_out')
+    ).filter(LeaveOccupancy.day.between(date_from, date_to))
+    if department:
+        query = query.filter(LeaveOccupancy.department == department)
+    return query.group_by(
+        LeaveOccupancy.leave_application_id,
+        LeaveOccupancy.employee_id,
+        LeaveOccupancy.department
+    ).order_by(LeaveOccupancy.employee_id).all()
+
+
+def department_capacity(department):
+    """Configured daily leave capacity for ``department``, or None for no limit."""
+    capacities = current_app.config.get('DEPARTMENT_LEAVE_CAPACITY') or {}
+    if department in capacities:
+        return capacities[department]
+    return current_app.config.get('DEFAULT_DEPARTMENT_LEAVE_CAPACITY')
+
+
+def lock_department(department):
+    """Lock ``department``'s row until the transaction ends.
+
+    The row is the department's application counter in ``Leave_Stat_Counters``,
+    created empty if it is missing. Callers that lock several departments
+    must do so in sorted order.
+    """
+    table = LeaveStatCounter.__table__
+    key = (table.c.dimension == 'department') & (table.c.bucket == department)
+    locked = db.session.execute(db.select(table.c.count).where(key).with_for_update()).first()
+    if locked is None:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(dimension='department', bucket=department, count=0))
+        except IntegrityError:
+            pass  # a concurrent transaction created it first
+        db.session.execute(db.select(table.c.count).where(key).with_for_update())
+
+
+def find_capacity_conflicts(department, start_date, end_date, employee_id):
+    """Days in the range on which one more absence would exceed capacity.
+
+    Counts colleagues already on accepted leave per day through the
+    (department, day) index, so the cost depends on the requested range and
+    not on the department's history. The requesting employee's own accepted
+    leave is ignored.
+
+    The department is locked (``lock_department``) until the caller's
+    transaction ends, so two concurrent approvals in one department check
+    and record their days one after the other instead of both passing.
+    """
+    capacity = department_capacity(department)
+    if capacity is None:
+        return []
+
+    lock_department(department)
+
+    out_per_day = db.session.query(
+        LeaveOccupancy.day,
+        db.func.count(db.distinct(LeaveOccupancy.employee_id))
+    ).filter(LeaveOccupancy.department == department)\
+        .filter(LeaveOccupancy.day.between(start_date, end_date))\
+        .filter(LeaveOccupancy.employee_id != employee_id)\
+        .group_by(LeaveOccupancy.day)\
+        .all()
+
+    return [
+        {'date': day.isoformat(), 'on_leave': on_leave, 'capacity': capacity}
+        for day, on_leave in sorted(out_per_day)
+        if on_leave >= capacity
+    ]
+
+
+def rebuild():
+    """Recompute the occupancy index from accepted applications."""
+    table = LeaveOccupancy.__table__
+    db.session.execute(table.delete())
+    total = 0
+    last_id = 0
+    while True:
+        # Walk the accepted rows in primary-key batches rather than holding a
+        # streaming cursor open while inserting on the same connection
+        accepted = db.session.execute(
+            db.select(
+                LeaveApplication.leave_application_id,
+                LeaveApplication.employee_id,
+                Employee.department,
+                LeaveApplication.start_date,
+                LeaveApplication.end_date
+            ).join(Employee)
+            .where(LeaveApplication.status == 'accepted')
+            .where(LeaveApplication.leave_application_id > last_id)
+            .order_by(LeaveApplication.leave_application_id)
+            .limit(REBUILD_BATCH_SIZE)
+        ).all()
+        if not accepted:
+            break
+        rows = [row for leave in accepted for row in _rows(*leave)]
+        db.session.execute(table.insert(), rows)
+        total += len(rows)
+        last_id = accepted[-1].leave_application_id
+    db.session.commit()
+    return total
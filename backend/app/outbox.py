@@ -0,0 +1,341 @@
+"""Transactional outbox for review notifications.
+
+The review endpoints never talk to a mail server or webhook. They insert
+``OutboxMessage`` rows in the same transaction as the ``LeaveReview``
+(``add``), so a rolled-back review leaves no message behind and a committed
+one always has its messages. Request latency therefore doesn't depend on
+how fast or how available the receivers are.
+
+``dispatch_outbox.py`` drains the table in batches:
+
+* ``claim`` takes up to ``OUTBOX_BATCH_SIZE`` due rows by pushing
+  ``next_attempt_at`` forward by ``OUTBOX_LEASE_SECONDS`` under a fresh
+  ``claim_token``. The UPDATE only matches rows that are still due, so
+  concurrent dispatchers never claim the same row. If a dispatcher dies,
+  its rows become due again when the lease runs out.
+* ``deliver`` sends a batch. Emails are split over up to
+  ``OUTBOX_SMTP_CONNECTIONS`` SMTP connections, and webhooks go out over
+  ``OUTBOX_HTTP_CONCURRENCY`` threads, all at the same time.
+* ``finish`` marks delivered rows ``sent``. Failed rows are rescheduled with
+  jittered exponential backoff, honouring ``Retry-After``. A row becomes
+  ``failed`` after ``OUTBOX_MAX_ATTEMPTS`` attempts, or at once on a
+  permanent error (SMTP 5xx, HTTP 4xx other than 408/429).
+
+Delivery is at-least-once. Every message carries its ``idempotency_key``
+(the ``Idempotency-Key`` header on webhooks, and ``Message-ID`` plus
+``X-Idempotency-Key`` on email), so receivers can drop repeats.
+
+Channels are queued only when configured: email needs ``SMTP_HOST``, and the
+payroll webhook needs ``PAYROLL_WEBHOOK_URL``.
+"""
+import json
+import logging
+import random
+import smtplib
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from flask import current_app
+
+from app import db
+from app import responses
+from app.models.employee import Employee
+from app.models.outbox import OutboxMessage
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+EMAIL = 'email'
+WEBHOOK = 'webhook'
+REVIEWED = 'application.reviewed'
+
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
+
+# Longest last_error kept on a row
+MAX_ERROR_LENGTH = 500
+
+
+class DeliveryError(Exception):
+    """A delivery that did not go through; ``permanent`` ones are not retried."""
+
+    def __init__(self, message, permanent=False, retry_after=None):
+        super().__init__(message)
+        self.permanent = permanent
+        self.retry_after = retry_after
+
+
+def channels():
+    """Channels with a configured receiver, in the order messages are queued."""
+    config = current_app.config
+    enabled = []
+    if config.get('SMTP_HOST'):
+        enabled.append(EMAIL)
+    if config.get('PAYROLL_WEBHOOK_URL'):
+        enabled.append(WEBHOOK)
+    return enabled
+
+
+def recipients(employee_ids):
+    """``{employee_id: (first_name, email)}`` for notification emails, in one query."""
+    if not employee_ids:
+        return {}
+    rows = db.session.execute(
+        db.select(Employee.employee_id, Employee.first_name, User.email)
+        .join(User, User.user_id == Employee.user_id)
+        .where(Employee.employee_id.in_(employee_ids))
+    )
+    return {employee_id: (first_name, email) for employee_id, first_name, email in rows}
+
+
+def _message(channel, payload, now):
+    return {
+        'idempotency_key': uuid.uuid4().hex,
+        'channel': channel,
+        'topic': REVIEWED,
+        'payload': responses.dumps(payload),
+        'status': PENDING,
+        'attempts': 0,
+        'next_attempt_at': now,
+        'created_at': now
+    }
+
+
+def review_messages(event, leave, recipient, now):
+    """Outbox rows announcing one review.
+
+    ``event`` is ``events.reviewed(...)`` and ``recipient`` comes from
+    ``recipients`` (None skips the email).
+    """
+    messages = []
+    enabled = channels()
+    if EMAIL in enabled and recipient:
+        first_name, email = recipient
+        status = event['status']
+        period = leave.start_date.isoformat() if leave.start_date == leave.end_date \
+            else f"{leave.start_date.isoformat()} to {leave.end_date.isoformat()}"
+        lines = [f"Hi {first_name},", "", f"Your {leave.leave_type} leave request for {period} was {status}."]
+        if event['review']['comments']:
+            lines += ["", f"Comments: {event['review']['comments']}"]
+        messages.append(_message(EMAIL, {
+            'to': email,
+            'subject': f"Leave request {status}",
+            'text': '\n'.join(lines) + '\n'
+        }, now))
+    if WEBHOOK in enabled:
+        messages.append(_message(WEBHOOK, dict(event, leave={
+            'leave_type': leave.leave_type,
+            'leave_mode': leave.leave_mode,
+            'start_date': leave.start_date.isoformat(),
+            'end_date': leave.end_date.isoformat()
+        }), now))
+    return messages
+
+
+def add(session, messages):
+    """Insert ``messages`` as part of ``session``'s transaction."""
+    if messages:
+        session.execute(OutboxMessage.__table__.insert(), messages)
+
+
+def claim(limit=None, now=None):
+    """Lease up to ``limit`` due messages to this dispatcher; returns ``(token, rows)``."""
+    config = current_app.config
+    table = OutboxMessage.__table__
+    limit = limit or config['OUTBOX_BATCH_SIZE']
+    now = now or datetime.utcnow()
+    token = uuid.uuid4().hex
+    due = [row[0] for row in db.session.execute(
+        db.select(table.c.outbox_message_id)
+        .where(table.c.status == PENDING, table.c.next_attempt_at <= now)
+        .order_by(table.c.next_attempt_at)
+        .limit(limit)
+    )]
+    rows = []
+    if due:
+        # Re-checks due-ness so a row another dispatcher claimed meanwhile is skipped
+        db.session.execute(
+            table.update()
+            .where(table.c.outbox_message_id.in_(due), table.c.status == PENDING,
+                   table.c.next_attempt_at <= now)
+            .values(next_attempt_at=now + timedelta(seconds=config['OUTBOX_LEASE_SECONDS']), claim_token=token)
+        )
+        rows = db.session.execute(
+            db.select(table).where(table.c.claim_token == token).order_by(table.c.outbox_message_id)
+        ).all()
+    db.session.commit()
+    return token, rows
+
+
+def _send_emails(config, rows, results):
+    try:
+        smtp = smtplib.SMTP(config['SMTP_HOST'], config['SMTP_PORT'], timeout=config['OUTBOX_TIMEOUT_SECONDS'])
+    except (OSError, smtplib.SMTPException) as e:
+        for row in rows:
+            results[row.outbox_message_id] = DeliveryError(f'SMTP connect failed: {e}')
+        return
+    try:
+        if config.get('SMTP_STARTTLS'):
+            smtp.starttls()
+        if config.get('SMTP_USERNAME'):
+            smtp.login(config['SMTP_USERNAME'], config.get('SMTP_PASSWORD') or '')
+        for row in rows:
+            payload = json.loads(row.payload)
+            message = EmailMessage()
+            message['From'] = config['SMTP_FROM']
+            message['To'] = payload['to']
+            message['Subject'] = payload['subject']
+            message['Message-ID'] = f'<{row.idempotency_key}@outbox.hr>'
+            message['X-Idempotency-Key'] = row.idempotency_key
+            message.set_content(payload['text'])
+            try:
+                smtp.send_message(message)
+                results[row.outbox_message_id] = None
+            except smtplib.SMTPRecipientsRefused as e:
+                codes = [code for code, _ in e.recipients.values()]
+                results[row.outbox_message_id] = DeliveryError(
+                    f'Recipient refused: {e.recipients}', permanent=all(code >= 500 for code in codes)
+                )
+            except smtplib.SMTPResponseException as e:
+                results[row.outbox_message_id] = DeliveryError(
+                    f'SMTP {e.smtp_code}: {e.smtp_error!r}', permanent=e.smtp_code >= 500
+                )
+    except (OSError, smtplib.SMTPException) as e:
+        # The connection broke; whatever was not sent yet is retried
+        for row in rows:
+            results.setdefault(row.outbox_message_id, DeliveryError(f'SMTP failed: {e}'))
+    finally:
+        try:
+            smtp.quit()
+        except (OSError, smtplib.SMTPException):
+            smtp.close()
+
+
+def _retry_after(headers):
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _post_webhook(url, timeout, row):
+    request = urllib.request.Request(url, data=row.payload.encode(), method='POST', headers={
+        'Content-Type': 'application/json',
+        'Idempotency-Key': row.idempotency_key,
+        'X-Outbox-Topic': row.topic
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+        return None
+    except urllib.error.HTTPError as e:
+        retryable = e.code in (408, 429) or e.code >= 500
+        return DeliveryError(f'HTTP {e.code}', permanent=not retryable, retry_after=_retry_after(e.headers))
+    except (OSError, ValueError) as e:
+        return DeliveryError(f'Webhook failed: {e}')
+
+
+def _send_webhooks(config, rows, results):
+    url, timeout = config['PAYROLL_WEBHOOK_URL'], config['OUTBOX_TIMEOUT_SECONDS']
+    with ThreadPoolExecutor(max_workers=min(len(rows), config['OUTBOX_HTTP_CONCURRENCY'])) as pool:
+        outcomes = pool.map(lambda row: _post_webhook(url, timeout, row), rows)
+        for row, outcome in zip(rows, outcomes):
+            results[row.outbox_message_id] = outcome
+
+
+def deliver(rows):
+    """Send claimed ``rows``; returns ``{outbox_message_id: None or DeliveryError}``."""
+    config = current_app.config
+    results = {}
+    enabled = channels()
+    by_channel = {}
+    for row in rows:
+        if row.channel in enabled:
+            by_channel.setdefault(row.channel, []).append(row)
+        else:
+            results[row.outbox_message_id] = DeliveryError(f'Channel {row.channel!r} is not configured')
+    emails = by_channel.get(EMAIL, [])
+    connections = max(1, min(len(emails), config['OUTBOX_SMTP_CONNECTIONS']))
+    jobs = [(_send_emails, emails[i::connections]) for i in range(connections) if emails[i::connections]]
+    if by_channel.get(WEBHOOK):
+        jobs.append((_send_webhooks, by_channel[WEBHOOK]))
+    if jobs:
+        # Each job writes only its own rows' results
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            for future in [pool.submit(send, config, batch, results) for send, batch in jobs]:
+                future.result()
+    return results
+
+
+def backoff(attempts, retry_after=None):
+    """Seconds before attempt ``attempts + 1``: jittered exponential, at least ``retry_after``."""
+    config = current_app.config
+    delay = min(config['OUTBOX_MAX_BACKOFF_SECONDS'], config['OUTBOX_BACKOFF_SECONDS'] * 2 ** (attempts - 1))
+    delay *= random.uniform(0.5, 1.0)
+    return max(delay, retry_after or 0)
+
+
+def finish(token, rows, results, now=None):
+    """Record the outcome of a delivered batch; only rows still held under ``token`` are updated."""
+    config = current_app.config
+    table = OutboxMessage.__table__
+    now = now or datetime.utcnow()
+    sent = [row.outbox_message_id for row in rows if results.get(row.outbox_message_id) is None]
+    failed = []
+    for row in rows:
+        error = results.get(row.outbox_message_id)
+        if error is None:
+            continue
+        attempts = row.attempts + 1
+        gave_up = error.permanent or attempts >= config['OUTBOX_MAX_ATTEMPTS']
+        if gave_up:
+            logger.warning("Outbox message %s (%s) failed after %s attempts: %s",
+                           row.outbox_message_id, row.channel, attempts, error)
+        failed.append({
+            'b_outbox_message_id': row.outbox_message_id,
+            'status': FAILED if gave_up else PENDING,
+            'attempts': attempts,
+            'next_attempt_at': now if gave_up else now + timedelta(seconds=backoff(attempts, error.retry_after)),
+            'last_error': str(error)[:MAX_ERROR_LENGTH]
+        })
+    if sent:
+        db.session.execute(
+            table.update()
+            .where(table.c.outbox_message_id.in_(sent), table.c.claim_token == token)
+            .values(status=SENT, sent_at=now, attempts=table.c.attempts + 1, claim_token=None, last_error=None)
+        )
+    if failed:
+        db.session.execute(
+            table.update()
+            .where(table.c.outbox_message_id == db.bindparam('b_outbox_message_id'),
+                   table.c.claim_token == token)
+            .values(claim_token=None),
+            failed
+        )
+    db.session.commit()
+    return len(sent), len(failed)
+
+
+def dispatch_batch():
+    """Claim, deliver and record one batch; returns ``(claimed, sent, failed)``."""
+    token, rows = claim()
+    if not rows:
+        return 0, 0, 0
+    results = deliver(rows)
+    sent, failed = finish(token, rows, results)
+    logger.info("Outbox batch: %s claimed, %s sent, %s failed", len(rows), sent, failed)
+    return len(rows), sent, failed
+
+
+def purge(now=None):
+    """Delete sent messages older than ``OUTBOX_RETAIN_DAYS``; returns the number removed."""
+    table = OutboxMessage.__table__
+    cutoff = (now or datetime.utcnow()) - timedelta(days=current_app.config['OUTBOX_RETAIN_DAYS'])
+    result = db.session.execute(table.delete().where(table.c.status == SENT, table.c.sent_at < cutoff))
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,179 @@
+"""Password hashing on a bounded process pool.
+
+bcrypt is deliberately slow. Running it inside the request thread lets a
+burst of logins occupy every gunicorn thread, so hashing and verification are
+sent to a small process pool instead. A semaphore caps the number of jobs
+in flight or queued; callers that cannot get a slot within
+``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds get ``PasswordHasherBusy`` and the
+route answers 503 instead of piling up.
+
+The bcrypt cost is either fixed with ``BCRYPT_ROUNDS`` or calibrated so one
+hash takes roughly ``BCRYPT_TARGET_MS``. With ``LAZY_STARTUP`` calibration
+does not delay boot: it runs on the pool (or on first use when there is no
+pool), and hashing calls made before it finishes wait for the result.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+# bcrypt's supported cost range
+MIN_ROUNDS = 4
+MAX_ROUNDS = 16
+
+
+class PasswordHasherBusy(Exception):
+    """No hashing slot became free within the configured queue timeout."""
+
+
+_lock = threading.Lock()
+_executor = None
+_workers = 0
+_slots = threading.BoundedSemaphore(8)
+_queue_timeout = 5.0
+_rounds = 12
+# Pending calibration: a Future from the pool, or (target_ms, min_rounds)
+_calibration = None
+
+
+def calibrate_rounds(target_ms, min_rounds=10):
+    """Return the cost, at least ``min_rounds``, whose hash time is closest to ``target_ms``."""
+    rounds = max(MIN_ROUNDS, min_rounds)
+    while rounds < MAX_ROUNDS:
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        # Each extra round doubles the cost; stop once doubling would land
+        # further from the target than where we are
+        if elapsed_ms * 3 >= target_ms * 2:
+            break
+        rounds += 1
+    return rounds
+
+
+def init_app(app):
+    global _workers, _slots, _queue_timeout, _rounds, _calibration
+    _workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+    _slots = threading.BoundedSemaphore(app.config.get('PASSWORD_HASH_MAX_CONCURRENCY', 8))
+    _queue_timeout = app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5.0)
+
+    start_pool()
+    if app.config.get('BCRYPT_ROUNDS'):
+        _rounds = app.config['BCRYPT_ROUNDS']
+        logger.info("Password hashing: bcrypt cost %s, %s worker process(es)", _rounds, _workers)
+        return
+
+    target_ms = app.config.get('BCRYPT_TARGET_MS', 250)
+    min_rounds = app.config.get('BCRYPT_MIN_ROUNDS', 10)
+    if not app.config.get('LAZY_STARTUP'):
+        _rounds = calibrate_rounds(target_ms, min_rounds)
+        _calibration = None
+        logger.info("Password hashing: bcrypt cost %s (calibrated), %s worker process(es)", _rounds, _workers)
+    elif _executor is not None:
+        _calibration = _executor.submit(calibrate_rounds, target_ms, min_rounds)
+    else:
+        _calibration = (target_ms, min_rounds)
+
+
+def current_rounds():
+    """The bcrypt cost in use, finishing a deferred calibration first if needed."""
+    global _rounds, _calibration
+    if _calibration is None:
+        return _rounds
+    with _lock:
+        if _calibration is not None:
+            if isinstance(_calibration, tuple):
+                _rounds = calibrate_rounds(*_calibration)
+            else:
+                _rounds = _calibration.result()
+            _calibration = None
+            logger.info("Password hashing: bcrypt cost %s (calibrated), %s worker process(es)", _rounds, _workers)
+    return _rounds
+
+
+def _mp_context():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    # Workers only need bcrypt and this module, not the application
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def start_pool():
+    """Start the hashing processes now rather than on the first login.
+
+    Workers come from a ``forkserver`` (``spawn`` where there is none), not a
+    plain ``fork``: by this point the log listener thread is already running,
+    and a forked child could inherit a lock it holds. Starting the workers
+    takes a moment, so a no-op job here keeps that out of the request path.
+
+    Like any non-fork pool, this needs entry scripts that call ``create_app``
+    to do so under ``if __name__ == '__main__'``: workers re-import them.
+    """
+    global _executor
+    with _lock:
+        if _executor is None and _workers:
+            _executor = ProcessPoolExecutor(max_workers=_workers, mp_context=_mp_context())
+            _executor.submit(abs, 0).result()
+    return _executor
+
+
+def _get_executor():
+    return _executor or start_pool()
+
+
+def _run(fn, *args):
+    if not _slots.acquire(timeout=_queue_timeout):
+        raise PasswordHasherBusy()
+    try:
+        if not _workers:
+            return fn(*args)
+        return _get_executor().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    salt = bcrypt.gensalt(current_rounds())
+    return _run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+
+def hash_passwords(passwords):
+    """Hash many passwords at once, spread over every pool worker.
+
+    For offline bulk work such as employee imports; it does not take request
+    slots, so do not call it from a request handler.
+    """
+    encoded = [password.encode('utf-8') for password in passwords]
+    rounds = current_rounds()
+    salts = [bcrypt.gensalt(rounds) for _ in encoded]
+    if not encoded:
+        return []
+    if not _workers:
+        hashed = map(bcrypt.hashpw, encoded, salts)
+    else:
+        chunksize = max(1, len(encoded) // (_workers * 4))
+        hashed = _get_executor().map(bcrypt.hashpw, encoded, salts, chunksize=chunksize)
+    return [value.decode('utf-8') for value in hashed]
+
+
+def verify_password(password, password_hash):
+    return _run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def needs_rehash(password_hash):
+    """True when ``password_hash`` was made with a lower cost than configured.
+
+    Never true for a higher cost: a calibration that lands on fewer rounds
+    (a busy or noisy host) must not downgrade existing hashes on login.
+    """
+    try:
+        return int(password_hash.split('$')[2]) < current_rounds()
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,145 @@
+"""Read/write splitting between the primary and optional read replicas.
+
+Replicas are Flask-SQLAlchemy binds named ``replica1``, ``replica2``, ...
+(see ``DATABASE_REPLICA_URLS`` in ``config.py``). No model is bound to them,
+so every query goes to the primary unless the view opts in with
+``@replica_reads``. In an opted-in request, ``RoutingSession`` sends reads to
+a replica (round robin) and keeps these on the primary:
+
+* flushes and INSERT/UPDATE/DELETE statements, and every read after them
+  in the same request;
+* every read by a user who committed a write in the last
+  ``REPLICA_STICKY_SECONDS``, so people see their own changes at once;
+* every read while no replica is usable. The health prober marks a replica
+  unusable when its probe fails, or when it has trailed the primary's
+  ``applications`` data version for more than ``REPLICA_MAX_LAG_SECONDS``.
+  With the prober disabled (``HEALTH_PROBE_INTERVAL=0``) nothing checks
+  the lag, and replicas are always used.
+
+Other users may see data that is up to ``REPLICA_MAX_LAG_SECONDS`` old.
+ETags are built from the version counters read on the same replica, so they
+always describe the data that was returned.
+
+Like the identity cache, the sticky window is per process. It covers the
+default one-worker deployment. With more workers, a user's next request can
+land on a worker that has not seen the write.
+"""
+import itertools
+import threading
+import time
+from functools import wraps
+
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+from app.cache import TTLCache
+
+REPLICA_PREFIX = 'replica'
+
+_lock = threading.Lock()
+_names = []
+_status = {}
+_round_robin = itertools.count()
+_sticky = TTLCache(maxsize=10000, ttl=5)
+_max_lag = 30.0
+_db = None
+
+
+class RoutingSession(Session):
+    """Session that reads from ``info['replica']`` until it writes."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if replica is not None and bind is None and not self._flushing \
+                and not self.info.get('wrote') and not getattr(clause, 'is_dml', False):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_app(app, db):
+    global _names, _sticky, _max_lag, _db
+    _db = db
+    _names = sorted(name for name in (app.config.get('SQLALCHEMY_BINDS') or {})
+                    if name.startswith(REPLICA_PREFIX))
+    _sticky = TTLCache(maxsize=app.config.get('IDENTITY_CACHE_SIZE', 10000),
+                       ttl=app.config.get('REPLICA_STICKY_SECONDS', 5))
+    _max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', 30)
+    with _lock:
+        _status.clear()
+
+
+def names():
+    return list(_names)
+
+
+def record_probe(name, ok, behind):
+    """Called by the health prober: ``behind`` is whether the replica trails the primary."""
+    now = time.monotonic()
+    with _lock:
+        status = _status.setdefault(name, {'ok': True, 'behind_since': None})
+        status['ok'] = ok
+        if not ok or not behind:
+            status['behind_since'] = None
+        elif status['behind_since'] is None:
+            status['behind_since'] = now
+
+
+def status(name):
+    """``{'usable', 'lag_seconds'}`` as last seen by the prober."""
+    with _lock:
+        state = dict(_status.get(name) or {'ok': True, 'behind_since': None})
+    lag = time.monotonic() - state['behind_since'] if state['behind_since'] is not None else 0.0
+    return {'usable': state['ok'] and lag <= _max_lag, 'lag_seconds': round(lag, 1)}
+
+
+def pick():
+    """Engine of the next usable replica, or None to stay on the primary."""
+    usable = [name for name in _names if status(name)['usable']]
+    if not usable:
+        return None
+    return _db.engines[usable[next(_round_robin) % len(usable)]]
+
+
+def _current_user():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def replica_reads(view):
+    """Serve this view's reads from a replica when that is safe.
+
+    Goes under ``@jwt_required()`` so the caller's recent writes are known.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if _names:
+            user = _current_user()
+            if user is None or user not in _sticky:
+                replica = pick()
+                if replica is not None:
+                    _db.session.info['replica'] = replica
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if session.in_nested_transaction() or not session.info.pop('wrote', False):
+        return
+    user = _current_user()
+    if user is not None and _names:
+        _sticky.set(user, True)
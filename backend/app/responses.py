@@ -0,0 +1,147 @@
+"""Response layer: orjson encoding, ``?fields=`` projection and compression.
+
+``init_app`` installs ``JSONProvider`` as ``app.json``, so ``jsonify``,
+``request.get_json`` and the ASGI app's responses all use orjson. Dates and
+datetimes are written as ISO 8601, the format the serializers already use.
+Keys are not sorted.
+
+``parse_fields`` and ``project`` implement sparse fieldsets for listings.
+For example, ``?fields=leave_application_id,status,employee.name`` keeps
+only those keys in each item. Dotted names reach into nested objects, and
+unknown names are ignored. Views pass the parsed fields on to the
+serializers, so related rows nobody asked for are not loaded.
+
+JSON responses of at least ``COMPRESS_MIN_SIZE`` bytes are compressed with
+brotli or gzip, whichever the client prefers in ``Accept-Encoding``.
+Brotli is only offered when the optional ``Brotli`` package is installed.
+Streamed responses (the CSV/NDJSON export, the event stream) are left
+alone. Compressed responses carry a weak ETag, because their bytes differ
+from the identity encoding. ``If-None-Match`` is compared weakly, so either
+form revalidates.
+"""
+import gzip
+
+import orjson
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv')
+
+_min_size = 1024
+_gzip_level = 6
+_brotli_quality = 4
+
+
+def dumps(obj):
+    """Compact JSON text, as ``app.json.dumps`` writes it outside debug mode."""
+    return orjson.dumps(obj, default=DefaultJSONProvider.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class JSONProvider(DefaultJSONProvider):
+    """``app.json`` on orjson; pretty-printed in debug mode like Flask's own."""
+
+    def _option(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._option()).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._option() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def parse_fields(value):
+    """``'a,b.c,b.d'`` -> ``{'a': None, 'b': {'c': None, 'd': None}}``; None when unset.
+
+    ``None`` as a value means the whole key is kept.
+    """
+    if not value:
+        return None
+    tree = {}
+    for name in value.split(','):
+        parts = [part for part in name.strip().split('.') if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if node.get(part, {}) is None:
+                # Already keeping the whole object
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree or None
+
+
+def wants(fields, name):
+    """Whether projection ``fields`` keeps any part of key ``name``."""
+    return fields is None or name in fields
+
+
+def project(data, fields):
+    """Keep only ``fields`` (from ``parse_fields``) of a dict, or of each dict in a list."""
+    if fields is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {
+        key: data[key] if sub is None else project(data[key], sub)
+        for key, sub in fields.items() if key in data
+    }
+
+
+def negotiate(accept_encodings):
+    """Best of ``br``/``gzip`` acceptable to the client, or None."""
+    offers = ('br', 'gzip') if brotli is not None else ('gzip',)
+    return accept_encodings.best_match(offers)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=_brotli_quality)
+    return gzip.compress(data, compresslevel=_gzip_level, mtime=0)
+
+
+def should_compress(status_code, mimetype, size):
+    return 200 <= status_code < 300 and status_code != 204 \
+        and mimetype in COMPRESSIBLE_MIMETYPES and size >= _min_size
+
+
+def init_app(app):
+    global _min_size, _gzip_level, _brotli_quality
+    _min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    _gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    _brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+    app.json = JSONProvider(app)
+
+    @app.after_request
+    def _compress(response):
+        if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return response
+        response.vary.add('Accept-Encoding')
+        if not should_compress(response.status_code, response.mimetype, response.content_length or 0):
+            return response
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
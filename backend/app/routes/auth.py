@@ -1,18 +1,34 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, get_jwt, get_jwt_identity, jwt_required
+)
 from app.models.user import User
 from app.models.employee import Employee
 from app import db
+from app.passwords import PasswordHasherBusy
+from app.identity import identity_claims
+from app import tokens
 from datetime import datetime
 import logging
 
+logger = logging.getLogger(__name__)
+
 auth_bp = Blueprint('auth', __name__)
 
+# Seconds clients are asked to wait when every password hashing slot is taken
+BUSY_RETRY_AFTER = 1
+
+def busy_response():
+    logger.warning("Password hashing queue full, rejecting request")
+    response = jsonify({'error': 'Server busy, please retry shortly'})
+    response.headers['Retry-After'] = str(BUSY_RETRY_AFTER)
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
         data = request.get_json()
-        logging.info(f"Registration attempt with data: {data}")
+        logger.debug("Registration attempt for email: %s", data.get('email'))
 
         # Check if email already exists
         if User.query.filter_by(email=data['email']).first():
@@ -45,11 +61,14 @@ def register():
         db.session.add(employee)
         db.session.commit()
 
-        logging.info(f"User registered successfully: {user.email}")
+        logger.info("User registered successfully: %s", user.email)
         return jsonify({'message': 'Registration successful'}), 201
 
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
-        logging.error(f"Registration error: {str(e)}")
+        logger.exception("Registration error: %s", e)
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -57,22 +76,31 @@ def register():
 def login():
     try:
         data = request.get_json()
-        logging.info(f"Login attempt for email: {data.get('email')}")
+        logger.debug("Login attempt for email: %s", data.get('email'))
         
         # Find user by email
         user = User.query.filter_by(email=data.get('email')).first()
         
         if not user:
-            logging.warning(f"No user found with email: {data.get('email')}")
+            logger.warning("No user found with email: %s", data.get('email'))
             return jsonify({'error': 'Invalid email or password'}), 401
             
         # Verify password
         if not user.check_password(data.get('password')):
-            logging.warning(f"Invalid password for user: {data.get('email')}")
+            logger.warning("Invalid password for user: %s", data.get('email'))
             return jsonify({'error': 'Invalid email or password'}), 401
+
+        # Upgrade the stored hash when the configured bcrypt cost has changed
+        if user.password_needs_rehash():
+            user.set_password(data.get('password'))
+            db.session.commit()
+            logger.info("Rehashed password for user: %s", user.email)
             
         # Create tokens
-        access_token = create_access_token(identity=str(user.user_id))
+        access_token = create_access_token(
+            identity=str(user.user_id),
+            additional_claims=identity_claims(user)
+        )
         refresh_token = create_refresh_token(identity=str(user.user_id))
         
         # Create response
@@ -87,9 +115,44 @@ def login():
             }
         }
         
-        logging.info(f"Successful login for user: {user.email}")
+        logger.info("Successful login for user: %s", user.email)
         return jsonify(response_data), 200
-        
+
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return busy_response()
+    except Exception as e:
+        logger.exception("Login error: %s", e)
+        return jsonify({'error': 'An error occurred during login'}), 500 
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    try:
+        # Rotate: the presented refresh token is spent whether or not the
+        # rest of the exchange succeeds
+        if not tokens.revoke(get_jwt()):
+            return jsonify({'error': 'Token has been revoked'}), 401
+
+        user = User.query.get(int(get_jwt_identity()))
+        if not user:
+            return jsonify({'error': 'User not found'}), 401
+
+        response_data = {
+            'access_token': create_access_token(
+                identity=str(user.user_id),
+                additional_claims=identity_claims(user)
+            ),
+            'refresh_token': create_refresh_token(identity=str(user.user_id))
+        }
+        return jsonify(response_data), 200
+
+    except tokens.RevocationStoreFull:
+        # Fail closed: refuse to rotate rather than forget a live revocation
+        logger.error("Refresh token revocation store full, refusing refresh")
+        response = jsonify({'error': 'Server busy, please retry shortly'})
+        response.headers['Retry-After'] = str(BUSY_RETRY_AFTER)
+        return response, 503
     except Exception as e:
-        logging.error(f"Login error: {str(e)}")
-        return jsonify({'error': 'An error occurred during login'}), 500 
\ No newline at end of file
+        logger.exception("Token refresh error: %s", e)
+        return jsonify({'error': 'An error occurred during token refresh'}), 500
\ No newline at end of file
@@ -0,0 +1,41 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.identity import current_identity
+from app import search
+import logging
+
+logger = logging.getLogger(__name__)
+
+employees_bp = Blueprint('employees', __name__)
+
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+@employees_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_employees():
+    """Typeahead over employee names, departments and emails (admins only).
+
+    ``q`` holds the search terms; ``limit`` caps the results (default 10,
+    at most 50). Served from the in-process index in ``app.search``.
+    """
+    try:
+        current_user = current_identity()
+
+        if not current_user or current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        try:
+            limit = int(request.args.get('limit', DEFAULT_SEARCH_LIMIT))
+        except ValueError:
+            return jsonify({'error': 'Invalid limit'}), 422
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+        results = search.search(request.args.get('q', ''), limit)
+        return jsonify({'results': results}), 200
+
+    except search.IndexUnavailable:
+        return jsonify({'error': 'Employee search is unavailable, please retry shortly'}), 503
+    except Exception as e:
+        logger.exception("Error searching employees: %s", e)
+        return jsonify({'error': 'Failed to search employees'}), 500
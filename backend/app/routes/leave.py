@@ -1,30 +1,48 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify, make_response, stream_with_context
+from flask_jwt_extended import jwt_required
 from app.models.leave import LeaveApplication, LeaveReview
-from app.models.user import User
 from app.models.employee import Employee
+from app.models.user import User
+from app.serializers import serialize_applications
+from app.identity import current_identity
+from app.replicas import replica_reads
 from app import db
-from datetime import datetime
+from app import stats
+from app import occupancy
+from app import balances
+from app import events
+from app import outbox
+from app import versions
+from app import responses
+from datetime import datetime, timedelta
+import base64
+import csv
+from collections import Counter
 import logging
 
+logger = logging.getLogger(__name__)
+
 leave_bp = Blueprint('leave', __name__)
 
+# Longest leave span, in calendar days. The balance ledger, occupancy index and
+# stats buckets all do work per year or per day of a leave, so this bounds them.
+MAX_LEAVE_DAYS = 366
+
+
+def span_too_long(start_date, end_date):
+    return (end_date - start_date).days + 1 > MAX_LEAVE_DAYS
+
 @leave_bp.route('/request', methods=['POST'])
 @jwt_required()
 def request_leave():
     try:
-        current_user_id = get_jwt_identity()
+        current_user = current_identity()
         data = request.get_json()
         
-        # Debug logging
-        logging.info(f"Received leave request data: {data}")
-        logging.info(f"Data types - leaveType: {type(data.get('leaveType'))}, "
-                    f"leaveMode: {type(data.get('leaveMode'))}, "
-                    f"reason: {type(data.get('reason'))}")
-
-        # Get employee record
-        employee = Employee.query.filter_by(user_id=int(current_user_id)).first()
-        if not employee:
+        logger.debug("Leave request from employee %s", current_user.employee_id if current_user else None)
+
+        # Employee id and department come from the token claims or identity cache
+        if not current_user or not current_user.employee_id:
             return jsonify({'error': 'Employee not found'}), 404
 
         # Validate required fields and their types
@@ -57,10 +75,34 @@ def request_leave():
             
             if end_date < start_date:
                 return jsonify({'error': 'End date cannot be before start date'}), 422
+            if span_too_long(start_date, end_date):
+                return jsonify({'error': f'Leave cannot exceed {MAX_LEAVE_DAYS} days'}), 422
+
+            conflicts = occupancy.find_capacity_conflicts(
+                current_user.department, start_date, end_date, current_user.employee_id
+            )
+            if conflicts:
+                db.session.rollback()  # release the department lock
+                return jsonify({
+                    'error': 'Department leave capacity exceeded',
+                    'conflicts': conflicts
+                }), 409
+
+            # One ledger read per calendar year touched, not a pass over history
+            overdrawn = balances.find_balance_conflicts(
+                current_user.employee_id, data['leaveType'].strip(), data['leaveMode'].strip(),
+                start_date, end_date, current_user.department
+            )
+            if overdrawn:
+                db.session.rollback()  # release the ledger row locks
+                return jsonify({
+                    'error': 'Leave balance exceeded',
+                    'balances': overdrawn
+                }), 409
 
             # Create leave application
             leave = LeaveApplication(
-                employee_id=employee.employee_id,
+                employee_id=current_user.employee_id,
                 leave_type=data['leaveType'].strip(),
                 leave_mode=data['leaveMode'].strip(),
                 start_date=start_date,
@@ -70,116 +112,753 @@ def request_leave():
             )
 
             db.session.add(leave)
+            stats.record_created(leave, current_user.department)
+            balances.record_created(leave, current_user.department)
+            versions.bump(versions.APPLICATIONS, versions.employee_scope(current_user.employee_id))
+            db.session.flush()
+            # The admin listing's shape; the employee's own response omits 'employee'
+            application = serialize_applications([leave], include_employee=True)[0]
+            events.queue(db.session, events.created(application))
             db.session.commit()
+            logger.info("Leave application %s created for employee %s",
+                        leave.leave_application_id, current_user.employee_id)
 
-            return jsonify(leave.to_dict()), 201
+            application.pop('employee')
+            return jsonify(application), 201
 
         except ValueError as e:
             return jsonify({'error': f'Invalid date format. Use YYYY-MM-DD. Error: {str(e)}'}), 422
 
     except Exception as e:
-        logging.error(f"Error processing leave request: {str(e)}")
+        logger.exception("Error processing leave request: %s", e)
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_STATS_DAYS = 366
+MAX_STATS_MONTHS = 36
+
+
+def encode_cursor(leave):
+    """Opaque cursor pointing just past ``leave`` in listing order."""
+    raw = f"{leave.application_date.isoformat()}|{leave.leave_application_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        application_date, leave_application_id = raw.split('|')
+        return datetime.fromisoformat(application_date), int(leave_application_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+
+def parse_date_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Invalid {name}. Use YYYY-MM-DD')
+
+
+def parse_month_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise ValueError(f'Invalid {name}. Use YYYY-MM')
+
+
+def apply_application_filters(query, args):
+    """Apply the listing filters from the query string to ``query``.
+
+    Supported filters: ``status`` and ``leave_type`` (comma separated),
+    ``department``, ``employee_id``, ``reviewed_by`` (a reviewer's user id)
+    and a ``date_from``/``date_to`` range matching leave periods that overlap
+    it. Raises ValueError on bad input.
+    """
+    statuses = [s for s in args.get('status', '').split(',') if s]
+    if statuses:
+        query = query.filter(LeaveApplication.status.in_(statuses))
+
+    leave_types = [t for t in args.get('leave_type', '').split(',') if t]
+    if leave_types:
+        query = query.filter(LeaveApplication.leave_type.in_(leave_types))
+
+    if args.get('department'):
+        query = query.filter(Employee.department == args['department'])
+
+    if args.get('employee_id'):
+        try:
+            employee_id = int(args['employee_id'])
+        except ValueError:
+            raise ValueError('Invalid employee_id')
+        query = query.filter(LeaveApplication.employee_id == employee_id)
+
+    if args.get('reviewed_by'):
+        try:
+            reviewer_id = int(args['reviewed_by'])
+        except ValueError:
+            raise ValueError('Invalid reviewed_by')
+        query = query.filter(LeaveApplication.review.has(LeaveReview.reviewed_by == reviewer_id))
+
+    date_from = parse_date_arg(args, 'date_from')
+    date_to = parse_date_arg(args, 'date_to')
+    if date_from and date_to and date_to < date_from:
+        raise ValueError('date_to cannot be before date_from')
+    if date_from:
+        query = query.filter(LeaveApplication.end_date >= date_from)
+    if date_to:
+        query = query.filter(LeaveApplication.start_date <= date_to)
+
+    return query
+
+
+def paginate_applications(query, args):
+    """Keyset-paginate ``query`` newest first on (application_date, id).
+
+    Returns ``(page, next_cursor)``. Each page seeks straight to the cursor
+    position through the application_date index, so deep pages cost the
+    same as the first one.
+    """
+    query, limit = keyset_page(query, args)
+    return split_page(query.all(), limit)
+
+
+def keyset_page(query, args):
+    """Order and limit ``query`` (a Query or a select()) for one page; returns ``(query, limit)``."""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('Invalid limit')
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if args.get('cursor'):
+        cursor_date, cursor_id = decode_cursor(args['cursor'])
+        query = query.filter(db.or_(
+            LeaveApplication.application_date < cursor_date,
+            db.and_(
+                LeaveApplication.application_date == cursor_date,
+                LeaveApplication.leave_application_id < cursor_id
+            )
+        ))
+
+    query = query.order_by(
+        LeaveApplication.application_date.desc(),
+        LeaveApplication.leave_application_id.desc()
+    ).limit(limit + 1)
+    return query, limit
+
+
+def split_page(page, limit):
+    """Trim the extra look-ahead row; returns ``(page, next_cursor)``."""
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1])
+    return page, next_cursor
+
 @leave_bp.route('/applications', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_applications():
     try:
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(int(current_user_id))
+        current_user = current_identity()
         
         if not current_user:
             return jsonify({'error': 'User not found'}), 404
 
         if current_user.role == 'admin':
             # For admin, get all applications
-            applications = db.session.query(LeaveApplication)\
-                .join(Employee)\
-                .join(User, Employee.user_id == User.user_id)\
-                .outerjoin(LeaveReview)\
-                .options(
-                    db.joinedload(LeaveApplication.employee).joinedload(Employee.user),
-                    db.joinedload(LeaveApplication.review)
-                )\
-                .order_by(LeaveApplication.application_date.desc())\
-                .all()
-            
+            etag = versions.etag([versions.APPLICATIONS], 'admin')
+            if versions.is_fresh(etag):
+                return versions.tag_response(make_response('', 304), etag)
+
+            query = db.session.query(LeaveApplication).join(Employee)
+            query = apply_application_filters(query, request.args)
+            applications, next_cursor = paginate_applications(query, request.args)
+
             # Include employee and reviewer details in response
-            applications_data = []
-            for leave in applications:
-                leave_dict = leave.to_dict()
-                leave_dict['employee'] = {
-                    'name': f"{leave.employee.first_name} {leave.employee.last_name}",
-                    'email': leave.employee.user.email,
-                    'department': leave.employee.department
-                }
-                if leave.review:
-                    reviewer = User.query.get(leave.review.reviewed_by)
-                    leave_dict['reviewer'] = {
-                        'id': reviewer.user_id,
-                        'email': reviewer.email,
-                        'name': reviewer.username
-                    }
-                
-                applications_data.append(leave_dict)
-            
-            return jsonify(applications_data), 200
+            applications_data = serialize_applications(
+                applications, include_employee=True, fields=responses.parse_fields(request.args.get('fields'))
+            )
+            response = jsonify({'applications': applications_data, 'next_cursor': next_cursor})
+            return versions.tag_response(response, etag), 200
         else:
             # For employees, only get their own applications
-            employee = Employee.query.filter_by(user_id=int(current_user_id)).first()
-            if not employee:
+            if not current_user.employee_id:
                 return jsonify({'error': 'Employee record not found'}), 404
+
+            etag = versions.etag([versions.employee_scope(current_user.employee_id)], current_user.employee_id)
+            if versions.is_fresh(etag):
+                return versions.tag_response(make_response('', 304), etag)
                 
-            applications = LeaveApplication.query\
-                .filter_by(employee_id=employee.employee_id)\
-                .options(db.joinedload(LeaveApplication.review))\
-                .order_by(LeaveApplication.application_date.desc())\
-                .all()
+            query = LeaveApplication.query\
+                .join(Employee)\
+                .filter(LeaveApplication.employee_id == current_user.employee_id)
+            query = apply_application_filters(query, request.args)
+            applications, next_cursor = paginate_applications(query, request.args)
                 
-            return jsonify([leave.to_dict() for leave in applications]), 200
+            response = jsonify({
+                'applications': serialize_applications(
+                    applications, department=current_user.department,
+                    fields=responses.parse_fields(request.args.get('fields'))
+                ),
+                'next_cursor': next_cursor
+            })
+            return versions.tag_response(response, etag), 200
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 422
     except Exception as e:
-        logging.error(f"Error fetching leave applications: {str(e)}")
+        logger.exception("Error fetching leave applications: %s", e)
         db.session.rollback()
         return jsonify({'error': 'Failed to fetch leave applications'}), 500
 
+REVIEW_STATUSES = ('accepted', 'denied')
+
 @leave_bp.route('/review/<int:leave_id>', methods=['PUT'])
 @jwt_required()
 def review_leave(leave_id):
     try:
-        current_user = User.query.get(int(get_jwt_identity()))
+        current_user = current_identity()
         
         if not current_user or current_user.role != 'admin':
             return jsonify({'error': 'Unauthorized'}), 403
 
         leave = LeaveApplication.query.get_or_404(leave_id)
-        data = request.get_json()
+        data = request.get_json(silent=True)
 
-        if not data or 'status' not in data:
+        # A malformed body is a 400, as elsewhere in this blueprint. A status
+        # that is present but not allowed is a 422: the counters, occupancy
+        # index and balance ledger only know these statuses
+        if not isinstance(data, dict) or not data.get('status') or not isinstance(data['status'], str):
             return jsonify({'error': 'Status is required'}), 400
+        if data['status'] not in REVIEW_STATUSES:
+            return jsonify({'error': 'Invalid status'}), 422
+        # Applications stored before the span limit could be arbitrarily long
+        if span_too_long(leave.start_date, leave.end_date):
+            return jsonify({'error': f'Leave cannot exceed {MAX_LEAVE_DAYS} days'}), 422
+
+        # Re-check department capacity; approvals may have landed since submission
+        if data['status'] == 'accepted' and leave.status != 'accepted' and not data.get('override_capacity'):
+            conflicts = occupancy.find_capacity_conflicts(
+                leave.employee.department, leave.start_date, leave.end_date, leave.employee_id
+            )
+            if conflicts:
+                db.session.rollback()  # release the department lock
+                return jsonify({
+                    'error': 'Department leave capacity exceeded',
+                    'conflicts': conflicts
+                }), 409
 
         # Check if review already exists
+        now = datetime.utcnow()
         if leave.review:
             leave.review.status = data['status']
             leave.review.comments = data.get('comments')
-            leave.review.review_date = datetime.utcnow()
+            leave.review.review_date = now
+            reviewer_id = leave.review.reviewed_by
         else:
             review = LeaveReview(
                 leave_application_id=leave.leave_application_id,
                 reviewed_by=current_user.user_id,
                 status=data['status'],
-                comments=data.get('comments')
+                comments=data.get('comments'),
+                review_date=now
             )
             db.session.add(review)
+            reviewer_id = current_user.user_id
 
         # Update the leave application status
+        stats.record_status_change(leave, leave.status, data['status'])
+        occupancy.record_status_change(leave, leave.status, data['status'], leave.employee.department)
+        balances.record_status_change(leave, leave.status, data['status'], leave.employee.department)
+        versions.bump(versions.APPLICATIONS, versions.employee_scope(leave.employee_id))
         leave.status = data['status']
+        event = events.reviewed(leave, data['status'], data.get('comments'), reviewer_id, now)
+        events.queue(db.session, event)
+        # Notifications commit with the review; dispatch_outbox.py sends them
+        recipient = outbox.recipients([leave.employee_id]).get(leave.employee_id) \
+            if outbox.EMAIL in outbox.channels() else None
+        outbox.add(db.session, outbox.review_messages(event, leave, recipient, now))
         
         db.session.commit()
-        return jsonify(leave.to_dict()), 200
+        return jsonify(serialize_applications([leave], department=leave.employee.department)[0]), 200
 
     except Exception as e:
-        logging.error(f"Error reviewing leave application: {str(e)}")
+        logger.exception("Error reviewing leave application: %s", e)
         db.session.rollback()
-        return jsonify({'error': 'Failed to review leave application'}), 500 
\ No newline at end of file
+        return jsonify({'error': 'Failed to review leave application'}), 500 
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = [
+    'leave_application_id', 'employee_id', 'employee_name', 'employee_email', 'department',
+    'leave_type', 'leave_mode', 'start_date', 'end_date', 'reason', 'status',
+    'application_date', 'review_status', 'review_date', 'review_comments',
+    'reviewer_id', 'reviewer_email', 'reviewer_name'
+]
+
+
+class _LineBuffer:
+    """File-like sink that lets csv.writer hand back each formatted line."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(args):
+    """Stream export rows as plain tuples through a server-side cursor."""
+    EmployeeUser = db.aliased(User)
+    Reviewer = db.aliased(User)
+    query = db.select(
+        LeaveApplication.leave_application_id,
+        LeaveApplication.employee_id,
+        Employee.first_name,
+        Employee.last_name,
+        EmployeeUser.email,
+        Employee.department,
+        LeaveApplication.leave_type,
+        LeaveApplication.leave_mode,
+        LeaveApplication.start_date,
+        LeaveApplication.end_date,
+        LeaveApplication.reason,
+        LeaveApplication.status,
+        LeaveApplication.application_date,
+        LeaveReview.status,
+        LeaveReview.review_date,
+        LeaveReview.comments,
+        Reviewer.user_id,
+        Reviewer.email,
+        Reviewer.username
+    ).select_from(LeaveApplication)\
+        .join(Employee)\
+        .join(EmployeeUser, Employee.user_id == EmployeeUser.user_id)\
+        .outerjoin(LeaveReview, LeaveReview.leave_application_id == LeaveApplication.leave_application_id)\
+        .outerjoin(Reviewer, LeaveReview.reviewed_by == Reviewer.user_id)
+    query = apply_application_filters(query, args)
+    query = query.order_by(LeaveApplication.leave_application_id)\
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    for row in db.session.execute(query):
+        (leave_id, employee_id, first_name, last_name, *rest) = row
+        values = [leave_id, employee_id, f"{first_name} {last_name}"] + rest
+        yield [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+
+
+@leave_bp.route('/export', methods=['GET'])
+@jwt_required()
+@replica_reads
+def export_applications():
+    """Stream every matching application as CSV (default) or NDJSON.
+
+    Accepts the same filters as the listing. Rows are fetched in batches
+    through a server-side cursor and written out as they arrive, so memory
+    use does not grow with the number of rows.
+    """
+    try:
+        current_user = current_identity()
+
+        if not current_user or current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        export_format = request.args.get('format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({'error': 'Invalid format. Use csv or ndjson'}), 422
+        # Validate filters before the response starts streaming
+        apply_application_filters(db.select(LeaveApplication), request.args)
+        args = request.args.copy()
+
+        def generate():
+            buffer = []
+            if export_format == 'csv':
+                writer = csv.writer(_LineBuffer())
+                buffer.append(writer.writerow(EXPORT_COLUMNS))
+                for values in export_rows(args):
+                    buffer.append(writer.writerow(values))
+                    if len(buffer) >= EXPORT_BATCH_SIZE:
+                        yield ''.join(buffer)
+                        buffer = []
+            else:
+                for values in export_rows(args):
+                    buffer.append(responses.dumps(dict(zip(EXPORT_COLUMNS, values))) + '\n')
+                    if len(buffer) >= EXPORT_BATCH_SIZE:
+                        yield ''.join(buffer)
+                        buffer = []
+            if buffer:
+                yield ''.join(buffer)
+
+        mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        filename = f"leave_applications_{datetime.utcnow():%Y%m%d}.{export_format}"
+        response = Response(stream_with_context(generate()), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        logger.exception("Error exporting leave applications: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to export leave applications'}), 500
+
+MAX_BULK_REVIEWS = 1000
+
+@leave_bp.route('/review', methods=['PUT'])
+@jwt_required()
+def review_leaves_bulk():
+    """Review many applications in one transaction.
+
+    Body: a list (or ``{"reviews": [...]}``) of ``{leave_id, status,
+    comments, override_capacity}``. Targets are loaded with one query,
+    reviews are inserted/updated with executemany batches, statuses are set
+    with one UPDATE per status and everything commits once. Each item gets
+    its own result; invalid items do not block the rest.
+    """
+    try:
+        current_user = current_identity()
+
+        if not current_user or current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        data = request.get_json()
+        items = data.get('reviews') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'A non-empty list of reviews is required'}), 400
+        if len(items) > MAX_BULK_REVIEWS:
+            return jsonify({'error': f'At most {MAX_BULK_REVIEWS} reviews per request'}), 413
+
+        results = [None] * len(items)
+        wanted = {}
+        for index, item in enumerate(items):
+            leave_id = item.get('leave_id') if isinstance(item, dict) else None
+            if not isinstance(leave_id, int):
+                results[index] = {'leave_id': leave_id, 'ok': False, 'error': 'leave_id is required'}
+            elif item.get('status') not in REVIEW_STATUSES:
+                results[index] = {'leave_id': leave_id, 'ok': False, 'error': 'Invalid status'}
+            elif leave_id in wanted:
+                results[index] = {'leave_id': leave_id, 'ok': False, 'error': 'Duplicate leave_id'}
+            else:
+                wanted[leave_id] = index
+
+        targets = {}
+        reviews = {}
+        reviewers = {}
+        if wanted:
+            targets = {
+                leave.leave_application_id: (leave, department)
+                for leave, department in db.session.query(LeaveApplication, Employee.department)
+                .join(Employee)
+                .filter(LeaveApplication.leave_application_id.in_(wanted))
+            }
+            for review in LeaveReview.query.filter(LeaveReview.leave_application_id.in_(wanted)):
+                reviews[review.leave_application_id] = review.leave_review_id
+                reviewers[review.leave_application_id] = review.reviewed_by
+
+        # Capacity checks lock each department; take the locks up front in
+        # sorted order so two bulk reviews cannot deadlock on them
+        for department in sorted({
+            department for leave_id, (leave, department) in targets.items()
+            if items[wanted[leave_id]]['status'] == 'accepted' and leave.status != 'accepted'
+            and not items[wanted[leave_id]].get('override_capacity')
+            and occupancy.department_capacity(department) is not None
+        }):
+            occupancy.lock_department(department)
+
+        now = datetime.utcnow()
+        notify = outbox.channels()
+        emails = outbox.recipients({leave.employee_id for leave, _ in targets.values()}) \
+            if outbox.EMAIL in notify else {}
+        notifications = []
+        new_reviews = []
+        updated_reviews = []
+        ids_by_status = {status: [] for status in REVIEW_STATUSES}
+        touched_employees = set()
+        stat_deltas = Counter()
+        balance_deltas = Counter()
+        for leave_id, index in wanted.items():
+            item = items[index]
+            if leave_id not in targets:
+                results[index] = {'leave_id': leave_id, 'ok': False, 'error': 'Leave application not found'}
+                continue
+            leave, department = targets[leave_id]
+            status = item['status']
+            if span_too_long(leave.start_date, leave.end_date):
+                results[index] = {
+                    'leave_id': leave_id,
+                    'ok': False,
+                    'error': f'Leave cannot exceed {MAX_LEAVE_DAYS} days'
+                }
+                continue
+
+            # Earlier acceptances in this batch are already in the occupancy
+            # index, so they count against capacity too
+            if status == 'accepted' and leave.status != 'accepted' and not item.get('override_capacity'):
+                conflicts = occupancy.find_capacity_conflicts(
+                    department, leave.start_date, leave.end_date, leave.employee_id
+                )
+                if conflicts:
+                    results[index] = {
+                        'leave_id': leave_id,
+                        'ok': False,
+                        'error': 'Department leave capacity exceeded',
+                        'conflicts': conflicts
+                    }
+                    continue
+
+            if leave_id in reviews:
+                updated_reviews.append({
+                    'b_leave_review_id': reviews[leave_id],
+                    'status': status,
+                    'comments': item.get('comments'),
+                    'review_date': now
+                })
+            else:
+                new_reviews.append({
+                    'leave_application_id': leave_id,
+                    'reviewed_by': current_user.user_id,
+                    'status': status,
+                    'comments': item.get('comments'),
+                    'review_date': now
+                })
+
+            stat_deltas.update(stats.status_change_deltas(leave, leave.status, status))
+            occupancy.record_status_change(leave, leave.status, status, department)
+            balance_deltas.update(balances.status_change_deltas(leave, leave.status, status, department))
+            ids_by_status[status].append(leave_id)
+            touched_employees.add(leave.employee_id)
+            results[index] = {'leave_id': leave_id, 'ok': True, 'status': status}
+            event = events.reviewed(
+                leave, status, item.get('comments'),
+                reviewers.get(leave_id, current_user.user_id), now
+            )
+            events.queue(db.session, event)
+            if notify:
+                notifications += outbox.review_messages(event, leave, emails.get(leave.employee_id), now)
+
+        review_table = LeaveReview.__table__
+        if new_reviews:
+            db.session.execute(review_table.insert(), new_reviews)
+        if updated_reviews:
+            db.session.execute(
+                review_table.update()
+                .where(review_table.c.leave_review_id == db.bindparam('b_leave_review_id')),
+                updated_reviews
+            )
+        application_table = LeaveApplication.__table__
+        for status, leave_ids in ids_by_status.items():
+            if leave_ids:
+                db.session.execute(
+                    application_table.update()
+                    .where(application_table.c.leave_application_id.in_(leave_ids))
+                    .values(status=status)
+                )
+        stats.apply_deltas(stat_deltas)
+        balances.apply_deltas(balance_deltas)
+        outbox.add(db.session, notifications)
+        if touched_employees:
+            versions.bump(versions.APPLICATIONS, *(versions.employee_scope(e) for e in touched_employees))
+
+        db.session.commit()
+
+        updated = sum(1 for result in results if result['ok'])
+        return jsonify({
+            'results': results,
+            'updated': updated,
+            'failed': len(results) - updated
+        }), 200
+
+    except Exception as e:
+        logger.exception("Error bulk reviewing leave applications: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to review leave applications'}), 500
+
+@leave_bp.route('/stats', methods=['GET'])
+@jwt_required()
+@replica_reads
+def get_stats():
+    try:
+        current_user = current_identity()
+
+        if not current_user or current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        # Daily buckets default to the current Monday-Friday week
+        today = datetime.utcnow().date()
+        monday = today - timedelta(days=today.weekday())
+        date_from = parse_date_arg(request.args, 'date_from') or monday
+        date_to = parse_date_arg(request.args, 'date_to') or monday + timedelta(days=4)
+        if date_to < date_from:
+            return jsonify({'error': 'date_to cannot be before date_from'}), 422
+        if (date_to - date_from).days >= MAX_STATS_DAYS:
+            return jsonify({'error': f'Date range cannot exceed {MAX_STATS_DAYS} days'}), 422
+
+        # Monthly buckets default to the last six months including this one
+        month_to = parse_month_arg(request.args, 'month_to') or today.replace(day=1)
+        default_month_from = month_to.replace(
+            year=month_to.year - (1 if month_to.month <= 5 else 0),
+            month=(month_to.month - 6) % 12 + 1
+        )
+        month_from = parse_month_arg(request.args, 'month_from') or default_month_from
+        if month_to < month_from:
+            return jsonify({'error': 'month_to cannot be before month_from'}), 422
+        if (month_to.year - month_from.year) * 12 + month_to.month - month_from.month >= MAX_STATS_MONTHS:
+            return jsonify({'error': f'Month range cannot exceed {MAX_STATS_MONTHS} months'}), 422
+
+        # The resolved ranges, not just the query string: the defaults move
+        # with the calendar even when no data changes
+        etag = versions.etag([versions.APPLICATIONS], 'admin', date_from, date_to, month_from, month_to)
+        if versions.is_fresh(etag):
+            return versions.tag_response(make_response('', 304), etag)
+
+        stats_data = stats.get_summary()
+        stats_data['daily'] = stats.get_daily(date_from, date_to)
+        stats_data['monthly'] = stats.get_monthly(month_from, month_to)
+        return versions.tag_response(jsonify(stats_data), etag), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        logger.exception("Error fetching leave stats: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to fetch leave stats'}), 500
+
+@leave_bp.route('/occupancy', methods=['GET'])
+@jwt_required()
+@replica_reads
+def get_occupancy():
+    try:
+        current_user = current_identity()
+
+        if not current_user or current_user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        # Either a single ``date`` (point query) or a date_from/date_to range
+        point = parse_date_arg(request.args, 'date')
+        date_from = point or parse_date_arg(request.args, 'date_from')
+        date_to = point or parse_date_arg(request.args, 'date_to')
+        if not date_from or not date_to:
+            return jsonify({'error': 'Provide date or date_from and date_to'}), 422
+        if date_to < date_from:
+            return jsonify({'error': 'date_to cannot be before date_from'}), 422
+        if (date_to - date_from).days >= MAX_STATS_DAYS:
+            return jsonify({'error': f'Date range cannot exceed {MAX_STATS_DAYS} days'}), 422
+
+        etag = versions.etag([versions.APPLICATIONS], 'admin')
+        if versions.is_fresh(etag):
+            return versions.tag_response(make_response('', 304), etag)
+
+        rows = occupancy.who_is_out(date_from, date_to, request.args.get('department'))
+        employee_ids = {row.employee_id for row in rows}
+        employees = {}
+        if employee_ids:
+            employees = {
+                employee.employee_id: employee
+                for employee in Employee.query.filter(Employee.employee_id.in_(employee_ids)).all()
+            }
+
+        out = []
+        for row in rows:
+            employee = employees.get(row.employee_id)
+            out.append({
+                'leave_application_id': row.leave_application_id,
+                'employee_id': row.employee_id,
+                'name': f"{employee.first_name} {employee.last_name}" if employee else None,
+                'department': row.department,
+                'first_day': row.first_day.isoformat(),
+                'last_day': row.last_day.isoformat(),
+                'days_out': row.days_out
+            })
+
+        response = jsonify({
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'employees': out
+        })
+        return versions.tag_response(response, etag), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        logger.exception("Error fetching leave occupancy: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to fetch leave occupancy'}), 500
+
+@leave_bp.route('/balances', methods=['GET'])
+@jwt_required()
+@replica_reads
+def get_balances():
+    """Leave balances for one calendar year (default: the current one).
+
+    Employees see their own; admins pass ``employee_id``.
+    """
+    try:
+        current_user = current_identity()
+
+        if not current_user:
+            return jsonify({'error': 'User not found'}), 404
+
+        if request.args.get('employee_id') and current_user.role == 'admin':
+            try:
+                employee_id = int(request.args['employee_id'])
+            except ValueError:
+                return jsonify({'error': 'Invalid employee_id'}), 422
+        elif current_user.employee_id:
+            employee_id = current_user.employee_id
+        else:
+            return jsonify({'error': 'Employee record not found'}), 404
+
+        try:
+            year = int(request.args.get('year', datetime.utcnow().year))
+        except ValueError:
+            return jsonify({'error': 'Invalid year'}), 422
+
+        # The ledger only changes along with this employee's applications;
+        # the resolved year is part of the tag since the default moves on 1 January
+        etag = versions.etag([versions.employee_scope(employee_id)], employee_id, year)
+        if versions.is_fresh(etag):
+            return versions.tag_response(make_response('', 304), etag)
+
+        response = jsonify({
+            'employee_id': employee_id,
+            'year': year,
+            'balances': balances.get_balances(employee_id, year)
+        })
+        return versions.tag_response(response, etag), 200
+
+    except Exception as e:
+        logger.exception("Error fetching leave balances: %s", e)
+        db.session.rollback()
+        return jsonify({'error': 'Failed to fetch leave balances'}), 500
+
+@leave_bp.route('/events', methods=['GET'])
+@jwt_required()
+def leave_events():
+    """Changes since ``Last-Event-ID`` as Server-Sent Events, then close.
+
+    The ASGI app serves this path as a long-lived stream. Under plain
+    gunicorn a stream would pin a worker thread per idle browser, so this
+    route returns the backlog at once and tells ``EventSource`` to reconnect
+    after ``EVENTS_WSGI_RETRY_MS``.
+    """
+    try:
+        current_user = current_identity()
+
+        if not current_user:
+            return jsonify({'error': 'User not found'}), 404
+
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        body, _ = events.backlog(current_user, last_event_id)
+        retry = current_app.config.get('EVENTS_WSGI_RETRY_MS', 5000)
+        response = Response(f'retry: {retry}\n\n{body}', mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    except Exception as e:
+        logger.exception("Error fetching leave events: %s", e)
+        return jsonify({'error': 'Failed to fetch leave events'}), 500
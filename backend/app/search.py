@@ -0,0 +1,425 @@
+"""In-process typeahead index behind ``GET /api/employees/search``.
+
+Each employee is indexed under the words of their first and last name and
+department, the pieces of their email's local part and the whole email
+address, all casefolded. A query matches when every whitespace-separated
+term either
+
+* starts one of those words, or
+* has three or more characters and appears anywhere in the name or the
+  email's local part. This is the substring match the dashboard used to do
+  in the browser. Departments and email domains are shared by many
+  employees, so they only match by word prefix.
+
+Word-prefix matches come first, ordered by the word matched by the term
+that starts the fewest words. Substring matches fill the rest of
+``limit``. Prefixes are found by bisecting a sorted word list, which stops
+after ``limit`` hits. Substrings are found by
+walking the shortest trigram posting list among the terms, which stops
+after ``limit`` confirmed hits. Neither path scans every employee.
+
+Trigram posting lists are ``array('i')``: four bytes per entry instead of
+a pointer to an int plus a set slot. Word ids stay a plain list so that
+multi-term queries can turn slices of it into sets cheaply.
+
+The index is loaded from the database once: at startup, or in a background
+thread with ``LAZY_STARTUP``. When the tables do not exist yet (``migrate.py``
+on a fresh database) that is skipped and the first search loads it. After that it follows Employee and User rows
+inserted, updated or deleted through this process's ORM sessions, once
+those sessions commit. Like the identity cache, it is per process. With
+several workers, a change made in one reaches the others only when they
+restart. Bulk ``UPDATE`` statements bypass the ORM events and are not seen
+either.
+"""
+import bisect
+import logging
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import defaultdict, namedtuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models.employee import Employee
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Substring terms shorter than a trigram would match nearly everyone
+MIN_SUBSTRING_LENGTH = 3
+# In multi-term queries, terms starting at most this many words may be
+# turned into an id set; commoner ones are checked word by word on each
+# candidate. One such check costs about as much as adding
+# WORD_CHECK_COST ids to a set.
+MAX_TERM_SET_SIZE = 10000
+WORD_CHECK_COST = 20
+
+_WORD = re.compile(r'\w+')
+
+Entry = namedtuple('Entry', ['user_id', 'first_name', 'last_name', 'department', 'words', 'text'])
+
+
+class IndexUnavailable(Exception):
+    """The index could not be loaded from the database."""
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _starts_word(entry, term):
+    # entry.words is "\nword\nword...": one substring search in C
+    return '\n' + term in entry.words
+
+
+def _words(entry):
+    # Names and departments repeat across employees; the word list shares
+    # one string for each
+    return [sys.intern(word) for word in entry.words.split('\n')[1:]]
+
+
+class EmployeeIndex:
+    """Word-prefix and trigram index over employees. Not thread-safe by itself."""
+
+    def __init__(self):
+        self._entries = {}
+        self._emails = {}
+        self._by_user = {}
+        # Sorted by (word, employee_id); _word_ids[i] belongs to _words[i]
+        self._words = []
+        self._word_ids = []
+        # trigram -> sorted employee ids
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self, rows):
+        """Bulk-load ``(employee_id, user_id, first_name, last_name, department, email)``.
+
+        ``employee_id`` is None for users without an employee record.
+        """
+        pairs, postings = [], defaultdict(list)
+        for employee_id, user_id, first_name, last_name, department, email in rows:
+            self._emails[user_id] = email
+            if employee_id is None:
+                continue
+            entry = self._entry(user_id, first_name, last_name, department)
+            self._entries[employee_id] = entry
+            self._by_user[user_id] = employee_id
+            pairs.extend((word, employee_id) for word in _words(entry))
+            for trigram in _trigrams(entry.text):
+                postings[trigram].append(employee_id)
+        pairs.sort()
+        self._words = [word for word, _ in pairs]
+        self._word_ids = [employee_id for _, employee_id in pairs]
+        self._postings = {trigram: array('i', sorted(ids)) for trigram, ids in postings.items()}
+
+    def _entry(self, user_id, first_name, last_name, department):
+        email = (self._emails.get(user_id) or '').casefold()
+        local_part = email.partition('@')[0]
+        name = f"{first_name} {last_name}".casefold()
+        words = set(_WORD.findall(name))
+        words.update(_WORD.findall(department.casefold()))
+        if email:
+            words.update(_WORD.findall(local_part))
+            words.add(email)
+        return Entry(user_id, first_name, last_name, department, ''.join('\n' + word for word in words),
+                     f"{name}\n{local_part}")
+
+    def _word_position(self, word, employee_id):
+        lo = bisect.bisect_left(self._words, word)
+        hi = bisect.bisect_right(self._words, word, lo)
+        return bisect.bisect_left(self._word_ids, employee_id, lo, hi)
+
+    def put(self, employee_id, user_id, first_name, last_name, department):
+        self.remove(employee_id)
+        entry = self._entry(user_id, first_name, last_name, department)
+        self._entries[employee_id] = entry
+        self._by_user[user_id] = employee_id
+        for word in _words(entry):
+            i = self._word_position(word, employee_id)
+            self._words.insert(i, word)
+            self._word_ids.insert(i, employee_id)
+        for trigram in _trigrams(entry.text):
+            postings = self._postings.setdefault(trigram, array('i'))
+            postings.insert(bisect.bisect_left(postings, employee_id), employee_id)
+
+    def remove(self, employee_id):
+        entry = self._entries.pop(employee_id, None)
+        if entry is None:
+            return
+        if self._by_user.get(entry.user_id) == employee_id:
+            del self._by_user[entry.user_id]
+        for word in _words(entry):
+            i = self._word_position(word, employee_id)
+            if i < len(self._words) and self._words[i] == word and self._word_ids[i] == employee_id:
+                del self._words[i]
+                del self._word_ids[i]
+        for trigram in _trigrams(entry.text):
+            postings = self._postings.get(trigram)
+            if postings is None:
+                continue
+            i = bisect.bisect_left(postings, employee_id)
+            if i < len(postings) and postings[i] == employee_id:
+                del postings[i]
+            if not postings:
+                del self._postings[trigram]
+
+    def set_email(self, user_id, email):
+        if self._emails.get(user_id) == email:
+            return
+        self._emails[user_id] = email
+        employee_id = self._by_user.get(user_id)
+        if employee_id is not None:
+            entry = self._entries[employee_id]
+            self.put(employee_id, user_id, entry.first_name, entry.last_name, entry.department)
+
+    def remove_user(self, user_id):
+        self._emails.pop(user_id, None)
+        if user_id in self._by_user:
+            self.remove(self._by_user[user_id])
+
+    def apply(self, change):
+        kind, *args = change
+        if kind == 'employee':
+            self.put(*args)
+        elif kind == 'employee_deleted':
+            self.remove(*args)
+        elif kind == 'user':
+            self.set_email(*args)
+        elif kind == 'user_deleted':
+            self.remove_user(*args)
+
+    def search(self, query, limit=10):
+        terms = sorted(set(query.casefold().split()), key=len, reverse=True)
+        if not terms or limit < 1:
+            return []
+        results = self._prefix_matches(terms, limit)
+        if len(results) < limit:
+            seen = set(results)
+            results += self._substring_matches(terms, limit - len(results), seen)
+        return [self._serialize(employee_id) for employee_id in results]
+
+    def _word_range(self, term):
+        """``(lo, hi)`` such that ``_words[lo:hi]`` are the words starting with ``term``."""
+        lo = bisect.bisect_left(self._words, term)
+        return lo, bisect.bisect_left(self._words, term + '\U0010ffff', lo)
+
+    def _prefix_matches(self, terms, limit):
+        # Walk the words of the term that starts the fewest; the other
+        # terms must also start a word of the same employee
+        ranges = sorted(((self._word_range(term), term) for term in terms),
+                        key=lambda item: item[0][1] - item[0][0])
+        (lo, hi), _ = ranges[0]
+        # Expected candidates to walk before ``limit`` hits, if the terms
+        # are independent. Checking them word by word is cheaper than
+        # turning the other terms' words into id sets unless that is many.
+        hit_rate = 1.0
+        for (other_lo, other_hi), _ in ranges[1:]:
+            hit_rate *= min(1.0, (other_hi - other_lo) / max(1, len(self._entries)))
+        walk = min(hi - lo, limit / hit_rate) if hit_rate else hi - lo
+        use_sets = walk * WORD_CHECK_COST > sum(other_hi - other_lo for (other_lo, other_hi), _ in ranges)
+        id_sets, word_checks = [], []
+        for (other_lo, other_hi), term in ranges[1:]:
+            if use_sets and other_hi - other_lo <= MAX_TERM_SET_SIZE:
+                id_sets.append(set(self._word_ids[other_lo:other_hi]))
+            else:
+                word_checks.append(term)
+        candidates = self._word_ids[lo:hi]
+        if id_sets:
+            matching = set(candidates).intersection(*id_sets)
+            candidates = [employee_id for employee_id in candidates if employee_id in matching]
+        results, seen = [], set()
+        for employee_id in candidates:
+            if employee_id in seen:
+                continue
+            seen.add(employee_id)
+            if all(_starts_word(self._entries[employee_id], term) for term in word_checks):
+                results.append(employee_id)
+                if len(results) == limit:
+                    break
+        return results
+
+    def _substring_matches(self, terms, limit, seen):
+        long_terms = [term for term in terms if len(term) >= MIN_SUBSTRING_LENGTH]
+        if not long_terms:
+            return []
+        # Every match is in the posting list of each of its trigrams. Walk
+        # the shortest list, which usually yields ``limit`` hits quickly; if
+        # it does not, intersect the rest of it with the other short lists
+        # before checking more.
+        postings = sorted(
+            (self._postings.get(trigram, ()) for term in long_terms for trigram in _trigrams(term)),
+            key=len
+        )
+        walk = limit * WORD_CHECK_COST
+        matches = self._confirm(postings[0][:walk], terms, limit, seen)
+        rest = postings[0][walk:]
+        if len(matches) < limit and rest:
+            shorter = [other for other in postings[1:] if len(other) <= MAX_TERM_SET_SIZE]
+            if shorter:
+                rest = sorted(set(rest).intersection(*shorter))
+            matches += self._confirm(rest, terms, limit - len(matches), seen)
+        return matches
+
+    def _confirm(self, candidates, terms, limit, seen):
+        matches = []
+        for employee_id in candidates:
+            if employee_id in seen:
+                continue
+            entry = self._entries[employee_id]
+            if all(term in entry.text if len(term) >= MIN_SUBSTRING_LENGTH else _starts_word(entry, term)
+                   for term in terms):
+                matches.append(employee_id)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def _serialize(self, employee_id):
+        entry = self._entries[employee_id]
+        return {
+            'employee_id': employee_id,
+            'user_id': entry.user_id,
+            'name': f"{entry.first_name} {entry.last_name}",
+            'email': self._emails.get(entry.user_id),
+            'department': entry.department
+        }
+
+# Guards _index and _backlog; searches hold it too, since they take well
+# under a millisecond
+_lock = threading.Lock()
+# Serializes loads, so a search that arrives mid-load waits for that load
+_load_lock = threading.RLock()
+_index = EmployeeIndex()
+_ready = False
+_app = None
+# Changes committed while a load runs, replayed onto the loaded index
+_backlog = None
+
+
+def _rows(connection):
+    employees, users = Employee.__table__, User.__table__
+    # Table columns, not the mapped classes: the startup load may run before
+    # every model is imported
+    return connection.execute(
+        select(employees.c.employee_id, users.c.user_id, employees.c.first_name,
+               employees.c.last_name, employees.c.department, users.c.email)
+        .select_from(users.outerjoin(employees, employees.c.user_id == users.c.user_id))
+    )
+
+
+def load(app):
+    """(Re)load the index from the database; returns False if that failed."""
+    global _index, _ready, _backlog
+    with _load_lock:
+        started = time.perf_counter()
+        with _lock:
+            _backlog = []
+        try:
+            fresh = EmployeeIndex()
+            with app.app_context(), db.engine.connect() as connection:
+                fresh.load(_rows(connection))
+        except Exception as e:
+            logger.warning("Employee search index not loaded: %s", e)
+            with _lock:
+                _backlog = None
+            return False
+        with _lock:
+            for change in _backlog:
+                fresh.apply(change)
+            _index, _ready, _backlog = fresh, True, None
+        logger.info("Employee search index loaded: %s employees in %.0f ms",
+                    len(fresh), (time.perf_counter() - started) * 1000)
+        return True
+
+
+def _load_at_startup(app):
+    try:
+        with app.app_context(), db.engine.connect() as connection:
+            inspector = inspect(connection)
+            missing = [model.__tablename__ for model in (User, Employee)
+                       if not inspector.has_table(model.__tablename__)]
+    except Exception:
+        missing = []  # let load() report the failure
+    if missing:
+        logger.info("Employee search index deferred to the first search: no %s table yet",
+                    ', '.join(missing))
+        return
+    load(app)
+
+
+def init_app(app):
+    global _index, _ready, _app
+    _app = app
+    with _lock:
+        _index, _ready = EmployeeIndex(), False
+    if app.config.get('LAZY_STARTUP'):
+        threading.Thread(target=_load_at_startup, args=(app,), name='search-index-loader', daemon=True).start()
+    else:
+        _load_at_startup(app)
+
+
+def search(query, limit=10):
+    """Up to ``limit`` employees matching ``query``; loads the index on first use if needed."""
+    if not _ready:
+        with _load_lock:
+            loaded = _ready or load(_app)
+        if not loaded:
+            raise IndexUnavailable()
+    with _lock:
+        return _index.search(query, limit)
+
+
+def _queue(target, change):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('search_changes', []).append(change)
+
+
+@event.listens_for(Employee, 'after_insert')
+@event.listens_for(Employee, 'after_update')
+def _employee_saved(mapper, connection, target):
+    _queue(target, ('employee', target.employee_id, target.user_id, target.first_name,
+                    target.last_name, target.department))
+
+
+@event.listens_for(Employee, 'after_delete')
+def _employee_deleted(mapper, connection, target):
+    _queue(target, ('employee_deleted', target.employee_id))
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+def _user_saved(mapper, connection, target):
+    _queue(target, ('user', target.user_id, target.email))
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    _queue(target, ('user_deleted', target.user_id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply(session):
+    # Releasing a savepoint also fires after_commit; wait for the real one
+    if session.in_nested_transaction():
+        return
+    changes = session.info.pop('search_changes', None)
+    if changes:
+        with _lock:
+            if _backlog is not None:
+                _backlog.extend(changes)
+            else:
+                for change in changes:
+                    _index.apply(change)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _discard(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('search_changes', None)
@@ -0,0 +1,146 @@
+"""Batch serialization for leave applications and their related rows.
+
+``LeaveApplication.to_dict`` used to resolve the reviewer with one query per
+reviewed application. The helpers here load every review, employee and user a
+page of applications refers to up front, with a constant number of queries,
+and then build the response dicts from those lookups without touching lazy
+relationships.
+"""
+from app import db
+from app import workdays
+from app.responses import project, wants
+from app.models.leave import LeaveReview
+from app.models.employee import Employee
+from app.models.user import User
+
+# Keep IN (...) lists comfortably below driver/parameter limits
+IN_CHUNK_SIZE = 1000
+
+
+def _fetch_by_ids(session, model, column, ids):
+    rows = []
+    ids = list(ids)
+    for i in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[i:i + IN_CHUNK_SIZE]
+        rows.extend(session.query(model).filter(column.in_(chunk)).all())
+    return rows
+
+
+def load_related(applications, include_employee=False, session=None, include_reviews=True):
+    """Load the reviews, reviewers and (optionally) employees for ``applications``.
+
+    Issues at most three queries regardless of how many applications are
+    passed in, on ``session`` (default ``db.session``). Returns a dict of
+    lookups keyed by id.
+    """
+    session = session or db.session
+    application_ids = {leave.leave_application_id for leave in applications}
+    reviews = {}
+    if application_ids and include_reviews:
+        for review in _fetch_by_ids(session, LeaveReview, LeaveReview.leave_application_id, application_ids):
+            reviews[review.leave_application_id] = review
+
+    employees = {}
+    if include_employee:
+        employee_ids = {leave.employee_id for leave in applications}
+        if employee_ids:
+            employees = {
+                employee.employee_id: employee
+                for employee in _fetch_by_ids(session, Employee, Employee.employee_id, employee_ids)
+            }
+
+    user_ids = {review.reviewed_by for review in reviews.values()}
+    user_ids.update(employee.user_id for employee in employees.values())
+    users = {}
+    if user_ids:
+        users = {user.user_id: user for user in _fetch_by_ids(session, User, User.user_id, user_ids)}
+
+    return {'reviews': reviews, 'employees': employees, 'users': users}
+
+
+def serialize_user(user):
+    if not user:
+        return None
+    return {
+        'id': user.user_id,
+        'email': user.email,
+        'name': user.username
+    }
+
+
+def serialize_employee(employee, user):
+    return {
+        'name': f"{employee.first_name} {employee.last_name}",
+        'email': user.email if user else None,
+        'department': employee.department
+    }
+
+
+def serialize_review(review, reviewer):
+    if not review:
+        return None
+    return {
+        'review_date': review.review_date.isoformat() if review.review_date else None,
+        'comments': review.comments,
+        'reviewer': serialize_user(reviewer)
+    }
+
+
+def serialize_application(leave, review=None, reviewer=None, employee=None, employee_user=None, department=None,
+                          count_working_days=True):
+    if employee is not None:
+        department = employee.department
+    data = {
+        'leave_application_id': leave.leave_application_id,
+        'employee_id': leave.employee_id,
+        'leave_type': leave.leave_type,
+        'leave_mode': leave.leave_mode,
+        'start_date': leave.start_date.isoformat() if leave.start_date else None,
+        'end_date': leave.end_date.isoformat() if leave.end_date else None,
+        'working_days': workdays.working_days(leave.start_date, leave.end_date, department)
+        if count_working_days else None,
+        'reason': leave.reason,
+        'status': leave.status,
+        'application_date': leave.application_date.isoformat() if leave.application_date else None,
+        'review': serialize_review(review, reviewer)
+    }
+    if employee is not None:
+        data['employee'] = serialize_employee(employee, employee_user)
+        if review:
+            data['reviewer'] = serialize_user(reviewer)
+    return data
+
+
+def serialize_applications(applications, include_employee=False, session=None, department=None, fields=None):
+    """Serialize ``applications`` with a constant number of extra queries.
+
+    With ``include_employee`` each dict also carries the ``employee`` and
+    top-level ``reviewer`` blocks used by the admin listing. Otherwise
+    ``working_days`` is counted on ``department``'s holiday calendar.
+
+    ``fields`` (see ``app.responses.parse_fields``) trims each dict, and
+    skips the queries and counting for blocks it leaves out.
+    """
+    count_working_days = wants(fields, 'working_days')
+    show_employee = include_employee and (wants(fields, 'employee') or wants(fields, 'reviewer'))
+    # working_days needs each employee's department for its holiday calendar
+    load_employees = show_employee or (include_employee and count_working_days)
+    related = load_related(applications, include_employee=load_employees, session=session,
+                           include_reviews=wants(fields, 'review') or wants(fields, 'reviewer'))
+    reviews, employees, users = related['reviews'], related['employees'], related['users']
+
+    results = []
+    for leave in applications:
+        review = reviews.get(leave.leave_application_id)
+        reviewer = users.get(review.reviewed_by) if review else None
+        employee = employees.get(leave.employee_id) if load_employees else None
+        calendar_department = employee.department if employee else department
+        if not show_employee:
+            employee = None
+        employee_user = users.get(employee.user_id) if employee else None
+        results.append(project(
+            serialize_application(leave, review, reviewer, employee, employee_user, calendar_department,
+                                  count_working_days),
+            fields
+        ))
+    return results
@@ -0,0 +1,166 @@
+"""Incrementally maintained dashboard counters.
+
+``request_leave`` and ``review_leave`` call into this module before they
+commit, so counter updates land in the same transaction as the change they
+describe. Reading the dashboard then costs one indexed range read per
+dimension instead of a scan over every application.
+"""
+from collections import Counter
+from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.stats import LeaveStatCounter
+from app.models.leave import LeaveApplication
+from app.models.employee import Employee
+
+SUMMARY_DIMENSIONS = ('status', 'department', 'leave_type')
+
+
+def _days(start_date, end_date):
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += timedelta(days=1)
+
+
+def _months(start_date, end_date):
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _occupancy_deltas(leave, sign):
+    deltas = Counter()
+    for day in _days(leave.start_date, leave.end_date):
+        deltas[('day', day.isoformat())] += sign
+    for month in _months(leave.start_date, leave.end_date):
+        deltas[('month', month)] += sign
+    return deltas
+
+
+def _apply(deltas):
+    table = LeaveStatCounter.__table__
+    for (dimension, bucket), delta in deltas.items():
+        if not delta:
+            continue
+        key = (table.c.dimension == dimension) & (table.c.bucket == bucket)
+        result = db.session.execute(
+            table.update().where(key).values(count=table.c.count + delta)
+        )
+        if result.rowcount:
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.execute(
+                    table.insert().values(dimension=dimension, bucket=bucket, count=delta)
+                )
+        except IntegrityError:
+            # A concurrent transaction created the row first
+            db.session.execute(
+                table.update().where(key).values(count=table.c.count + delta)
+            )
+
+
+def record_created(leave, department):
+    """Count a newly submitted application."""
+    deltas = Counter({
+        ('status', leave.status or 'pending'): 1,
+        ('department', department): 1,
+        ('leave_type', leave.leave_type): 1
+    })
+    if leave.status == 'accepted':
+        deltas.update(_occupancy_deltas(leave, 1))
+    _apply(deltas)
+
+
+def status_change_deltas(leave, old_status, new_status):
+    """Counter changes for moving ``leave`` from ``old_status`` to ``new_status``.
+
+    Callers that change many applications at once can sum these and pass the
+    total to ``apply_deltas`` so each bucket is written once.
+    """
+    deltas = Counter()
+    if old_status == new_status:
+        return deltas
+    deltas.update({('status', old_status): -1, ('status', new_status): 1})
+    if new_status == 'accepted':
+        deltas.update(_occupancy_deltas(leave, 1))
+    elif old_status == 'accepted':
+        deltas.update(_occupancy_deltas(leave, -1))
+    return deltas
+
+
+def apply_deltas(deltas):
+    _apply(deltas)
+
+
+def record_status_change(leave, old_status, new_status):
+    """Move ``leave`` between status buckets and (un)count its leave days."""
+    _apply(status_change_deltas(leave, old_status, new_status))
+
+
+def _range(dimension, low, high):
+    rows = LeaveStatCounter.query\
+        .filter(LeaveStatCounter.dimension == dimension)\
+        .filter(LeaveStatCounter.bucket.between(low, high))\
+        .all()
+    return {row.bucket: row.count for row in rows}
+
+
+def get_summary():
+    rows = LeaveStatCounter.query\
+        .filter(LeaveStatCounter.dimension.in_(SUMMARY_DIMENSIONS))\
+        .all()
+    summary = {f'by_{dimension}': {} for dimension in SUMMARY_DIMENSIONS}
+    for row in rows:
+        if row.count:
+            summary[f'by_{row.dimension}'][row.bucket] = row.count
+    return summary
+
+
+def get_daily(date_from, date_to):
+    counts = _range('day', date_from.isoformat(), date_to.isoformat())
+    return [
+        {'date': day.isoformat(), 'count': counts.get(day.isoformat(), 0)}
+        for day in _days(date_from, date_to)
+    ]
+
+
+def get_monthly(month_from, month_to):
+    months = list(_months(month_from, month_to))
+    counts = _range('month', months[0], months[-1])
+    return [{'month': month, 'count': counts.get(month, 0)} for month in months]
+
+
+def rebuild():
+    """Recompute every counter from the applications table.
+
+    Used to backfill counters for existing data; the request path never
+    calls this.
+    """
+    deltas = Counter()
+    rows = db.session.execute(
+        db.select(
+            LeaveApplication.status,
+            LeaveApplication.leave_type,
+            LeaveApplication.start_date,
+            LeaveApplication.end_date,
+            Employee.department
+        ).join(Employee).execution_options(yield_per=1000)
+    )
+    for leave in rows:
+        department = leave.department
+        deltas[('status', leave.status)] += 1
+        deltas[('department', department)] += 1
+        deltas[('leave_type', leave.leave_type)] += 1
+        if leave.status == 'accepted':
+            deltas.update(_occupancy_deltas(leave, 1))
+
+    LeaveStatCounter.query.delete()
+    db.session.add_all(
+        LeaveStatCounter(dimension=dimension, bucket=bucket, count=count)
+        for (dimension, bucket), count in deltas.items() if count
+    )
+    db.session.commit()
+    return len(deltas)
@@ -0,0 +1,79 @@
+"""In-memory revocation store for rotated refresh tokens.
+
+``/api/auth/refresh`` revokes the refresh token it was called with before
+issuing a new pair, so each refresh token works once. Entries are keyed by
+``jti`` and kept until the token itself expires. Checks are O(1) and inserts
+O(log n). Memory is bounded by ``TOKEN_REVOCATION_MAX_ENTRIES``.
+
+The store fails closed. A revocation is never dropped before its token
+expires, because that would make a rotated (possibly stolen) token valid
+again. When every slot holds a live revocation, ``revoke`` raises
+``RevocationStoreFull`` and the refresh is refused with 503 until entries
+expire.
+
+The store is per process: with several gunicorn workers a rotated token can
+still be replayed once against a different worker.
+"""
+import heapq
+import threading
+import time
+
+
+class RevocationStoreFull(Exception):
+    """No room to record another revocation without dropping a live one."""
+
+
+class _Revocations:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._expires = {}
+        # (expires_at, jti) in expiry order, for dropping expired entries
+        self._heap = []
+
+    def _purge(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._heap)
+            if self._expires.get(jti) == expires_at:
+                del self._expires[jti]
+
+    def __contains__(self, jti):
+        expires_at = self._expires.get(jti)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def add(self, jti, ttl):
+        now = time.monotonic()
+        self._purge(now)
+        if len(self._expires) >= self.maxsize:
+            raise RevocationStoreFull()
+        self._expires[jti] = now + ttl
+        heapq.heappush(self._heap, (now + ttl, jti))
+
+
+_lock = threading.Lock()
+_revoked = _Revocations(maxsize=200000)
+
+
+def init_app(app, jwt):
+    global _revoked
+    _revoked = _Revocations(maxsize=app.config.get('TOKEN_REVOCATION_MAX_ENTRIES', 200000))
+
+    @jwt.token_in_blocklist_loader
+    def _token_revoked(jwt_header, jwt_payload):
+        return is_revoked(jwt_payload)
+
+
+def is_revoked(jwt_payload):
+    return jwt_payload['jti'] in _revoked
+
+
+def revoke(jwt_payload):
+    """Revoke a token until it expires. Returns False if it already was.
+
+    Raises ``RevocationStoreFull`` rather than evicting a live revocation.
+    """
+    ttl = max(jwt_payload.get('exp', 0) - time.time(), 1)
+    with _lock:
+        if jwt_payload['jti'] in _revoked:
+            return False
+        _revoked.add(jwt_payload['jti'], ttl)
+        return True
@@ -0,0 +1,135 @@
+"""Version counters behind the ETags of the leave listings.
+
+Scopes:
+
+* ``applications`` - any application or review changed (admin listing,
+  stats, occupancy)
+* ``employee:<id>`` - one employee's applications changed (their own listing)
+
+``request_leave`` and ``review_leave`` call ``bump`` before committing. A
+conditional GET then costs one primary-key read: if the client's
+``If-None-Match`` still matches, the route answers 304 without running the
+listing query or serializing anything.
+
+Bumps are collected on the session and written in ``before_commit``, so
+each scope moves by one per commit however many writes asked for it. A
+second bump would invalidate the ETag the client just received and make
+event streams see a change from another process and resync.
+"""
+import hashlib
+
+from flask import request
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models.version import DataVersion
+from app.models.user import User
+from app.models.employee import Employee
+
+APPLICATIONS = 'applications'
+# Let browsers keep the body but revalidate on every use
+CACHE_CONTROL = 'private, no-cache'
+
+
+def employee_scope(employee_id):
+    return f'employee:{employee_id}'
+
+
+def _bump(connection, scopes):
+    table = DataVersion.__table__
+    # Sorted, so concurrent commits lock the version rows in the same order
+    for scope in sorted(scopes):
+        result = connection.execute(
+            table.update().where(table.c.scope == scope).values(version=table.c.version + 1)
+        )
+        if result.rowcount:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert().values(scope=scope, version=1))
+        except IntegrityError:
+            connection.execute(
+                table.update().where(table.c.scope == scope).values(version=table.c.version + 1)
+            )
+
+
+def _queue(session, scopes):
+    session.info.setdefault('version_bumps', set()).update(scopes)
+
+
+def bump(*scopes):
+    """Invalidate every ETag built from ``scopes`` once the session commits."""
+    _queue(db.session(), scopes)
+
+
+def current(*scopes, session=None):
+    rows = (session or db.session).query(DataVersion.scope, DataVersion.version)\
+        .filter(DataVersion.scope.in_(scopes))\
+        .all()
+    versions = dict(rows)
+    return [versions.get(scope, 0) for scope in scopes]
+
+
+def etag(scopes, *parts):
+    """Strong ETag for the current request given the scopes it reads.
+
+    ``parts`` distinguish callers that see different payloads for the same
+    URL (role, employee). The query string is always included.
+    """
+    return make_etag(request.full_path, current(*scopes), parts)
+
+
+def make_etag(full_path, versions, parts=()):
+    """ETag from a request path with query string, scope versions and ``parts``."""
+    key = '|'.join(str(part) for part in (full_path,) + tuple(parts))
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return '.'.join(str(version) for version in versions) + f'-{digest}'
+
+
+def is_fresh(tag):
+    # Weak comparison (RFC 9110): compressed responses carry W/ tags
+    return request.if_none_match.contains_weak(tag)
+
+
+def tag_response(response, tag):
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+# Listings embed employee names/departments and reviewer emails/names, so
+# changes to those columns must also move the applications version. Other
+# updates (e.g. the password rehash on login) must not: every bump
+# invalidates all cached listings and resyncs every event stream.
+DISPLAYED_COLUMNS = {
+    User: ('email', 'username'),
+    Employee: ('first_name', 'last_name', 'department')
+}
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(Employee, 'after_update')
+def _profile_changed(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if any(attrs[column].history.has_changes() for column in DISPLAYED_COLUMNS[mapper.class_]):
+        _queue(object_session(target), [APPLICATIONS])
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_bumps(session):
+    # Releasing a savepoint also fires before_commit; wait for the real one
+    if session.in_nested_transaction():
+        return
+    # Commit flushes after this hook; flush now so profile edits queue first
+    session.flush()
+    scopes = session.info.pop('version_bumps', None)
+    if scopes:
+        _bump(session.connection(), scopes)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _discard(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('version_bumps', None)
@@ -0,0 +1,8 @@
+"""ASGI entry point (see app/asgi.py):
+
+    uvicorn asgi:app
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+"""
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
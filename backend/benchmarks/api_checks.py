@@ -0,0 +1,200 @@
+"""Regression checks for API rules that have no benchmark of their own.
+
+    python benchmarks/api_checks.py
+
+Seeds a small database, then runs each check in ``CHECKS`` against it
+through the Flask test client and prints ``[ok]`` or ``[FAIL]`` per check.
+Exits non-zero when any check fails.
+"""
+import os
+import sys
+import traceback
+from datetime import date, datetime
+
+from common import make_app, seed
+
+# One above bcrypt's minimum, so there is a weaker cost to test rehashing with
+os.environ.setdefault('BCRYPT_ROUNDS', '5')
+
+ADMIN = 'user1@bench.local'
+EMPLOYEE = 'user2@bench.local'
+
+
+class Client:
+    """Test client requests as one seeded user."""
+
+    def __init__(self, app, email):
+        self.client = app.test_client()
+        login = self.client.post('/api/auth/login', json={'email': email, 'password': 'password'})
+        assert login.status_code == 200, login.get_data(as_text=True)
+        self.headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+
+    def __getattr__(self, method):
+        def call(url, **kwargs):
+            return getattr(self.client, method)(url, headers=self.headers, **kwargs)
+        return call
+
+
+def count_rows(db, model):
+    return db.session.query(model).count()
+
+
+def find_employee_id(db, email):
+    from app.models.employee import Employee
+    from app.models.user import User
+
+    return db.session.query(Employee.employee_id).join(User).filter(User.email == email).scalar()
+
+
+def add_application(db, employee_id, start_date, end_date, status='pending'):
+    from app.models.leave import LeaveApplication
+
+    leave = LeaveApplication(
+        employee_id=employee_id, leave_type='annual', leave_mode='full',
+        start_date=start_date, end_date=end_date, reason='Check', status=status,
+        application_date=datetime.utcnow()
+    )
+    db.session.add(leave)
+    db.session.commit()
+    return leave.leave_application_id
+
+
+def check_leave_span_limit(app, db):
+    """Spans over MAX_LEAVE_DAYS are refused before any ledger, occupancy or stats work."""
+    from app.models.balance import LeaveBalance
+    from app.models.occupancy import LeaveOccupancy
+    from app.models.stats import LeaveStatCounter
+
+    employee, admin = Client(app, EMPLOYEE), Client(app, ADMIN)
+    before = [count_rows(db, model) for model in (LeaveBalance, LeaveOccupancy, LeaveStatCounter)]
+    response = employee.post('/api/leave/request', json={
+        'leaveType': 'annual', 'leaveMode': 'full', 'reason': 'Forever',
+        'startDate': '0001-01-01', 'endDate': '9999-12-31'
+    })
+    assert response.status_code == 422, response.status_code
+    assert [count_rows(db, model) for model in (LeaveBalance, LeaveOccupancy, LeaveStatCounter)] == before
+
+    response = employee.post('/api/leave/request', json={
+        'leaveType': 'unpaid', 'leaveMode': 'full', 'reason': 'A long year',
+        'startDate': '2030-01-01', 'endDate': '2030-12-31'
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+    occupied = count_rows(db, LeaveOccupancy)
+
+    # Rows stored before the limit existed cannot be approved either
+    leave_id = add_application(db, find_employee_id(db, EMPLOYEE), date(2000, 1, 1), date(2009, 12, 31))
+    response = admin.put(f'/api/leave/review/{leave_id}', json={'status': 'accepted'})
+    assert response.status_code == 422, response.status_code
+    response = admin.put('/api/leave/review', json=[{'leave_id': leave_id, 'status': 'accepted'}])
+    assert response.get_json()['results'][0]['ok'] is False
+    assert count_rows(db, LeaveOccupancy) == occupied
+
+
+def check_rehash_only_upgrades(app, db):
+    """Logins rehash hashes weaker than the configured cost and leave stronger ones alone."""
+    import bcrypt
+    from app import passwords
+
+    rounds = passwords.current_rounds()
+    hashes = {cost: bcrypt.hashpw(b'password', bcrypt.gensalt(cost)).decode('utf-8')
+              for cost in (rounds - 1, rounds, rounds + 1)}
+    assert passwords.needs_rehash(hashes[rounds - 1])
+    assert not passwords.needs_rehash(hashes[rounds])
+    assert not passwords.needs_rehash(hashes[rounds + 1])
+
+
+def check_working_days_field_uses_department_calendar(app, db):
+    """``?fields=working_days`` counts on the employee's department calendar, like the full listing."""
+    from app import workdays
+    from app.models.employee import Employee
+
+    employee = db.session.get(Employee, find_employee_id(db, EMPLOYEE))
+    saved = {key: app.config.get(key) for key in ('HOLIDAY_CALENDARS', 'DEPARTMENT_HOLIDAY_CALENDARS')}
+    app.config['HOLIDAY_CALENDARS'] = {'check': ['2031-03-05']}
+    app.config['DEPARTMENT_HOLIDAY_CALENDARS'] = {employee.department: 'check'}
+    workdays.init_app(app)
+    try:
+        # Monday to Friday with the Wednesday off
+        leave_id = add_application(db, employee.employee_id, date(2031, 3, 3), date(2031, 3, 7))
+        admin = Client(app, ADMIN)
+        url = f'/api/leave/applications?employee_id={employee.employee_id}&limit=200'
+        full = admin.get(url).get_json()['applications']
+        assert [row['working_days'] for row in full if row['leave_application_id'] == leave_id] == [4]
+        for fields in ('working_days', 'working_days,status'):
+            response = admin.get(f'{url}&fields={fields}')
+            assert response.status_code == 200, response.get_data(as_text=True)
+            rows = response.get_json()['applications']
+            assert all(set(row) == set(fields.split(',')) for row in rows), rows[0]
+            assert [row['working_days'] for row in rows] == [row['working_days'] for row in full], fields
+    finally:
+        app.config.update(saved)
+        workdays.init_app(app)
+
+
+def check_review_body_errors(app, db):
+    """A malformed review body is a 400; a status that is present but not allowed is a 422."""
+    admin = Client(app, ADMIN)
+    leave_id = add_application(db, find_employee_id(db, EMPLOYEE), date(2032, 1, 5), date(2032, 1, 6))
+    url = f'/api/leave/review/{leave_id}'
+    for body in ({}, [1], {'status': ''}, {'status': 5}):
+        response = admin.put(url, json=body)
+        assert response.status_code == 400, (body, response.status_code)
+    response = admin.put(url, data='{not json', content_type='application/json')
+    assert response.status_code == 400, response.status_code
+    response = admin.put(url, json={'status': 'bogus'})
+    assert response.status_code == 422, response.status_code
+
+
+def check_one_version_bump_per_commit(app, db):
+    """A commit that bumps a scope several times moves its version by one."""
+    from app import versions
+    from app.models.employee import Employee
+
+    employee_id = find_employee_id(db, EMPLOYEE)
+    scopes = (versions.APPLICATIONS, versions.employee_scope(employee_id))
+    before = versions.current(*scopes)
+    versions.bump(*scopes)
+    db.session.get(Employee, employee_id).last_name = 'Renamed'
+    versions.bump(versions.APPLICATIONS)
+    db.session.commit()
+    assert [now - then for now, then in zip(versions.current(*scopes), before)] == [1, 1]
+
+    versions.bump(*scopes)
+    db.session.rollback()
+    db.session.commit()
+    assert [now - then for now, then in zip(versions.current(*scopes), before)] == [1, 1]
+
+
+CHECKS = [
+    check_leave_span_limit,
+    check_rehash_only_upgrades,
+    check_working_days_field_uses_department_calendar,
+    check_review_body_errors,
+    check_one_version_bump_per_commit,
+]
+
+
+def main():
+    app, db_path = make_app()
+    from app import db
+
+    with app.app_context():
+        seed(db, employees=20, applications=200, admins=1, reviews=True)
+
+    failures = 0
+    for check in CHECKS:
+        with app.app_context():
+            try:
+                check(app, db)
+                print(f'[ok] {check.__name__}')
+            except Exception:
+                failures += 1
+                print(f'[FAIL] {check.__name__}')
+                traceback.print_exc()
+
+    os.unlink(db_path)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Shared helpers for the benchmark scripts in this directory.
+
+The scripts run against a throwaway SQLite database so they need nothing but
+the backend requirements. Run them from the backend directory, e.g.
+``python benchmarks/occupancy_benchmark.py``.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import bcrypt
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+DEPARTMENTS = [
+    'Engineering', 'Sales', 'Marketing', 'Finance', 'Operations', 'Support',
+    'Legal', 'HR', 'Product', 'Design', 'Procurement', 'Logistics'
+]
+LEAVE_TYPES = ['annual', 'sick', 'maternity', 'paternity', 'unpaid', 'study']
+STATUSES = ['accepted', 'accepted', 'accepted', 'denied', 'pending']
+INSERT_BATCH_SIZE = 5000
+
+
+def make_app(db_path=None, database_url=None):
+    """Create the Flask app bound to a SQLite file and migrate its schema.
+
+    ``database_url`` points at another database instead (e.g. a local
+    MySQL); ``db_path`` is then returned as None.
+    """
+    if database_url:
+        db_path = None
+        os.environ['DATABASE_URL'] = database_url
+    else:
+        if db_path is None:
+            fd, db_path = tempfile.mkstemp(suffix='.db', prefix='hr-bench-')
+            os.close(fd)
+            os.unlink(db_path)
+        os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('FLASK_ENV', 'testing')
+
+    from app import create_app, db
+    from migrate import upgrade
+    app = create_app()
+    with app.app_context():
+        upgrade(db.engine)
+    return app, db_path
+
+
+def seed(db, employees=1000, applications=10000, start=date(2021, 1, 1), years=5, seed=42,
+         admins=0, reviews=False):
+    """Bulk-insert synthetic users, employees and applications.
+
+    Every user gets the password ``password`` hashed once at the minimum
+    bcrypt cost, so seeding does not spend its time in bcrypt. The first
+    ``admins`` users get the admin role. With ``reviews`` every accepted or
+    denied application also gets a review by the first admin (or first
+    user). Must be called inside an app context.
+    """
+    from app.models.user import User
+    from app.models.employee import Employee
+    from app.models.leave import LeaveApplication
+
+    rng = random.Random(seed)
+    password_hash = bcrypt.hashpw(b'password', bcrypt.gensalt(4)).decode('utf-8')
+    now = datetime.utcnow()
+
+    users = [{
+        'username': f'user{i}@bench.local',
+        'email': f'user{i}@bench.local',
+        'password_hash': password_hash,
+        'role': 'admin' if i <= admins else 'employee',
+        'created_at': now
+    } for i in range(1, employees + 1)]
+    _insert(db, User.__table__, users)
+
+    user_ids = [row[0] for row in db.session.execute(db.select(User.user_id).order_by(User.user_id))]
+    employee_rows = [{
+        'user_id': user_id,
+        'first_name': f'First{user_id}',
+        'last_name': f'Last{user_id}',
+        'date_of_birth': date(1990, 1, 1),
+        'department': DEPARTMENTS[user_id % len(DEPARTMENTS)],
+        'position': 'Employee',
+        'date_joined': start
+    } for user_id in user_ids]
+    _insert(db, Employee.__table__, employee_rows)
+
+    employee_ids = [row[0] for row in db.session.execute(db.select(Employee.employee_id))]
+    span_days = 365 * years
+    batch = []
+    for i in range(applications):
+        start_date = start + timedelta(days=rng.randrange(span_days))
+        batch.append({
+            'employee_id': rng.choice(employee_ids),
+            'leave_type': rng.choice(LEAVE_TYPES),
+            'leave_mode': 'full',
+            'start_date': start_date,
+            'end_date': start_date + timedelta(days=rng.randrange(10)),
+            'reason': 'Synthetic benchmark leave',
+            'status': rng.choice(STATUSES),
+            'application_date': datetime.combine(start_date, datetime.min.time()) - timedelta(days=rng.randrange(1, 30))
+        })
+        if len(batch) >= INSERT_BATCH_SIZE:
+            _insert(db, LeaveApplication.__table__, batch)
+            batch = []
+    if batch:
+        _insert(db, LeaveApplication.__table__, batch)
+    if reviews and user_ids:
+        seed_reviews(db, user_ids[0], seed=seed)
+    db.session.commit()
+
+
+def seed_reviews(db, reviewer_id, seed=42):
+    """Insert a review for every accepted or denied application (run once, on fresh data)."""
+    from app.models.leave import LeaveApplication, LeaveReview
+
+    rng = random.Random(seed)
+    last_id = 0
+    while True:
+        # Keyset batches: SQLite and MySQL both dislike inserting while a
+        # streaming cursor on the same connection is still open
+        rows = db.session.execute(
+            db.select(LeaveApplication.leave_application_id, LeaveApplication.status,
+                      LeaveApplication.application_date)
+            .where(LeaveApplication.leave_application_id > last_id,
+                   LeaveApplication.status.in_(('accepted', 'denied')))
+            .order_by(LeaveApplication.leave_application_id)
+            .limit(INSERT_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        _insert(db, LeaveReview.__table__, [{
+            'leave_application_id': leave_id,
+            'reviewed_by': reviewer_id,
+            'review_date': applied + timedelta(hours=rng.randrange(1, 72)),
+            'status': status,
+            'comments': 'Synthetic benchmark review'
+        } for leave_id, status, applied in rows])
+        last_id = rows[-1][0]
+
+
+def _insert(db, table, rows):
+    for i in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.session.execute(table.insert(), rows[i:i + INSERT_BATCH_SIZE])
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        'n': len(ordered),
+        'p50_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'p99_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+        'max_ms': round(ordered[-1], 3)
+    }
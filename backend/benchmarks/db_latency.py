@@ -0,0 +1,43 @@
+"""Simulated database round trips for benchmarking against local SQLite.
+
+SQLite answers in microseconds, so it hides the time a production request
+spends waiting on MySQL over the network. ``install(ms)`` makes every SQL
+statement sleep ``ms`` first, in the thread that executes it. For pysqlite
+that is the request thread; for aiosqlite it is the connection's worker
+thread, so the event loop stays free just as it would for a real network
+wait.
+
+Server processes started by the benchmarks pick it up through
+``latency_site/sitecustomize.py`` when ``BENCH_DB_LATENCY_MS`` is set; see
+``environment()``.
+"""
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SITE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'latency_site')
+
+
+def install(latency_ms):
+    delay = latency_ms / 1000
+
+    def wait(statement):
+        time.sleep(delay)
+
+    @event.listens_for(Engine, 'connect')
+    def _add_latency(dbapi_connection, connection_record):
+        if hasattr(dbapi_connection, 'run_async'):
+            # SQLAlchemy's aiosqlite adapter; register on the aiosqlite connection
+            dbapi_connection.await_(dbapi_connection.driver_connection.set_trace_callback(wait))
+        elif hasattr(dbapi_connection, 'set_trace_callback'):
+            dbapi_connection.set_trace_callback(wait)
+
+
+def environment(env, latency_ms):
+    """``env`` for a subprocess that should see ``latency_ms`` per statement."""
+    if not latency_ms:
+        return env
+    path = os.pathsep.join(filter(None, [SITE_DIR, env.get('PYTHONPATH')]))
+    return dict(env, BENCH_DB_LATENCY_MS=str(latency_ms), PYTHONPATH=path)
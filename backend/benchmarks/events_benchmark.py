@@ -0,0 +1,167 @@
+"""Idle /api/leave/events streams on one ASGI worker, and event fan-out delay.
+
+    python benchmarks/events_benchmark.py --streams 1000 --events 20
+
+Starts ``uvicorn asgi:app`` with a single worker (needs
+requirements-asgi.txt) and opens ``--streams`` event streams as the seeded
+admin. With those connections idle, it measures:
+
+- latency of ``/api/health/live`` and a 20-row admin listing, to show that
+  idle streams do not starve other requests (under gunicorn each stream
+  would hold one of the 8 threads);
+- worker RSS before and after the streams open;
+- for ``--events`` reviews, the time from the review response to the moment
+  every stream has received the event.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from common import BACKEND_DIR, make_app, seed, summarize
+
+PORT = 8768
+PASSWORD = 'password'
+
+
+def rss_kb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return None
+
+
+def call(method, path, body=None, token=None):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{PORT}{path}', method=method,
+        data=json.dumps(body).encode() if body is not None else None
+    )
+    request.add_header('Content-Type', 'application/json')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    with urllib.request.urlopen(request) as response:
+        return response.status, response.read()
+
+
+async def open_stream(token):
+    reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+    writer.write((
+        'GET /api/leave/events HTTP/1.1\r\n'
+        f'Host: 127.0.0.1:{PORT}\r\n'
+        f'Authorization: Bearer {token}\r\n\r\n'
+    ).encode())
+    await writer.drain()
+    # Headers, then the 'ready' event that marks the stream as live
+    await reader.readuntil(b'event: ready')
+    return reader, writer
+
+
+async def wait_for(reader, leave_id):
+    marker = f'"leave_application_id":{leave_id},'.encode()
+    buffer = b''
+    while marker not in buffer:
+        buffer = buffer[-len(marker):] + await reader.read(65536)
+
+
+async def timed_requests(path, token, count):
+    loop = asyncio.get_running_loop()
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await loop.run_in_executor(None, call, 'GET', path, None, token)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+async def run(args, token, pending_ids, server):
+    loop = asyncio.get_running_loop()
+    results = {
+        'idle': {
+            'health_live': await timed_requests('/api/health/live', None, 200),
+            'listing': await timed_requests('/api/leave/applications?limit=20', token, 100),
+        },
+        'rss_kb_before': rss_kb(server.pid)
+    }
+
+    start = time.perf_counter()
+    streams = []
+    for i in range(0, args.streams, 100):
+        streams += await asyncio.gather(*(open_stream(token) for _ in range(min(100, args.streams - i))))
+    results['open_seconds'] = round(time.perf_counter() - start, 2)
+    results['rss_kb_after'] = rss_kb(server.pid)
+    results['with_streams'] = {
+        'health_live': await timed_requests('/api/health/live', None, 200),
+        'listing': await timed_requests('/api/leave/applications?limit=20', token, 100),
+    }
+
+    fan_out = []
+    for leave_id in pending_ids[:args.events]:
+        waiters = [asyncio.create_task(wait_for(reader, leave_id)) for reader, _ in streams]
+        await loop.run_in_executor(None, call, 'PUT', f'/api/leave/review/{leave_id}', {'status': 'accepted'}, token)
+        start = time.perf_counter()
+        await asyncio.gather(*waiters)
+        fan_out.append((time.perf_counter() - start) * 1000)
+    results['fan_out_after_response'] = summarize(fan_out)
+
+    for _, writer in streams:
+        writer.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--streams', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ['BCRYPT_ROUNDS'] = '4'
+    app, db_path = make_app()
+    from app import db
+    from app.models.leave import LeaveApplication
+    from app.models.user import User
+
+    with app.app_context():
+        seed(db, employees=200, applications=5000, admins=1)
+        pending_ids = [
+            row[0] for row in db.session.query(LeaveApplication.leave_application_id)
+            .filter(LeaveApplication.status == 'pending')
+            .limit(args.events)
+        ]
+        admin_email = User.query.filter_by(role='admin').first().email
+
+    env = dict(os.environ, FLASK_ENV='production', DATABASE_URL=f'sqlite:///{db_path}',
+               EVENTS_KEEPALIVE_SECONDS='60', EVENTS_STREAM_MAX_SECONDS='3600',
+               HEALTH_PROBE_INTERVAL='0', LOG_LEVELS='{"": "WARNING"}')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(PORT), '--log-level', 'warning',
+         '--timeout-graceful-shutdown', '1'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                call('GET', '/api/health/live')
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise RuntimeError('uvicorn did not start')
+                time.sleep(0.2)
+        _, body = call('POST', '/api/auth/login', {'email': admin_email, 'password': PASSWORD})
+        token = json.loads(body)['access_token']
+        results = asyncio.run(run(args, token, pending_ids, server))
+        results['streams'] = args.streams
+        print(json.dumps(results, indent=2))
+    finally:
+        server.terminate()
+        server.wait()
+        os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Check that the hot listing queries are served by an index.
+
+    python benchmarks/explain_queries.py
+
+Builds an empty SQLite schema through the migrations, runs EXPLAIN QUERY PLAN
+on the SQL the routes issue and checks each plan against the index that
+query is meant to use. Exits non-zero if any query scans a table or does
+not use its expected index.
+"""
+import re
+import sys
+from datetime import datetime
+
+from common import make_app
+
+# "SCAN <table>" without "USING ... INDEX" is a full table scan
+FULL_SCAN = re.compile(r'\bSCAN \w+\b(?! USING (?:COVERING )?INDEX)(?! USING INTEGER PRIMARY KEY)')
+
+
+def compile_sql(db, query):
+    statement = query.statement if hasattr(query, 'statement') else query
+    return str(statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def main():
+    app, _ = make_app()
+    from werkzeug.datastructures import MultiDict
+    from app import db, versions
+    from app.models.version import DataVersion
+    from app.models.employee import Employee
+    from app.models.leave import LeaveApplication, LeaveReview
+    from app.models.user import User
+    from app.routes.leave import apply_application_filters, encode_cursor
+
+    cursor = encode_cursor(LeaveApplication(application_date=datetime(2024, 1, 1), leave_application_id=10))
+
+    def listing(args, employee_id=None):
+        query = db.session.query(LeaveApplication).join(Employee)
+        if employee_id:
+            query = query.filter(LeaveApplication.employee_id == employee_id)
+        query = apply_application_filters(query, MultiDict(args))
+        if 'cursor' in args:
+            query = query.filter(db.or_(
+                LeaveApplication.application_date < datetime(2024, 1, 1),
+                db.and_(LeaveApplication.application_date == datetime(2024, 1, 1),
+                        LeaveApplication.leave_application_id < 10)
+            ))
+        return query.order_by(
+            LeaveApplication.application_date.desc(),
+            LeaveApplication.leave_application_id.desc()
+        ).limit(51)
+
+    with app.app_context():
+        # name: (query, the plan step that must appear)
+        queries = {
+            'admin listing, first page': (
+                listing({}), 'Leave_Applications USING INDEX ix_leave_applications_application_date'),
+            'admin listing, deep page': (
+                listing({'cursor': cursor}),
+                'Leave_Applications USING INDEX ix_leave_applications_application_date'),
+            'admin listing, status filter': (
+                listing({'status': 'pending'}), 'Leave_Applications USING INDEX ix_leave_applications_status_date'),
+            'employee listing': (
+                listing({}, employee_id=1), 'Leave_Applications USING INDEX ix_leave_applications_employee_date'),
+            'employee listing, deep page': (
+                listing({'cursor': cursor}, employee_id=1),
+                'Leave_Applications USING INDEX ix_leave_applications_employee_date'),
+            'serializer reviews': (
+                LeaveReview.query.filter(LeaveReview.leave_application_id.in_([1, 2, 3])),
+                'Leave_Reviews USING INDEX ix_leave_reviews_leave_application_id'),
+            'identity by user': (
+                db.session.query(Employee).filter(Employee.user_id == 1),
+                'Employees USING INDEX ix_employees_user_id'),
+            'reviewers by id': (
+                User.query.filter(User.user_id.in_([1, 2])), 'Users USING INTEGER PRIMARY KEY'),
+            'etag versions': (
+                db.session.query(DataVersion).filter(DataVersion.scope.in_([versions.APPLICATIONS])),
+                'Data_Versions USING INDEX sqlite_autoindex_Data_Versions_1'),
+        }
+
+        failures = 0
+        for name, (query, expected) in queries.items():
+            sql = compile_sql(db, query)
+            plan = [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+            scans = [line for line in plan if FULL_SCAN.search(line)]
+            if scans:
+                verdict = 'FULL SCAN'
+            elif not any(expected in line for line in plan):
+                verdict = f'EXPECTED {expected}'
+            else:
+                verdict = 'ok'
+            failures += verdict != 'ok'
+            print(f'[{verdict}] {name}')
+            for line in plan:
+                print(f'    {line}')
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
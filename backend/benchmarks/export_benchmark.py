@@ -0,0 +1,77 @@
+"""Memory and throughput of /api/leave/export as the row count grows.
+
+    python benchmarks/export_benchmark.py --applications 1000000
+
+Seeds the database once, then streams the export for growing date windows
+(roughly 10%, 50% and 100% of the rows). It records the peak Python heap
+(tracemalloc) while consuming each response. With a server-side cursor the
+peak should stay flat while the row count grows.
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from common import make_app, seed
+
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--applications', type=int, default=1_000_000)
+    parser.add_argument('--employees', type=int, default=20_000)
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    parser.add_argument('--db', help='reuse/create this SQLite file')
+    args = parser.parse_args()
+
+    app, db_path = make_app(args.db)
+    from app import db
+    from app.models.user import User
+    from app.models.leave import LeaveApplication
+
+    with app.app_context():
+        if not db.session.query(LeaveApplication.leave_application_id).first():
+            print(f'Seeding {args.applications} applications into {db_path}...')
+            seed(db, employees=args.employees, applications=args.applications)
+        admin = User.query.first()
+        admin.role = 'admin'
+        db.session.commit()
+        admin_email = admin.email
+
+    client = app.test_client()
+    login = client.post('/api/auth/login', json={'email': admin_email, 'password': 'password'})
+    headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+
+    # Seeded leave starts are spread evenly over 2021-2025
+    windows = {'10%': '2021-07-01', '50%': '2023-07-01', '100%': '2026-12-31'}
+    results = []
+    for label, date_to in windows.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = client.get(f'/api/leave/export?format={args.format}&date_to={date_to}',
+                              headers=headers, buffered=False)
+        rows = -1 if args.format == 'csv' else 0
+        size = 0
+        for chunk in response.response:
+            size += len(chunk)
+            rows += chunk.count(b'\n') if isinstance(chunk, bytes) else chunk.count('\n')
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        response.close()
+        results.append({
+            'window': label,
+            'rows': rows,
+            'megabytes_sent': round(size / 1e6, 1),
+            'seconds': round(elapsed, 2),
+            'rows_per_s': round(rows / elapsed),
+            'peak_heap_mb': round(peak / 1e6, 2)
+        })
+
+    print(json.dumps({'format': args.format, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+"""Loaded at interpreter start-up by benchmark server processes (see db_latency.py)."""
+import os
+import sys
+
+if os.environ.get('BENCH_DB_LATENCY_MS'):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import db_latency
+    db_latency.install(float(os.environ['BENCH_DB_LATENCY_MS']))
@@ -0,0 +1,410 @@
+"""Seed a realistic dataset and load-test the auth and leave endpoints.
+
+    python benchmarks/load_suite.py --db /tmp/hr-load.db --target both \\
+        --concurrency 8 --duration 15 --output results/my-branch.json
+    python benchmarks/load_suite.py --db /tmp/hr-load.db --compare results/main.json
+
+The first run against ``--db`` seeds it (50k employees and 1M applications
+with reviews by default, plus the dashboard counters and occupancy index),
+which takes a few minutes. Later runs reuse the file, so branches can be
+compared on identical data. ``--database-url`` seeds and targets another
+database instead, such as a local MySQL.
+
+Each scenario is one endpoint, driven by ``--concurrency`` threads for
+``--duration`` seconds:
+
+- ``client``: the Flask test client, in process. This measures app and
+  database cost without any network or server.
+- ``gunicorn``: a real ``gunicorn --workers/--threads`` process over
+  keep-alive HTTP. With ``--server asgi`` it serves ``asgi:app`` on uvicorn
+  workers instead (needs requirements-asgi.txt).
+
+Results hold throughput, status counts and p50/p95/p99 for each target and
+scenario. They are printed as JSON and written to ``--output`` when given.
+``--compare`` prints the p50/p99/throughput change against an earlier
+results file.
+
+``--db-latency-ms`` adds a fixed wait to every SQL statement, in both
+targets, to approximate a networked MySQL when testing against SQLite (see
+db_latency.py).
+
+Stored hashes use bcrypt cost 4 and the app runs with the same
+BCRYPT_ROUNDS, so login numbers measure the endpoint, not bcrypt.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import db_latency
+from common import BACKEND_DIR, DEPARTMENTS, make_app, seed, summarize
+
+PORT = 8767
+PASSWORD = 'password'
+
+
+class Session:
+    """Per-thread scenario state: which seeded employee to act as, an RNG, a rotating refresh token."""
+
+    def __init__(self, context, index):
+        self.context = context
+        self.rng = random.Random(index)
+        self.index = index
+        self.refresh_token = None
+
+
+def _employee(session):
+    return session.context['employees'][session.index % len(session.context['employees'])]
+
+
+def _auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def login(session):
+    email = _employee(session)['email']
+    return 'POST', '/api/auth/login', {'email': email, 'password': PASSWORD}, {}
+
+
+def refresh(session):
+    # Each refresh token works once; keep rotating the thread's own token
+    return 'POST', '/api/auth/refresh', None, _auth(session.refresh_token or _employee(session)['refresh_token'])
+
+
+def own_applications(session):
+    return 'GET', '/api/leave/applications?limit=50', None, _auth(_employee(session)['access_token'])
+
+
+def admin_applications(session):
+    department = session.rng.choice(DEPARTMENTS)
+    path = f'/api/leave/applications?limit=50&status=pending&department={department}'
+    return 'GET', path, None, _auth(session.context['admin_token'])
+
+
+def request_leave(session):
+    day = (date(2031, 1, 1) + timedelta(days=session.rng.randrange(3650))).isoformat()
+    body = {'leaveType': 'annual', 'leaveMode': 'full', 'startDate': day, 'endDate': day, 'reason': 'load test'}
+    return 'POST', '/api/leave/request', body, _auth(_employee(session)['access_token'])
+
+
+def review(session):
+    leave_id = session.rng.randint(1, session.context['max_application_id'])
+    body = {'status': session.rng.choice(('accepted', 'denied')), 'comments': 'load test',
+            'override_capacity': True}
+    return 'PUT', f'/api/leave/review/{leave_id}', body, _auth(session.context['admin_token'])
+
+
+def bulk_review(session):
+    body = [{
+        'leave_id': session.rng.randint(1, session.context['max_application_id']),
+        'status': session.rng.choice(('accepted', 'denied')),
+        'comments': 'load test',
+        'override_capacity': True
+    } for _ in range(50)]
+    return 'PUT', '/api/leave/review', body, _auth(session.context['admin_token'])
+
+
+def leave_stats(session):
+    return 'GET', '/api/leave/stats', None, _auth(session.context['admin_token'])
+
+
+def leave_occupancy(session):
+    day = date(2021, 1, 1) + timedelta(days=session.rng.randrange(365 * 5))
+    path = f'/api/leave/occupancy?date_from={day.isoformat()}&date_to={(day + timedelta(days=6)).isoformat()}'
+    return 'GET', path, None, _auth(session.context['admin_token'])
+
+
+def export_month(session):
+    day = date(2021, 1, 1) + timedelta(days=session.rng.randrange(365 * 5))
+    path = f'/api/leave/export?format=ndjson&date_from={day.isoformat()}&date_to={(day + timedelta(days=30)).isoformat()}'
+    return 'GET', path, None, _auth(session.context['admin_token'])
+
+
+SCENARIOS = {
+    'auth.login': login,
+    'auth.refresh': refresh,
+    'leave.applications.own': own_applications,
+    'leave.applications.admin': admin_applications,
+    'leave.request': request_leave,
+    'leave.review': review,
+    'leave.review.bulk50': bulk_review,
+    'leave.stats': leave_stats,
+    'leave.occupancy.week': leave_occupancy,
+    'leave.export.month': export_month,
+}
+
+
+class ClientTransport:
+    """Flask test client; one per thread."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, body, headers):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        payload = response.get_data()
+        return response.status_code, payload
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    """Keep-alive HTTP connection to the gunicorn under test; one per thread."""
+
+    def __init__(self, port):
+        self.port = port
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+
+    def send(self, method, path, body, headers):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = dict(headers, **({'Content-Type': 'application/json'} if data is not None else {}))
+        try:
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # The server closed an idle keep-alive connection; retry once
+            self.connection.close()
+            self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+            self.connection.request(method, path, body=data, headers=headers)
+            response = self.connection.getresponse()
+        return response.status, response.read()
+
+    def close(self):
+        self.connection.close()
+
+
+def run_scenario(name, build, make_transport, context, concurrency, duration):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def worker(index):
+        session = Session(context, index)
+        transport = make_transport()
+        mine, counts = [], {}
+        start_barrier.wait()
+        try:
+            while time.perf_counter() < deadline[0]:
+                method, path, body, headers = build(session)
+                start = time.perf_counter()
+                status, payload = transport.send(method, path, body, headers)
+                mine.append((time.perf_counter() - start) * 1000)
+                counts[status] = counts.get(status, 0) + 1
+                if name == 'auth.refresh' and status == 200:
+                    session.refresh_token = json.loads(payload)['refresh_token']
+        finally:
+            transport.close()
+            with lock:
+                latencies.extend(mine)
+                for status, count in counts.items():
+                    statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies) if latencies else {'n': 0}
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    result.update(
+        throughput_rps=round(len(latencies) / elapsed, 1),
+        errors=errors,
+        statuses={str(status): count for status, count in sorted(statuses.items())}
+    )
+    return result
+
+
+def prepare(app, args):
+    """Seed the database if it is empty and mint tokens for the scenarios."""
+    from app import db, stats, occupancy
+    from app.models.user import User
+    from app.models.leave import LeaveApplication
+
+    with app.app_context():
+        if not db.session.query(User.user_id).first():
+            started = time.perf_counter()
+            print(f'Seeding {args.employees} employees and {args.applications} applications...', file=sys.stderr)
+            seed(db, employees=args.employees, applications=args.applications, admins=1, reviews=True)
+            stats.rebuild()
+            occupancy.rebuild()
+            print(f'Seeded in {time.perf_counter() - started:.0f}s', file=sys.stderr)
+        admin_email = db.session.execute(
+            db.select(User.email).where(User.role == 'admin').order_by(User.user_id).limit(1)
+        ).scalar()
+        employee_emails = list(db.session.execute(
+            db.select(User.email).where(User.role == 'employee').order_by(User.user_id).limit(args.concurrency)
+        ).scalars())
+        max_application_id = db.session.execute(
+            db.select(db.func.max(LeaveApplication.leave_application_id))
+        ).scalar() or 1
+
+    client = app.test_client()
+
+    def tokens(email):
+        body = client.post('/api/auth/login', json={'email': email, 'password': PASSWORD}).get_json()
+        return {'email': email, 'access_token': body['access_token'], 'refresh_token': body['refresh_token']}
+
+    return {
+        'admin_token': tokens(admin_email)['access_token'],
+        'employees': [tokens(email) for email in employee_emails],
+        'max_application_id': max_application_id
+    }
+
+
+def start_gunicorn(env, args):
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{PORT}',
+               f'--workers={args.workers}', '--timeout=0']
+    if args.server == 'asgi':
+        command += ['--worker-class=uvicorn.workers.UvicornWorker', 'asgi:app']
+    else:
+        command += [f'--threads={args.threads}', 'app:create_app()']
+    server = subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=5)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('gunicorn did not become healthy')
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    lines = [f"{'target/scenario':<40} {'p50 ms':>18} {'p99 ms':>18} {'req/s':>18}"]
+    for target, scenarios in results['results'].items():
+        for name, current in scenarios.items():
+            before = baseline.get('results', {}).get(target, {}).get(name)
+            if not before or not current.get('n') or not before.get('n'):
+                continue
+            cells = []
+            for key in ('p50_ms', 'p99_ms', 'throughput_rps'):
+                change = (current[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+                cells.append(f'{before[key]:>7.1f}->{current[key]:<7.1f}{change:+4.0f}%')
+            lines.append(f'{target + "/" + name:<40} ' + ' '.join(f'{cell:>18}' for cell in cells))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='SQLite file to seed/reuse (default: a throwaway file)')
+    parser.add_argument('--database-url', help='seed and test this database instead of SQLite')
+    parser.add_argument('--employees', type=int, default=50000)
+    parser.add_argument('--applications', type=int, default=1000000)
+    parser.add_argument('--target', choices=('client', 'gunicorn', 'both'), default='both')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='comma-separated subset of: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=15, help='seconds per scenario')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi',
+                        help='what the gunicorn target serves: app:create_app() or asgi:app')
+    parser.add_argument('--db-latency-ms', type=float, default=0,
+                        help='simulated wait per SQL statement (applied after seeding)')
+    parser.add_argument('--label', help='name for this run in the results (default: git revision)')
+    parser.add_argument('--output', help='write the results JSON here')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios.split(',')) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    scenarios = [name for name in SCENARIOS if name in args.scenarios.split(',')]
+
+    os.environ.setdefault('BCRYPT_ROUNDS', '4')
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ.setdefault('LOG_LEVELS', json.dumps({'': 'WARNING'}))
+    throwaway = not args.db and not args.database_url
+    app, db_path = make_app(db_path=args.db, database_url=args.database_url)
+    context = prepare(app, args)
+    if args.db_latency_ms:
+        db_latency.install(args.db_latency_ms)
+        # Reconnect so the in-process engine picks up the wait too
+        with app.app_context():
+            from app import db
+            db.engine.dispose()
+
+    revision = git_revision()
+    results = {
+        'label': args.label or revision,
+        'git_revision': revision,
+        'started_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'database': 'sqlite' if db_path else args.database_url.split(':', 1)[0],
+        'dataset': {'employees': args.employees, 'applications': args.applications},
+        'concurrency': args.concurrency,
+        'duration_s': args.duration,
+        'db_latency_ms': args.db_latency_ms,
+        'gunicorn': {'server': args.server, 'workers': args.workers, 'threads': args.threads},
+        'results': {}
+    }
+
+    targets = ['client', 'gunicorn'] if args.target == 'both' else [args.target]
+    for target in targets:
+        server = None
+        if target == 'client':
+            make_transport = lambda: ClientTransport(app)
+        else:
+            server = start_gunicorn(db_latency.environment(dict(os.environ), args.db_latency_ms), args)
+            make_transport = lambda: HttpTransport(PORT)
+        try:
+            results['results'][target] = {}
+            for name in scenarios:
+                print(f'{target}: {name}...', file=sys.stderr)
+                results['results'][target][name] = run_scenario(
+                    name, SCENARIOS[name], make_transport, context, args.concurrency, args.duration
+                )
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    if throwaway:
+        os.unlink(db_path)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    if args.compare:
+        print(compare(results, args.compare))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Request throughput with logging off, written synchronously, and queued.
+
+    python benchmarks/logging_benchmark.py --requests 2000 --threads 4 --sink-delay-ms 1
+
+Each mode runs the same request mix (create a leave application, then list
+the caller's applications) from several threads through the Flask test
+client, with every logger at DEBUG. Log output goes to a sink that sleeps
+``--sink-delay-ms`` per write, standing in for a slow stdout pipe or log
+shipper:
+
+- ``off``: logging disabled
+- ``sync``: handler writes from the request thread (LOG_QUEUE_SIZE=0)
+- ``queue``: records go through the bounded queue to the listener thread
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from common import make_app, seed, summarize
+
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+
+class SlowSink:
+    """Discards output after sleeping ``delay`` seconds per write."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+def run(client, tokens, requests, threads):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index):
+        headers = {'Authorization': f'Bearer {tokens[index % len(tokens)]}'}
+        mine = []
+        for i in range(index, requests, threads):
+            start = time.perf_counter()
+            day = (date(2030, 1, 1) + timedelta(days=i % 3000)).isoformat()
+            response = client.post('/api/leave/request', headers=headers, json={
+                'leaveType': 'annual', 'leaveMode': 'full', 'startDate': day, 'endDate': day, 'reason': 'bench'
+            })
+            assert response.status_code == 201, response.get_json()
+            response = client.get('/api/leave/applications?limit=20', headers=headers)
+            assert response.status_code == 200
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000, help='iterations of the request mix per mode')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--sink-delay-ms', type=float, default=1.0)
+    parser.add_argument('--format', choices=('json', 'text'), default='json')
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    from app import db, logs
+    from config import config
+    from app.models.user import User
+
+    with app.app_context():
+        seed(db, employees=50, applications=0)
+        emails = [user.email for user in User.query.limit(args.threads)]
+
+    client = app.test_client()
+    tokens = [
+        client.post('/api/auth/login', json={'email': email, 'password': 'password'}).get_json()['access_token']
+        for email in emails
+    ]
+
+    results = {}
+    base = config[os.environ['FLASK_ENV']]
+    for mode in ('off', 'sync', 'queue'):
+        settings = type('BenchConfig', (base,), {
+            'LOG_FORMAT': args.format,
+            'LOG_QUEUE_SIZE': 0 if mode == 'sync' else 100000,
+            'LOG_SAMPLE_PER_SECOND': 0,
+            'LOG_LEVELS': dict(base.LOG_LEVELS, **{'': 'CRITICAL' if mode == 'off' else 'DEBUG'}),
+        })
+        sink = SlowSink(args.sink_delay_ms / 1000)
+        logs.configure(settings, stream=sink)
+        seconds, latencies = run(client, tokens, args.requests, args.threads)
+        logs.shutdown()
+        results[mode] = dict(
+            summarize(latencies),
+            requests_per_s=round(args.requests / seconds, 1),
+            lines_written=sink.writes
+        )
+        logging.getLogger().handlers.clear()
+
+    os.unlink(db_path)
+    print(json.dumps({
+        'requests': args.requests,
+        'threads': args.threads,
+        'sink_delay_ms': args.sink_delay_ms,
+        'modes': results
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""p99 of /api/leave/applications while a login storm is running.
+
+    python benchmarks/login_storm.py --storm-threads 16 --duration 20
+
+Starts the app under gunicorn with the Dockerfile's ``--workers=1
+--threads=8`` once with bcrypt inline (PASSWORD_HASH_WORKERS=0, the old
+behaviour) and once on the process pool. In each mode it measures listing
+latency on its own and then while ``--storm-threads`` clients log in
+back to back.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import bcrypt
+
+from common import BACKEND_DIR, make_app, seed, summarize
+
+PORT = 8765
+BASE_URL = f'http://127.0.0.1:{PORT}'
+
+
+def call(method, path, body=None, token=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(BASE_URL + path, data=data, method=method)
+    request.add_header('Content-Type', 'application/json')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            payload = response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        payload = e.read()
+        status = e.code
+    return (time.perf_counter() - start) * 1000, status, payload
+
+
+def wait_for_server(timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if call('GET', '/api/health')[1] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('gunicorn did not become healthy')
+
+
+def sample_listing(token, duration):
+    samples = []
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        ms, status, _ = call('GET', '/api/leave/applications?limit=50', token=token)
+        if status == 200:
+            samples.append(ms)
+    return summarize(samples)
+
+
+def storm(stop, counts, users):
+    i = 0
+    while not stop.is_set():
+        email = users[i % len(users)]
+        i += 1
+        _, status, _ = call('POST', '/api/auth/login', {'email': email, 'password': 'password'})
+        counts[status] = counts.get(status, 0) + 1
+
+
+def run_mode(name, env, args, users, admin_email):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{PORT}',
+         '--workers=1', '--threads=8', '--timeout=0', 'app:create_app()'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server()
+        _, _, payload = call('POST', '/api/auth/login', {'email': admin_email, 'password': 'password'})
+        token = json.loads(payload)['access_token']
+
+        quiet = sample_listing(token, args.duration / 2)
+
+        stop = threading.Event()
+        counts = {}
+        threads = [threading.Thread(target=storm, args=(stop, counts, users)) for _ in range(args.storm_threads)]
+        for thread in threads:
+            thread.start()
+        loaded = sample_listing(token, args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {'mode': name, 'quiet': quiet, 'during_storm': loaded, 'login_statuses': counts}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--storm-threads', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost for the stored hashes')
+    parser.add_argument('--pool-workers', type=int, default=2)
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    from app import db
+    from app.models.user import User
+    with app.app_context():
+        seed(db, employees=200, applications=5000)
+        # Real-cost hashes so every login pays for a full bcrypt verification
+        password_hash = bcrypt.hashpw(b'password', bcrypt.gensalt(args.rounds)).decode('utf-8')
+        User.query.update({User.password_hash: password_hash})
+        admin = User.query.first()
+        admin.role = 'admin'
+        db.session.commit()
+        admin_email = admin.email
+        users = [user.email for user in User.query.limit(50)]
+
+    base_env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', FLASK_ENV='production',
+                    BCRYPT_ROUNDS=str(args.rounds))
+    results = [
+        run_mode('inline', dict(base_env, PASSWORD_HASH_WORKERS='0',
+                                PASSWORD_HASH_MAX_CONCURRENCY='64'), args, users, admin_email),
+        run_mode('process_pool', dict(base_env, PASSWORD_HASH_WORKERS=str(args.pool_workers)),
+                 args, users, admin_email),
+    ]
+    os.unlink(db_path)
+    print(json.dumps({'cpus': os.cpu_count(), 'bcrypt_rounds': args.rounds, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
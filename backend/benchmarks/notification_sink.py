@@ -0,0 +1,177 @@
+"""Local SMTP and HTTP receivers standing in for the mail server and payroll.
+
+    python benchmarks/notification_sink.py --smtp-port 2525 --http-port 8025 --fail-rate 0.2 --delay 0.5
+
+Accepts mail on ``--smtp-port`` (a minimal SMTP dialogue, no TLS or auth)
+and ``POST``s on ``--http-port``, and prints one JSON line per delivery. Each
+delivery is keyed by its ``X-Idempotency-Key``/``Idempotency-Key`` header, and
+repeats are reported as duplicates, the way a real receiver would drop them.
+
+``--fail-rate`` answers that fraction of deliveries with a temporary error
+(SMTP 451, HTTP 503 with ``Retry-After``), and ``--delay`` makes every
+delivery slow, which is useful to check the dispatcher's retries and that
+review requests don't wait on delivery. ``outbox_benchmark.py`` runs the
+sink in-process through ``start``.
+"""
+import argparse
+import json
+import random
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Sink:
+    """Deliveries seen by both receivers, keyed by idempotency key."""
+
+    def __init__(self, fail_rate=0.0, delay=0.0, echo=False, seed=None):
+        self.fail_rate = fail_rate
+        self.delay = delay
+        self.echo = echo
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.received = {}
+        self.duplicates = 0
+        self.rejected = 0
+        self.servers = []
+
+    def should_fail(self):
+        with self.lock:
+            failed = self.random.random() < self.fail_rate
+            self.rejected += failed
+            return failed
+
+    def record(self, channel, key, body):
+        with self.lock:
+            duplicate = key in self.received
+            if duplicate:
+                self.duplicates += 1
+            else:
+                self.received[key] = (channel, body)
+        if self.echo:
+            print(json.dumps({'channel': channel, 'key': key, 'duplicate': duplicate, 'body': body}), flush=True)
+
+    def stats(self):
+        with self.lock:
+            channels = {}
+            for channel, _ in self.received.values():
+                channels[channel] = channels.get(channel, 0) + 1
+            return {'received': channels, 'duplicates': self.duplicates, 'rejected': self.rejected}
+
+    def close(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply('220 notification-sink ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 notification-sink')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip().strip('<>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for raw in iter(self.rfile.readline, b''):
+                    if raw in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(raw[1:] if raw.startswith(b'..') else raw)
+                if sink.delay:
+                    time.sleep(sink.delay)
+                if sink.should_fail():
+                    self.reply('451 Try again later')
+                    continue
+                message = message_from_bytes(b''.join(data))
+                sink.record('email', message['X-Idempotency-Key'] or message['Message-ID'], {
+                    'to': recipients, 'subject': message['Subject']
+                })
+                self.reply('250 Queued')
+            elif verb == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        sink = self.server.sink
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if sink.delay:
+            time.sleep(sink.delay)
+        if sink.should_fail():
+            self.send_response(503)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        sink.record('webhook', self.headers.get('Idempotency-Key'), json.loads(body or b'null'))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def start(smtp_port=0, http_port=0, **options):
+    """Run both receivers on background threads; returns ``(sink, smtp_port, http_port)``."""
+    sink = Sink(**options)
+    smtp = _SMTPServer(('127.0.0.1', smtp_port), _SMTPHandler)
+    http = ThreadingHTTPServer(('127.0.0.1', http_port), _HTTPHandler)
+    for server in (smtp, http):
+        server.sink = sink
+        sink.servers.append(server)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return sink, smtp.server_address[1], http.server_address[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--smtp-port', type=int, default=2525)
+    parser.add_argument('--http-port', type=int, default=8025)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds per delivery')
+    args = parser.parse_args()
+
+    sink, smtp_port, http_port = start(args.smtp_port, args.http_port, fail_rate=args.fail_rate,
+                                       delay=args.delay, echo=True)
+    print(f'SMTP on 127.0.0.1:{smtp_port}, HTTP on 127.0.0.1:{http_port}', flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(sink.stats()))
+        sink.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Compare the occupancy index with a naive full scan of applications.
+
+    python benchmarks/occupancy_benchmark.py --applications 1000000
+
+"Naive" is what the dashboard did before: fetch every accepted application
+and test each date range in Python. "sql scan" pushes the same overlap test
+into SQL, which still has to read the whole applications table.
+"""
+import argparse
+import json
+import random
+from datetime import date, timedelta
+
+from common import DEPARTMENTS, make_app, seed, summarize, timed
+
+
+def naive_python(db, LeaveApplication, date_from, date_to, department):
+    from app.models.employee import Employee
+    rows = db.session.query(
+        LeaveApplication.employee_id, LeaveApplication.start_date,
+        LeaveApplication.end_date, Employee.department
+    ).join(Employee).filter(LeaveApplication.status == 'accepted').all()
+    return {
+        row.employee_id for row in rows
+        if row.start_date <= date_to and row.end_date >= date_from
+        and (department is None or row.department == department)
+    }
+
+
+def sql_scan(db, LeaveApplication, date_from, date_to, department):
+    from app.models.employee import Employee
+    query = db.session.query(LeaveApplication.employee_id).join(Employee)\
+        .filter(LeaveApplication.status == 'accepted')\
+        .filter(LeaveApplication.start_date <= date_to)\
+        .filter(LeaveApplication.end_date >= date_from)
+    if department:
+        query = query.filter(Employee.department == department)
+    return {row.employee_id for row in query}
+
+
+def indexed(date_from, date_to, department):
+    from app import occupancy
+    return {row.employee_id for row in occupancy.who_is_out(date_from, date_to, department)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--applications', type=int, default=1_000_000)
+    parser.add_argument('--employees', type=int, default=50_000)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--naive-queries', type=int, default=3,
+                        help='the naive scan is slow; run it fewer times')
+    parser.add_argument('--db', help='reuse/create this SQLite file')
+    args = parser.parse_args()
+
+    app, db_path = make_app(args.db)
+    from app import db, occupancy
+    from app.models.leave import LeaveApplication
+
+    with app.app_context():
+        if not db.session.query(LeaveApplication.leave_application_id).first():
+            print(f'Seeding {args.applications} applications into {db_path}...')
+            ms, _ = timed(seed, db, employees=args.employees, applications=args.applications)
+            print(f'  seeded in {ms / 1000:.1f}s')
+            ms, days = timed(occupancy.rebuild)
+            print(f'  occupancy index built: {days} leave days in {ms / 1000:.1f}s')
+
+        rng = random.Random(7)
+        cases = []
+        for _ in range(args.queries):
+            day = date(2021, 1, 1) + timedelta(days=rng.randrange(365 * 5))
+            span = rng.choice([0, 4, 30])
+            department = rng.choice([None, rng.choice(DEPARTMENTS)])
+            cases.append((day, day + timedelta(days=span), department))
+
+        results = {}
+        for name, fn, count in (
+            ('indexed', lambda f, t, d: indexed(f, t, d), args.queries),
+            ('sql_scan', lambda f, t, d: sql_scan(db, LeaveApplication, f, t, d), args.queries),
+            ('naive_python', lambda f, t, d: naive_python(db, LeaveApplication, f, t, d), args.naive_queries),
+        ):
+            samples = []
+            for date_from, date_to, department in cases[:count]:
+                ms, found = timed(fn, date_from, date_to, department)
+                samples.append(ms)
+                if name != 'indexed':
+                    expected = indexed(date_from, date_to, department)
+                    assert found == expected, f'{name} disagrees with the index'
+            results[name] = summarize(samples)
+
+    print(json.dumps({'applications': args.applications, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Review latency with the notification outbox, and how the dispatcher drains it.
+
+    python benchmarks/outbox_benchmark.py --reviews 500 --delay 0.2 --fail-rate 0.2
+
+Starts ``notification_sink`` with every delivery taking ``--delay`` seconds and
+``--fail-rate`` of them refused with a temporary error. Then it reviews
+pending applications through the test client:
+
+* ``no_outbox``: no channels configured, so no messages are queued.
+* ``outbox``: email and webhook queued, with ``dispatch_outbox.run``
+  draining into the slow sink on a thread at the same time.
+* ``bulk``: one bulk PUT of ``--bulk`` reviews, with the outbox on.
+
+The two single-review latency distributions should match; the delivery
+delay shows up only in ``drain_seconds``. The run ends with a dispatcher
+crash between sending and recording a batch. Once the lease runs out the
+batch is sent again, and the sink counts the repeats as duplicates by
+idempotency key.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+from common import make_app, seed, summarize, timed
+from notification_sink import start
+
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=500, help='single reviews per phase')
+    parser.add_argument('--bulk', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0.2, help='seconds per delivery at the sink')
+    parser.add_argument('--fail-rate', type=float, default=0.2)
+    args = parser.parse_args()
+
+    sink, smtp_port, http_port = start(fail_rate=args.fail_rate, delay=args.delay, seed=7)
+    os.environ.update({
+        'SMTP_HOST': '127.0.0.1',
+        'SMTP_PORT': str(smtp_port),
+        'PAYROLL_WEBHOOK_URL': f'http://127.0.0.1:{http_port}/payroll',
+        'OUTBOX_POLL_SECONDS': '0.05',
+        'OUTBOX_BACKOFF_SECONDS': '0.05',
+        'OUTBOX_MAX_BACKOFF_SECONDS': '0.5',
+        'OUTBOX_MAX_ATTEMPTS': '20'
+    })
+    app, db_path = make_app()
+    import dispatch_outbox
+    from app import db, outbox
+    from app.models.leave import LeaveApplication
+    from app.models.outbox import OutboxMessage
+    from app.models.user import User
+
+    with app.app_context():
+        seed(db, employees=200, applications=args.reviews * 2 + args.bulk + 50)
+        LeaveApplication.query.update({LeaveApplication.status: 'pending'})
+        admin = User.query.first()
+        admin.role = 'admin'
+        db.session.commit()
+        admin_email = admin.email
+        ids = [row[0] for row in db.session.query(LeaveApplication.leave_application_id)
+               .order_by(LeaveApplication.leave_application_id)]
+
+    client = app.test_client()
+    login = client.post('/api/auth/login', json={'email': admin_email, 'password': 'password'})
+    headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+
+    def review(leave_id):
+        response = client.put(f'/api/leave/review/{leave_id}', json={'status': 'denied'}, headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    def count(status):
+        with app.app_context():
+            return OutboxMessage.query.filter_by(status=status).count()
+
+    # Without channels nothing is queued
+    configured = {key: app.config[key] for key in ('SMTP_HOST', 'PAYROLL_WEBHOOK_URL')}
+    app.config.update(SMTP_HOST=None, PAYROLL_WEBHOOK_URL=None)
+    baseline = [timed(review, leave_id)[0] for leave_id in ids[:args.reviews]]
+    app.config.update(configured)
+    ids = ids[args.reviews:]
+
+    stop = threading.Event()
+    dispatcher = threading.Thread(target=dispatch_outbox.run, args=(app, stop))
+    start_time = time.perf_counter()
+    dispatcher.start()
+    with_outbox = [timed(review, leave_id)[0] for leave_id in ids[:args.reviews]]
+    ids = ids[args.reviews:]
+    bulk_ms, response = timed(client.put, '/api/leave/review', headers=headers, json=[
+        {'leave_id': leave_id, 'status': 'denied'} for leave_id in ids[:args.bulk]
+    ])
+    assert response.get_json()['updated'] == args.bulk
+    ids = ids[args.bulk:]
+    reviews_done = time.perf_counter() - start_time
+    while count(outbox.PENDING):
+        time.sleep(0.05)
+    drain_seconds = time.perf_counter() - start_time
+    stop.set()
+    dispatcher.join()
+    delivered = sink.stats()
+
+    # Crash after sending, before recording: the lease runs out and the batch goes again
+    app.config['OUTBOX_LEASE_SECONDS'] = 0.5
+    for leave_id in ids[:10]:
+        review(leave_id)
+    with app.app_context():
+        _, rows = outbox.claim()
+        sink.fail_rate = 0
+        outbox.deliver(rows)
+        db.session.remove()
+    time.sleep(0.6)
+    stop.clear()
+    dispatch_outbox.run(app, stop, once=True)
+
+    with app.app_context():
+        attempts = db.session.query(db.func.sum(OutboxMessage.attempts)).scalar()
+    sink.close()
+    print(json.dumps({
+        'delivery_delay_s': args.delay,
+        'fail_rate': args.fail_rate,
+        'review_no_outbox': summarize(baseline),
+        'review_outbox': summarize(with_outbox),
+        'bulk_review_ms': round(bulk_ms, 1),
+        'messages': {'sent': count(outbox.SENT), 'failed': count(outbox.FAILED), 'attempts': attempts},
+        'reviews_done_seconds': round(reviews_done, 2),
+        'drain_seconds': round(drain_seconds, 2),
+        'sink_after_drain': delivered,
+        'redelivered_after_crash': sink.stats()['duplicates'] - delivered['duplicates']
+    }, indent=2))
+    os.unlink(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Check that listing applications costs the same number of queries at any page size.
+
+    python benchmarks/query_count_check.py
+
+Seeds applications with reviews, then requests ``/api/leave/applications``
+with ``limit=5`` and ``limit=50``, as an admin and as an employee, and
+counts the statements sent to the database for each request. The
+serializers load reviews, employees and reviewers in batches, so the two
+counts must match. A per-row lookup (an N+1) would make the larger page
+issue more queries. Exits non-zero when any pair differs.
+"""
+import os
+import sys
+
+from sqlalchemy import event
+
+from common import make_app, seed
+
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+LIMITS = (5, 50)
+
+
+def main():
+    app, db_path = make_app()
+    from app import db
+
+    with app.app_context():
+        seed(db, employees=20, applications=2000, admins=1, reviews=True)
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    client = app.test_client()
+    failures = 0
+    for email in ('user1@bench.local', 'user2@bench.local'):
+        login = client.post('/api/auth/login', json={'email': email, 'password': 'password'})
+        headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+        # Warm the per-process identity cache so both pages pay the same
+        client.get('/api/leave/applications?limit=1', headers=headers)
+        counts = {}
+        for limit in LIMITS:
+            statements.clear()
+            response = client.get(f'/api/leave/applications?limit={limit}', headers=headers)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            assert len(response.get_json()['applications']) == limit
+            counts[limit] = len(statements)
+        verdict = 'ok' if len(set(counts.values())) == 1 else 'GROWS WITH PAGE SIZE'
+        failures += verdict != 'ok'
+        print(f'[{verdict}] {email}: ' + ', '.join(f'limit={limit}: {count} queries' for limit, count in counts.items()))
+
+    os.unlink(db_path)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Bytes on the wire and CPU time to list 10k applications.
+
+    python benchmarks/response_benchmark.py --rows 10000
+
+Walks ``/api/leave/applications`` as an admin, 200 rows a page, until
+``--rows`` rows have been read. This is repeated for each combination of
+encoder (the stdlib ``json`` provider Flask ships with, or orjson), field
+set (every field, or ``--fields``) and ``Accept-Encoding`` (identity, gzip
+and, when the Brotli package is installed, br).
+
+For each combination the report gives the response bytes and the process
+CPU time (``time.process_time``) for the whole walk, best of ``--repeat``. The benchmark runs the
+app in-process through the test client, so the CPU time includes the
+queries and serializers as well as encoding and compression. ``encode_only``
+times just ``dumps`` of the same 10k dicts with each encoder.
+
+Set COMPRESS_GZIP_LEVEL / COMPRESS_BROTLI_QUALITY to compare levels.
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+from common import make_app, seed
+
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+PAGE_SIZE = 200
+DEFAULT_FIELDS = 'leave_application_id,leave_type,start_date,end_date,status,employee.name'
+
+
+def walk_pages(client, headers, rows, fields=None):
+    """Read ``rows`` rows a page at a time; returns (bytes, cpu_ms, items).
+
+    The response bytes are counted as sent. Compressed pages are decoded to
+    find the next cursor, outside the timed section.
+    """
+    from app.responses import brotli
+    size, cpu, items, cursor = 0, 0.0, [], None
+    while len(items) < rows:
+        query = f'/api/leave/applications?limit={PAGE_SIZE}'
+        if fields:
+            query += f'&fields={fields}'
+        if cursor:
+            query += f'&cursor={cursor}'
+        start = time.process_time()
+        response = client.get(query, headers=headers)
+        body = response.data
+        cpu += time.process_time() - start
+        size += len(body)
+        encoding = response.headers.get('Content-Encoding')
+        if encoding == 'gzip':
+            body = gzip.decompress(body)
+        elif encoding == 'br':
+            body = brotli.decompress(body)
+        page = json.loads(body)
+        items.extend(page['applications'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    return size, cpu * 1000, items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--fields', default=DEFAULT_FIELDS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--db', help='reuse/create this SQLite file')
+    args = parser.parse_args()
+
+    app, db_path = make_app(args.db)
+    from app import db, responses
+    from app.models.user import User
+    from app.models.leave import LeaveApplication
+
+    with app.app_context():
+        if not db.session.query(LeaveApplication.leave_application_id).first():
+            seed(db, employees=args.employees, applications=args.rows, reviews=True)
+        admin = User.query.first()
+        admin.role = 'admin'
+        db.session.commit()
+        admin_email = admin.email
+
+    client = app.test_client()
+    login = client.post('/api/auth/login', json={'email': admin_email, 'password': 'password'})
+    auth = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+
+    encodings = ['identity', 'gzip'] + (['br'] if responses.brotli is not None else [])
+    encoders = {'json': DefaultJSONProvider(app), 'orjson': responses.JSONProvider(app)}
+    app.config['DEBUG'] = False
+    results = []
+    for encoder, provider in encoders.items():
+        app.json = provider
+        for label, fields in (('all', None), ('projected', args.fields)):
+            for encoding in encodings:
+                headers = dict(auth, **{'Accept-Encoding': encoding})
+                walk_pages(client, headers, PAGE_SIZE, fields)  # warm up
+                walks = [walk_pages(client, headers, args.rows, fields) for _ in range(args.repeat)]
+                size, cpu_ms = walks[0][0], min(cpu_ms for _, cpu_ms, _ in walks)
+                results.append({
+                    'encoder': encoder, 'fields': label, 'encoding': encoding,
+                    'kb': round(size / 1024, 1), 'cpu_ms': round(cpu_ms, 1)
+                })
+
+    app.json = encoders['orjson']
+    _, _, items = walk_pages(client, auth, args.rows)
+    encode_only = {}
+    for encoder, dumps in (('json', lambda: json.dumps(items, separators=(',', ':'))),
+                           ('orjson', lambda: orjson.dumps(items))):
+        start = time.process_time()
+        for _ in range(5):
+            dumps()
+        encode_only[encoder + '_ms'] = round((time.process_time() - start) * 1000 / 5, 1)
+
+    print(json.dumps({'rows': len(items), 'page_size': PAGE_SIZE, 'fields': args.fields,
+                      'encode_only': encode_only, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
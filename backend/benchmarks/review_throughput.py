@@ -0,0 +1,74 @@
+"""Reviews per second: one PUT per application vs. the bulk endpoint.
+
+    python benchmarks/review_throughput.py --applications 2000 --batch 500
+
+Both paths run through the Flask test client against the same seeded
+SQLite database, each on its own set of pending applications.
+"""
+import argparse
+import json
+import os
+import time
+
+from common import make_app, seed
+
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--applications', type=int, default=2000,
+                        help='applications reviewed by each path')
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    from app import db
+    from app.models.user import User
+    from app.models.leave import LeaveApplication
+
+    with app.app_context():
+        seed(db, employees=500, applications=args.applications * 2)
+        LeaveApplication.query.update({LeaveApplication.status: 'pending'})
+        admin = User.query.first()
+        admin.role = 'admin'
+        db.session.commit()
+        admin_email = admin.email
+        ids = [row[0] for row in db.session.query(LeaveApplication.leave_application_id)
+               .order_by(LeaveApplication.leave_application_id)]
+
+    client = app.test_client()
+    login = client.post('/api/auth/login', json={'email': admin_email, 'password': 'password'})
+    headers = {'Authorization': f"Bearer {login.get_json()['access_token']}"}
+    single_ids, bulk_ids = ids[:args.applications], ids[args.applications:]
+
+    start = time.perf_counter()
+    for i, leave_id in enumerate(single_ids):
+        response = client.put(f'/api/leave/review/{leave_id}', headers=headers,
+                              json={'status': 'accepted' if i % 2 else 'denied', 'comments': 'ok'})
+        assert response.status_code == 200, response.get_json()
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for offset in range(0, len(bulk_ids), args.batch):
+        chunk = bulk_ids[offset:offset + args.batch]
+        response = client.put('/api/leave/review', headers=headers, json=[
+            {'leave_id': leave_id, 'status': 'accepted' if i % 2 else 'denied', 'comments': 'ok'}
+            for i, leave_id in enumerate(chunk, start=offset)
+        ])
+        body = response.get_json()
+        assert response.status_code == 200 and not body['failed'], body
+    bulk_s = time.perf_counter() - start
+
+    os.unlink(db_path)
+    print(json.dumps({
+        'applications_per_path': args.applications,
+        'batch_size': args.batch,
+        'single': {'seconds': round(single_s, 3), 'reviews_per_s': round(len(single_ids) / single_s, 1)},
+        'bulk': {'seconds': round(bulk_s, 3), 'reviews_per_s': round(len(bulk_ids) / bulk_s, 1)},
+        'speedup': round(single_s / bulk_s, 1)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
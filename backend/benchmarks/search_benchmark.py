@@ -0,0 +1,140 @@
+"""Employee typeahead: the in-process index against ``LIKE '%x%'`` in SQL.
+
+    python benchmarks/search_benchmark.py --employees 100000
+
+Seeds ``--employees`` employees with random first and last names, then runs
+the same queries against ``app.search`` and against the SQL baseline. The
+baseline matches each term anywhere in the name, department or email
+(SQLite's LIKE is case-insensitive for ASCII) with ``LIMIT``, and has to
+scan the table for every query. The queries are a mix of typeahead prefixes
+(1-4 characters of a name), 3-4 character fragments from inside a name,
+and two-term "first last" prefixes.
+
+Also reports the time to load the index, its memory (via tracemalloc), and
+the cost of one incremental update.
+"""
+import argparse
+import json
+import random
+import tracemalloc
+
+from common import make_app, seed, summarize, timed
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Wanjiru', 'Otieno', 'Achieng', 'Kamau', 'Njeri', 'Mwangi', 'Akinyi', 'Kiprop', 'Chebet', 'Omondi',
+    'Amara', 'Chinedu', 'Fatima', 'Ibrahim', 'Zainab', 'Tariq', 'Leila', 'Hiroshi', 'Mei', 'Anika'
+]
+SYLLABLES = ['ka', 'mo', 'ri', 'son', 'ber', 'lin', 'to', 'wa', 'ng', 'ei', 'ros', 'an', 'del', 'ku', 'mi', 'ste']
+
+
+def last_name(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def rename(db, rng):
+    """Give the seeded employees realistic names (seed() numbers them)."""
+    from app.models.employee import Employee
+    table = Employee.__table__
+    ids = [row[0] for row in db.session.execute(db.select(table.c.employee_id))]
+    names = {}
+    for employee_id in ids:
+        names[employee_id] = (rng.choice(FIRST_NAMES), last_name(rng))
+    db.session.execute(
+        table.update().where(table.c.employee_id == db.bindparam('id'))
+        .values(first_name=db.bindparam('first'), last_name=db.bindparam('last')),
+        [{'id': employee_id, 'first': first, 'last': last} for employee_id, (first, last) in names.items()]
+    )
+    db.session.commit()
+    return names
+
+
+def make_queries(names, rng, count):
+    people = list(names.values())
+    queries = []
+    for i in range(count):
+        first, last = rng.choice(people)
+        kind = i % 3
+        if kind == 0:
+            queries.append(rng.choice([first, last])[:rng.randint(1, 4)].lower())
+        elif kind == 1:
+            word = max(first, last, key=len)
+            start = rng.randrange(1, max(2, len(word) - 3))
+            queries.append(word[start:start + rng.randint(3, 4)].lower())
+        else:
+            queries.append(f"{first[:rng.randint(2, 4)]} {last[:rng.randint(1, 3)]}".lower())
+    return queries
+
+
+def sql_like(db, query, limit):
+    from app.models.employee import Employee
+    from app.models.user import User
+    statement = db.select(Employee.employee_id).join(User, User.user_id == Employee.user_id)
+    for term in query.split():
+        pattern = f'%{term}%'
+        statement = statement.where(db.or_(
+            Employee.first_name.like(pattern), Employee.last_name.like(pattern),
+            Employee.department.like(pattern), User.email.like(pattern)
+        ))
+    return db.session.execute(statement.order_by(Employee.first_name, Employee.last_name).limit(limit)).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--employees', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=3000)
+    parser.add_argument('--sql-queries', type=int, default=60, help='the LIKE scan is slow; run it fewer times')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--db', help='reuse/create this SQLite file')
+    args = parser.parse_args()
+
+    app, db_path = make_app(args.db)
+    from app import db, search
+
+    rng = random.Random(7)
+    with app.app_context():
+        seed(db, employees=args.employees, applications=0)
+        names = rename(db, rng)
+
+        tracemalloc.start()
+        load_ms, _ = timed(search.load, app)
+        index_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        # Timed again without tracemalloc's overhead
+        load_ms, _ = timed(search.load, app)
+
+        queries = make_queries(names, rng, args.queries)
+        index_samples, hits = [], 0
+        for query in queries:
+            elapsed, results = timed(search.search, query, args.limit)
+            index_samples.append(elapsed)
+            hits += len(results)
+
+        sql_samples = [timed(sql_like, db, query, args.limit)[0] for query in queries[:args.sql_queries]]
+
+        from app.models.employee import Employee
+        employee = db.session.get(Employee, rng.choice(list(names)))
+        update_samples = []
+        for i in range(50):
+            employee.last_name = last_name(rng)
+            db.session.flush()
+            changes = list(db.session.info.get('search_changes', ()))
+            db.session.info.pop('search_changes', None)
+            elapsed, _ = timed(lambda: [search._index.apply(change) for change in changes])
+            update_samples.append(elapsed)
+        db.session.rollback()
+
+    print(json.dumps({
+        'employees': args.employees,
+        'index_load_ms': round(load_ms, 1),
+        'index_mb': round(index_bytes / 2 ** 20, 1),
+        'average_results': round(hits / len(queries), 2),
+        'index_search': summarize(index_samples),
+        'sql_like': summarize(sql_samples),
+        'incremental_update': summarize(update_samples)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
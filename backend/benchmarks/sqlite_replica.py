@@ -0,0 +1,51 @@
+"""Stand-in for asynchronous replication between two SQLite files.
+
+    python benchmarks/sqlite_replica.py /tmp/hr.db /tmp/hr-replica.db --lag 2
+
+Every ``--lag`` seconds, this copies the primary file onto the replica file
+with SQLite's online backup API. Point the app at both files to try
+read/write splitting locally:
+
+    DATABASE_URL=sqlite:////tmp/hr.db \\
+    DATABASE_REPLICA_URLS=sqlite:////tmp/hr-replica.db \\
+    python run.py
+
+Between copies, the replica is up to ``--lag`` seconds behind, as a real
+replica would be. With two local MySQL servers, set up ordinary
+primary/replica replication instead and list the replica in
+``DATABASE_REPLICA_URLS``.
+
+``--once`` copies a single time and exits, which is useful in scripts.
+"""
+import argparse
+import sqlite3
+import time
+
+
+def copy(primary_path, replica_path):
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(replica_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('primary')
+    parser.add_argument('replica')
+    parser.add_argument('--lag', type=float, default=2.0, help='seconds between copies')
+    parser.add_argument('--once', action='store_true')
+    args = parser.parse_args()
+
+    while True:
+        copy(args.primary, args.replica)
+        if args.once:
+            return
+        time.sleep(args.lag)
+
+
+if __name__ == '__main__':
+    main()
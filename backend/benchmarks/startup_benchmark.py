@@ -0,0 +1,123 @@
+"""Cold-start timings, compared against a stored baseline.
+
+    python benchmarks/startup_benchmark.py                    # measure and compare
+    python benchmarks/startup_benchmark.py --update-baseline  # record a new baseline
+
+Measures, each in fresh processes with FLASK_ENV=production against a
+migrated SQLite database:
+
+* ``import_ms`` - ``import app``
+* ``create_app_ms`` - ``create_app()`` after the import
+* ``first_health_ms`` - from launching gunicorn (the Dockerfile's worker and
+  thread settings) to the first 200 from /api/health
+
+Exits 1 when a median exceeds its baseline by more than ``--tolerance``
+(relative) plus ``--slack-ms`` (absolute), so noisy machines do not flap.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from common import BACKEND_DIR, make_app
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'startup.json')
+PORT = 8766
+
+IN_PROCESS = '''
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "create_app_ms": (created - imported) * 1000}))
+'''
+
+
+def measure_in_process(env):
+    output = subprocess.run(
+        [sys.executable, '-c', IN_PROCESS], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_first_health(env):
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{PORT}',
+         '--workers=1', '--threads=8', 'app:create_app()'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{PORT}/api/health', timeout=5) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError('gunicorn exited before becoming healthy')
+            if time.perf_counter() - start > 60:
+                raise RuntimeError('gunicorn did not become healthy within 60s')
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--slack-ms', type=float, default=50)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='hr-startup-'), 'startup.db')
+    make_app(db_path)
+    env = dict(os.environ, FLASK_ENV='production', DATABASE_URL=f'sqlite:///{db_path}')
+
+    samples = {'import_ms': [], 'create_app_ms': [], 'first_health_ms': []}
+    for _ in range(args.runs):
+        for key, value in measure_in_process(env).items():
+            samples[key].append(value)
+        samples['first_health_ms'].append(measure_first_health(env))
+    os.unlink(db_path)
+
+    medians = {key: round(statistics.median(values), 1) for key, values in samples.items()}
+    print(json.dumps({'medians': medians, 'runs': args.runs}, indent=2))
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, 'w') as f:
+            json.dump(medians, f, indent=2)
+            f.write('\n')
+        print(f'Baseline written to {BASELINE}')
+        return 0
+
+    if not os.path.exists(BASELINE):
+        print('No baseline recorded yet; run with --update-baseline')
+        return 0
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for key, value in medians.items():
+        limit = baseline[key] * (1 + args.tolerance) + args.slack_ms
+        status = 'REGRESSION' if value > limit else 'ok'
+        print(f'[{status}] {key}: {value} ms (baseline {baseline[key]} ms, limit {limit:.1f} ms)')
+        if value > limit:
+            regressions.append(key)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
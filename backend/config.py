@@ -1,6 +1,35 @@
 import os
+import json
 from datetime import timedelta
 
+def log_levels(defaults):
+    """Per-logger levels: ``defaults`` overridden by the LOG_LEVELS env var.
+
+    e.g. LOG_LEVELS='{"app.routes.leave": "DEBUG", "sqlalchemy.engine": "INFO"}';
+    the root logger is "".
+    """
+    return dict(defaults, **json.loads(os.environ.get('LOG_LEVELS') or '{}'))
+
+
+def replica_binds(urls, engine_options):
+    """SQLALCHEMY_BINDS entries ``replica1``, ``replica2``, ... for comma-separated ``urls``.
+
+    Binds do not inherit SQLALCHEMY_ENGINE_OPTIONS, so each gets a copy.
+    """
+    return {
+        f'replica{number}': dict(engine_options, url=url.strip())
+        for number, url in enumerate((urls or '').split(','), start=1) if url.strip()
+    }
+
+
+def json_setting(name):
+    """JSON from the ``name`` env var, or from the file named by ``name``_FILE."""
+    if os.environ.get(f'{name}_FILE'):
+        with open(os.environ[f'{name}_FILE']) as f:
+            return json.load(f)
+    return json.loads(os.environ.get(name) or '{}')
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here'
     
@@ -19,16 +48,142 @@ class Config:
             SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['database']}"
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Origins allowed to call /api/* from a browser
+    CORS_ORIGINS = ['*']
+    # Async engine for the ASGI entry point (asgi.py); derived from the
+    # database URI when unset
+    ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URI')
+    LAZY_STARTUP = os.environ.get('LAZY_STARTUP', 'false').lower() == 'true'
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_size': 10,
         'pool_recycle': 3600,
-        'pool_pre_ping': True,
-        'ssl': {'ssl_ca': '/etc/ssl/certs/ca-certificates.crt'} if os.environ.get('MYSQL_ATTR_SSL_CA') else None
+        'pool_pre_ping': True
     }
-    
+    # TLS options belong to the driver, not create_engine(); passing them at
+    # the top level is rejected by SQLAlchemy (and breaks local SQLite runs)
+    if os.environ.get('MYSQL_ATTR_SSL_CA'):
+        SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = {
+            'ssl': {'ca': '/etc/ssl/certs/ca-certificates.crt'}
+        }
+
+    # Read replicas for the read-only endpoints (app/replicas.py), e.g.
+    # DATABASE_REPLICA_URLS='mysql+pymysql://ro:pw@replica-1/hr,mysql+pymysql://ro:pw@replica-2/hr'.
+    # A user's reads stay on the primary for REPLICA_STICKY_SECONDS after
+    # they write; replicas trailing the primary for longer than
+    # REPLICA_MAX_LAG_SECONDS (per the health prober) are not used.
+    SQLALCHEMY_BINDS = replica_binds(os.environ.get('DATABASE_REPLICA_URLS'), SQLALCHEMY_ENGINE_OPTIONS)
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '30'))
+
+    # Maximum employees of one department on approved leave on the same day,
+    # e.g. DEPARTMENT_LEAVE_CAPACITY='{"IT": 2, "Sales": 5}'. Departments not
+    # listed fall back to DEFAULT_DEPARTMENT_LEAVE_CAPACITY (unset = no limit).
+    DEPARTMENT_LEAVE_CAPACITY = json.loads(os.environ.get('DEPARTMENT_LEAVE_CAPACITY') or '{}')
+    DEFAULT_DEPARTMENT_LEAVE_CAPACITY = int(os.environ['DEFAULT_DEPARTMENT_LEAVE_CAPACITY']) \
+        if os.environ.get('DEFAULT_DEPARTMENT_LEAVE_CAPACITY') else None
+
+    # Working days and leave balances. WORKWEEK lists the working weekdays;
+    # HOLIDAY_CALENDARS maps calendar names to ISO holiday dates, e.g.
+    # '{"KE": ["2025-01-01", "2025-06-01"]}' (or HOLIDAY_CALENDARS_FILE names a
+    # JSON file with the same shape). Departments use the calendar named in
+    # DEPARTMENT_HOLIDAY_CALENDARS, else DEFAULT_HOLIDAY_CALENDAR (unset = no
+    # holidays). LEAVE_ALLOWANCES caps days per leave type and calendar year,
+    # e.g. '{"annual": 30}'; types not listed are unlimited, and nothing is
+    # capped by default. Backfill the ledger (python rebuild_stats.py) before
+    # setting it on a database with existing applications.
+    WORKWEEK = os.environ.get('WORKWEEK', 'Mon Tue Wed Thu Fri')
+    HOLIDAY_CALENDARS = json_setting('HOLIDAY_CALENDARS')
+    DEFAULT_HOLIDAY_CALENDAR = os.environ.get('DEFAULT_HOLIDAY_CALENDAR')
+    DEPARTMENT_HOLIDAY_CALENDARS = json.loads(os.environ.get('DEPARTMENT_HOLIDAY_CALENDARS') or '{}')
+    LEAVE_ALLOWANCES = json.loads(os.environ.get('LEAVE_ALLOWANCES') or '{}')
+
+    # bcrypt runs on a process pool (0 workers = inline in the request thread).
+    # At most PASSWORD_HASH_MAX_CONCURRENCY hashes are in flight or queued
+    # (default: 4 per worker, so a burst of logins queues instead of failing);
+    # callers wait PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot, then get 503.
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_CONCURRENCY = int(os.environ.get(
+        'PASSWORD_HASH_MAX_CONCURRENCY', str(4 * max(PASSWORD_HASH_WORKERS, 1))))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', '5'))
+    # Fixed bcrypt cost, or calibrate at startup to BCRYPT_TARGET_MS per hash
+    BCRYPT_ROUNDS = int(os.environ['BCRYPT_ROUNDS']) if os.environ.get('BCRYPT_ROUNDS') else None
+    BCRYPT_TARGET_MS = int(os.environ.get('BCRYPT_TARGET_MS', '250'))
+    BCRYPT_MIN_ROUNDS = int(os.environ.get('BCRYPT_MIN_ROUNDS', '10'))
+
+    # Per-process cache of who a token belongs to (role, employee, department)
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', '10000'))
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', '300'))
+
+    # Background database probe behind /api/health/ready (0 disables the
+    # thread; requests then probe inline, at most once a second); readiness
+    # fails when no probe finished within HEALTH_PROBE_STALE_AFTER
+    HEALTH_PROBE_INTERVAL = float(os.environ.get('HEALTH_PROBE_INTERVAL', '5'))
+    HEALTH_PROBE_STALE_AFTER = float(os.environ.get('HEALTH_PROBE_STALE_AFTER', '30'))
+
+    # /api/leave/events: events kept for Last-Event-ID resume, keepalive
+    # comments on idle ASGI streams and their longest life, how often the
+    # ASGI app looks for changes made by other processes, and the reconnect
+    # delay given to browsers by the WSGI fallback (which answers and closes
+    # instead of streaming)
+    EVENTS_REPLAY_SIZE = int(os.environ.get('EVENTS_REPLAY_SIZE', '1000'))
+    EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('EVENTS_KEEPALIVE_SECONDS', '15'))
+    EVENTS_STREAM_MAX_SECONDS = float(os.environ.get('EVENTS_STREAM_MAX_SECONDS', '600'))
+    EVENTS_VERSION_POLL_SECONDS = float(os.environ.get('EVENTS_VERSION_POLL_SECONDS', '2'))
+    EVENTS_WSGI_RETRY_MS = int(os.environ.get('EVENTS_WSGI_RETRY_MS', '5000'))
+
+    # Review notifications are written to the outbox with the review and sent
+    # by dispatch_outbox.py (app/outbox.py). Email is queued when SMTP_HOST is
+    # set, the payroll webhook when PAYROLL_WEBHOOK_URL is. Failed deliveries
+    # are retried with exponential backoff (OUTBOX_BACKOFF_SECONDS doubling up
+    # to OUTBOX_MAX_BACKOFF_SECONDS) for OUTBOX_MAX_ATTEMPTS attempts; a
+    # dispatcher holds a claimed batch for OUTBOX_LEASE_SECONDS.
+    SMTP_HOST = os.environ.get('SMTP_HOST')
+    SMTP_PORT = int(os.environ.get('SMTP_PORT', '25'))
+    SMTP_USERNAME = os.environ.get('SMTP_USERNAME')
+    SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+    SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'false').lower() == 'true'
+    SMTP_FROM = os.environ.get('SMTP_FROM', 'hr@localhost')
+    PAYROLL_WEBHOOK_URL = os.environ.get('PAYROLL_WEBHOOK_URL')
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '50'))
+    OUTBOX_POLL_SECONDS = float(os.environ.get('OUTBOX_POLL_SECONDS', '1'))
+    OUTBOX_LEASE_SECONDS = float(os.environ.get('OUTBOX_LEASE_SECONDS', '300'))
+    OUTBOX_TIMEOUT_SECONDS = float(os.environ.get('OUTBOX_TIMEOUT_SECONDS', '10'))
+    OUTBOX_HTTP_CONCURRENCY = int(os.environ.get('OUTBOX_HTTP_CONCURRENCY', '8'))
+    OUTBOX_SMTP_CONNECTIONS = int(os.environ.get('OUTBOX_SMTP_CONNECTIONS', '4'))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '10'))
+    OUTBOX_BACKOFF_SECONDS = float(os.environ.get('OUTBOX_BACKOFF_SECONDS', '2'))
+    OUTBOX_MAX_BACKOFF_SECONDS = float(os.environ.get('OUTBOX_MAX_BACKOFF_SECONDS', '900'))
+    OUTBOX_RETAIN_DAYS = float(os.environ.get('OUTBOX_RETAIN_DAYS', '7'))
+
+    # JSON responses of at least COMPRESS_MIN_SIZE bytes are gzip- or (when
+    # the Brotli package is installed) brotli-compressed for clients that accept it
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', '6'))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '4'))
+
+    # Scrapers of /api/metrics must send METRICS_TOKEN as a bearer token; while it
+    # is unset the endpoint answers 404 (it names routes, error rates and pool stats)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Add a Server-Timing header to responses slower than this; unset disables it
+    SERVER_TIMING_THRESHOLD_MS = (
+        float(os.environ['SERVER_TIMING_THRESHOLD_MS']) if os.environ.get('SERVER_TIMING_THRESHOLD_MS') else None
+    )
+
+    # Logging: records go through a bounded queue (LOG_QUEUE_SIZE, 0 = write
+    # synchronously) and INFO/DEBUG lines are sampled per call site
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+    LOG_SAMPLE_PER_SECOND = float(os.environ.get('LOG_SAMPLE_PER_SECOND', '20'))
+    LOG_SAMPLE_BURST = int(os.environ.get('LOG_SAMPLE_BURST', '50'))
+    # The instrumented pool logs its checkouts under app.metrics at DEBUG
+    LOG_LEVELS = log_levels({'': 'INFO', 'sqlalchemy': 'WARNING', 'app.metrics': 'INFO'})
+
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # Rotated refresh tokens kept revoked until they expire; when all slots
+    # hold live revocations, refreshes answer 503 instead of evicting one
+    TOKEN_REVOCATION_MAX_ENTRIES = int(os.environ.get('TOKEN_REVOCATION_MAX_ENTRIES', '200000'))
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
@@ -36,9 +191,17 @@ class Config:
 class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
+    CORS_ORIGINS = ["https://your-frontend-domain.vercel.app"]
+    # Keep boot to what is needed to serve requests; bcrypt calibration runs
+    # on the hashing pool and is only waited for by the first hash
+    LAZY_STARTUP = os.environ.get('LAZY_STARTUP', 'true').lower() == 'true'
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    LOG_LEVELS = log_levels({'': 'INFO', 'sqlalchemy': 'WARNING', 'app.metrics': 'INFO', 'werkzeug': 'WARNING'})
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    LOG_SAMPLE_PER_SECOND = float(os.environ.get('LOG_SAMPLE_PER_SECOND', '0'))
+    LOG_LEVELS = log_levels({'': 'DEBUG', 'sqlalchemy': 'WARNING', 'app.metrics': 'INFO'})
 
 class TestingConfig(Config):
     TESTING = True
@@ -2,7 +2,6 @@ from app import create_app, db
 from app.models.user import User
 from app.models.employee import Employee
 from datetime import datetime
-import bcrypt
 
 def create_admin():
     app = create_app()
@@ -17,8 +16,7 @@ def create_admin():
                     email="admin@example.com",
                     role="admin"
                 )
-                admin.password_hash = bcrypt.hashpw("admin123".encode('utf-8'), 
-                                                  bcrypt.gensalt()).decode('utf-8')
+                admin.set_password("admin123")
                 db.session.add(admin)
                 db.session.commit()
                 print("Admin user created successfully!")
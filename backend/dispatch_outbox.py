@@ -0,0 +1,76 @@
+"""Deliver queued review notifications (see app/outbox.py).
+
+Run next to the web processes, as many as needed:
+
+    python dispatch_outbox.py           # poll until SIGTERM/SIGINT
+    python dispatch_outbox.py --once    # drain what is due now and exit
+
+Each loop claims a batch of due messages, sends it and records the outcome.
+Full batches are followed straight away by the next one. Otherwise the
+worker sleeps OUTBOX_POLL_SECONDS. On SIGTERM the current batch finishes
+before the worker exits; a batch cut short is re-sent once its lease
+expires. Sent messages older than OUTBOX_RETAIN_DAYS are purged hourly.
+
+Try it locally against ``benchmarks/notification_sink.py``:
+
+    python benchmarks/notification_sink.py --smtp-port 2525 --http-port 8025 &
+    SMTP_HOST=localhost SMTP_PORT=2525 PAYROLL_WEBHOOK_URL=http://localhost:8025/payroll \\
+        python dispatch_outbox.py
+"""
+import argparse
+import logging
+import signal
+import threading
+import time
+
+from app import create_app, db
+from app import outbox
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL_SECONDS = 3600
+
+
+def run(app, stop, once=False):
+    with app.app_context():
+        poll = app.config['OUTBOX_POLL_SECONDS']
+        batch_size = app.config['OUTBOX_BATCH_SIZE']
+        last_purge = None
+        logger.info("Outbox dispatcher started (channels: %s)", ', '.join(outbox.channels()) or 'none')
+        while not stop.is_set():
+            try:
+                if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS:
+                    purged = outbox.purge()
+                    if purged:
+                        logger.info("Purged %s sent outbox messages", purged)
+                    last_purge = time.monotonic()
+                claimed, _, _ = outbox.dispatch_batch()
+            except Exception as e:
+                logger.exception("Outbox dispatch failed: %s", e)
+                db.session.rollback()
+                claimed = 0
+                if once:
+                    raise
+            finally:
+                db.session.remove()
+            if claimed >= batch_size:
+                continue
+            if once:
+                return
+            stop.wait(poll)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help='drain the due messages and exit')
+    args = parser.parse_args()
+
+    app = create_app()
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    run(app, stop, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
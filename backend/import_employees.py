@@ -0,0 +1,215 @@
+"""Bulk-import employees from a CSV or NDJSON file.
+
+    python import_employees.py employees.csv --errors import_errors.csv
+
+Each record needs ``email``, ``password`` and either ``name`` or
+``first_name``/``last_name``. Optional: ``department``, ``position``,
+``role`` (default employee), ``date_of_birth`` and ``date_joined``
+(YYYY-MM-DD). The file is streamed in chunks. Each chunk is checked against
+existing emails with one query, its passwords are hashed on the process pool,
+and Users/Employees are inserted with executemany statements in their own
+transaction, so a failure only loses that chunk. Rows that fail are written
+to ``--errors`` with their line number.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='CSV or NDJSON file ("-" for stdin)')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='default: from the file extension')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--errors', help='write failed rows to this CSV file (default: stderr)')
+    parser.add_argument('--hash-workers', type=int, default=os.cpu_count() or 1,
+                        help='bcrypt worker processes (default: one per CPU)')
+    return parser.parse_args()
+
+
+def read_records(handle, fmt):
+    """Yield (line_number, record) without loading the whole file."""
+    if fmt == 'ndjson':
+        for line_number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, {'__error__': f'Invalid JSON: {e}'}
+                continue
+            yield line_number, record if isinstance(record, dict) else {'__error__': 'Expected an object'}
+    else:
+        reader = csv.DictReader(handle)
+        for record in reader:
+            yield reader.line_num, record
+
+
+def parse_date(value, default):
+    if not value:
+        return default
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def validate(record, today):
+    """Return the insert-ready fields for ``record`` or raise ValueError."""
+    if '__error__' in record:
+        raise ValueError(record['__error__'])
+    email = (record.get('email') or '').strip()
+    if not email or '@' not in email:
+        raise ValueError('Missing or invalid email')
+    password = record.get('password') or ''
+    if not password:
+        raise ValueError('Missing password')
+
+    first_name = (record.get('first_name') or '').strip()
+    last_name = (record.get('last_name') or '').strip()
+    if not first_name:
+        # Same split as /api/auth/register
+        name_parts = (record.get('name') or '').split()
+        if not name_parts:
+            raise ValueError('Missing name')
+        first_name = name_parts[0]
+        last_name = name_parts[-1] if len(name_parts) > 1 else ""
+
+    role = record.get('role') or 'employee'
+    if role not in ('admin', 'employee'):
+        raise ValueError(f'Invalid role: {role}')
+
+    try:
+        date_of_birth = parse_date(record.get('date_of_birth'), today)
+        date_joined = parse_date(record.get('date_joined'), today)
+    except ValueError:
+        raise ValueError('Invalid date. Use YYYY-MM-DD')
+
+    return {
+        'email': email,
+        'password': password,
+        'role': role,
+        'first_name': first_name,
+        'last_name': last_name,
+        'department': record.get('department') or 'Default Department',
+        'position': record.get('position') or 'Employee',
+        'date_of_birth': date_of_birth,
+        'date_joined': date_joined
+    }
+
+
+def import_chunk(chunk, errors):
+    """Insert one chunk of validated rows; returns how many were imported."""
+    from app import db, passwords
+    from app.models.user import User
+    from app.models.employee import Employee
+
+    emails = [row['email'] for _, row in chunk]
+    existing = {
+        email for (email,) in db.session.query(User.email).filter(User.email.in_(emails))
+    }
+    rows = []
+    for line_number, row in chunk:
+        if row['email'] in existing:
+            errors.append((line_number, row['email'], 'Email already registered'))
+        else:
+            rows.append(row)
+    if not rows:
+        return 0
+
+    hashes = passwords.hash_passwords([row['password'] for row in rows])
+    now = datetime.utcnow()
+    try:
+        db.session.execute(User.__table__.insert(), [{
+            'username': row['email'],
+            'email': row['email'],
+            'password_hash': password_hash,
+            'role': row['role'],
+            'created_at': now
+        } for row, password_hash in zip(rows, hashes)])
+
+        user_ids = dict(
+            db.session.query(User.email, User.user_id).filter(User.email.in_([row['email'] for row in rows]))
+        )
+        db.session.execute(Employee.__table__.insert(), [{
+            'user_id': user_ids[row['email']],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'date_of_birth': row['date_of_birth'],
+            'department': row['department'],
+            'position': row['position'],
+            'date_joined': row['date_joined']
+        } for row in rows])
+        db.session.commit()
+        return len(rows)
+    except Exception as e:
+        db.session.rollback()
+        line_numbers = {row['email']: line_number for line_number, row in chunk}
+        for row in rows:
+            errors.append((line_numbers[row['email']], row['email'], f'Chunk failed: {e}'))
+        return 0
+
+
+def import_employees():
+    args = parse_args()
+    # Must be set before the app config is imported
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', str(args.hash_workers))
+
+    from app import create_app
+    app = create_app()
+
+    fmt = args.format or ('ndjson' if args.path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    handle = sys.stdin if args.path == '-' else open(args.path, newline='', encoding='utf-8')
+    error_file = open(args.errors, 'w', newline='', encoding='utf-8') if args.errors else sys.stderr
+    error_writer = csv.writer(error_file)
+    error_writer.writerow(['line', 'email', 'error'])
+
+    imported = failed = processed = 0
+    started = time.perf_counter()
+    today = datetime.now().date()
+    seen = set()
+    chunk = []
+    errors = []
+
+    def flush():
+        nonlocal imported, failed, chunk, errors
+        if chunk:
+            imported += import_chunk(chunk, errors)
+        failed += len(errors)
+        error_writer.writerows(errors)
+        chunk, errors = [], []
+        elapsed = time.perf_counter() - started
+        print(f"processed {processed}  imported {imported}  failed {failed}  "
+              f"({processed / elapsed:.0f} rows/s)", file=sys.stderr)
+
+    with app.app_context():
+        try:
+            for line_number, record in read_records(handle, fmt):
+                processed += 1
+                try:
+                    row = validate(record, today)
+                except ValueError as e:
+                    errors.append((line_number, record.get('email'), str(e)))
+                    continue
+                if row['email'] in seen:
+                    errors.append((line_number, row['email'], 'Duplicate email in file'))
+                    continue
+                seen.add(row['email'])
+                chunk.append((line_number, row))
+                if len(chunk) >= args.chunk_size:
+                    flush()
+            flush()
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+            if error_file is not sys.stderr:
+                error_file.close()
+
+    print(f"Import finished: {imported} imported, {failed} failed, {processed} processed "
+          f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(import_employees())
@@ -0,0 +1,149 @@
+"""Versioned schema migrations.
+
+Run as a release step before the new code starts serving, never from app
+startup:
+
+    python migrate.py              # apply pending migrations
+    python migrate.py --status     # list applied and pending migrations
+    python migrate.py --reset --seed-demo   # drop everything, migrate, add demo users
+
+Migrations live in ``migrations/NNNN_description.py`` and expose
+``upgrade(connection)``. Each one runs in its own transaction and is recorded
+in ``Schema_Migrations``. Each migration defines the tables and indexes it
+creates on its own ``MetaData``, frozen as they were at that version, never
+imported from ``app.models``; creates use ``checkfirst`` so databases from the
+old boot-time ``create_all`` are adopted. A change to an existing table must
+be a new migration that issues explicit DDL, with the model updated to match.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import re
+from datetime import datetime
+
+from app import create_app, db
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+schema_migrations = db.Table(
+    'Schema_Migrations',
+    db.MetaData(),
+    db.Column('version', db.String(4), primary_key=True),
+    db.Column('name', db.String(255), nullable=False),
+    db.Column('applied_at', db.TIMESTAMP, nullable=False)
+)
+
+
+def discover():
+    """Return [(version, name, path)] sorted by version."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def load(version, name, path):
+    spec = importlib.util.spec_from_file_location(f'migrations.m{version}_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def applied_versions(engine):
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        return {row.version for row in connection.execute(db.select(schema_migrations.c.version))}
+
+
+def upgrade(engine):
+    """Apply every pending migration; returns the versions applied."""
+    done = applied_versions(engine)
+    applied = []
+    for version, name, path in discover():
+        if version in done:
+            continue
+        logger.info(f"Applying migration {version}_{name}...")
+        module = load(version, name, path)
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        applied.append(version)
+    logger.info(f"Schema up to date ({len(applied)} migration(s) applied)")
+    return applied
+
+
+def status(engine):
+    done = applied_versions(engine)
+    for version, name, _ in discover():
+        print(f"{version}_{name}: {'applied' if version in done else 'pending'}")
+
+
+def reset(engine):
+    logger.info("Dropping all tables...")
+    db.metadata.drop_all(engine)
+    schema_migrations.drop(engine, checkfirst=True)
+
+
+def seed_demo():
+    """Demo admin and employee accounts (what recreate_db.py used to create)."""
+    from app.models.user import User
+    from app.models.employee import Employee
+
+    admin = User(username='admin', email='admin@example.com', role='admin')
+    admin.set_password('admin123')
+    db.session.add(admin)
+
+    employee = User(username='employee', email='employee@example.com', role='employee')
+    employee.set_password('employee123')
+    db.session.add(employee)
+    db.session.flush()  # This assigns user IDs
+
+    db.session.add(Employee(
+        user_id=employee.user_id,
+        first_name='Test',
+        last_name='Employee',
+        date_of_birth=datetime.strptime('2000-01-01', '%Y-%m-%d').date(),
+        department='IT',
+        position='Developer',
+        date_joined=datetime.strptime('2023-01-01', '%Y-%m-%d').date()
+    ))
+    db.session.commit()
+    logger.info("Admin user created - email: admin@example.com, password: admin123")
+    logger.info("Employee user created - email: employee@example.com, password: employee123")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument('--status', action='store_true', help='show migration status and exit')
+    parser.add_argument('--reset', action='store_true', help='drop all tables first (destroys data)')
+    parser.add_argument('--seed-demo', action='store_true', help='create demo admin/employee users')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            if args.status:
+                status(db.engine)
+                return
+            if args.reset:
+                reset(db.engine)
+            upgrade(db.engine)
+            if args.seed_demo:
+                seed_demo()
+        except Exception as e:
+            logger.error(f"Migration failed: {str(e)}")
+            db.session.rollback()
+            raise
+
+
+if __name__ == "__main__":
+    main()
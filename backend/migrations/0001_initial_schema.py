@@ -0,0 +1,61 @@
+"""Original tables: Users, Employees, Leave_Applications, Leave_Reviews.
+
+Databases created by the old boot-time ``db.create_all()`` already have these,
+so every create is guarded with ``checkfirst``. The tables are defined here
+as they were at this version, not imported from the models, so replaying
+the migrations on an empty database always builds the same schema.
+"""
+from app import db
+
+metadata = db.MetaData()
+
+users = db.Table(
+    'Users', metadata,
+    db.Column('user_id', db.Integer, primary_key=True, autoincrement=True),
+    db.Column('username', db.String(255), unique=True, nullable=False),
+    db.Column('password_hash', db.String(255), nullable=False),
+    db.Column('email', db.String(255), unique=True, nullable=False),
+    db.Column('role', db.Enum('admin', 'employee'), nullable=False),
+    db.Column('created_at', db.TIMESTAMP)
+)
+
+employees = db.Table(
+    'Employees', metadata,
+    db.Column('employee_id', db.Integer, primary_key=True, autoincrement=True),
+    db.Column('user_id', db.Integer, db.ForeignKey('Users.user_id'), nullable=False),
+    db.Column('first_name', db.String(255), nullable=False),
+    db.Column('last_name', db.String(255), nullable=False),
+    db.Column('date_of_birth', db.Date, nullable=False),
+    db.Column('department', db.String(255), nullable=False),
+    db.Column('position', db.String(255), nullable=False),
+    db.Column('date_joined', db.Date, nullable=False)
+)
+
+leave_applications = db.Table(
+    'Leave_Applications', metadata,
+    db.Column('leave_application_id', db.Integer, primary_key=True, autoincrement=True),
+    db.Column('employee_id', db.Integer, db.ForeignKey('Employees.employee_id'), nullable=False),
+    db.Column('leave_type', db.String(50), nullable=False),
+    db.Column('leave_mode', db.String(20), nullable=False),
+    db.Column('start_date', db.Date, nullable=False),
+    db.Column('end_date', db.Date, nullable=False),
+    db.Column('reason', db.Text, nullable=False),
+    db.Column('status', db.String(20), nullable=False),
+    db.Column('application_date', db.TIMESTAMP)
+)
+
+leave_reviews = db.Table(
+    'Leave_Reviews', metadata,
+    db.Column('leave_review_id', db.Integer, primary_key=True, autoincrement=True),
+    db.Column('leave_application_id', db.Integer,
+              db.ForeignKey('Leave_Applications.leave_application_id'), nullable=False),
+    db.Column('reviewed_by', db.Integer, db.ForeignKey('Users.user_id'), nullable=False),
+    db.Column('review_date', db.TIMESTAMP),
+    db.Column('status', db.Enum('accepted', 'denied'), nullable=False),
+    db.Column('comments', db.Text)
+)
+
+
+def upgrade(connection):
+    for table in (users, employees, leave_applications, leave_reviews):
+        table.create(connection, checkfirst=True)
@@ -0,0 +1,40 @@
+"""Derived tables behind stats, occupancy and ETags.
+
+Backfill existing data afterwards with ``python rebuild_stats.py``.
+"""
+from app import db
+
+metadata = db.MetaData()
+
+# Foreign key targets only (created by 0001); never created here
+db.Table('Employees', metadata, db.Column('employee_id', db.Integer, primary_key=True))
+db.Table('Leave_Applications', metadata, db.Column('leave_application_id', db.Integer, primary_key=True))
+
+leave_stat_counters = db.Table(
+    'Leave_Stat_Counters', metadata,
+    db.Column('dimension', db.String(20), primary_key=True),
+    db.Column('bucket', db.String(255), primary_key=True),
+    db.Column('count', db.Integer, nullable=False)
+)
+
+leave_occupancy = db.Table(
+    'Leave_Occupancy', metadata,
+    db.Column('leave_application_id', db.Integer,
+              db.ForeignKey('Leave_Applications.leave_application_id'), primary_key=True),
+    db.Column('day', db.Date, primary_key=True),
+    db.Column('employee_id', db.Integer, db.ForeignKey('Employees.employee_id'), nullable=False),
+    db.Column('department', db.String(255), nullable=False),
+    db.Index('ix_leave_occupancy_day', 'day', 'employee_id'),
+    db.Index('ix_leave_occupancy_department_day', 'department', 'day', 'employee_id')
+)
+
+data_versions = db.Table(
+    'Data_Versions', metadata,
+    db.Column('scope', db.String(64), primary_key=True),
+    db.Column('version', db.Integer, nullable=False)
+)
+
+
+def upgrade(connection):
+    for table in (leave_stat_counters, leave_occupancy, data_versions):
+        table.create(connection, checkfirst=True)
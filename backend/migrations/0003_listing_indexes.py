@@ -0,0 +1,38 @@
+"""Secondary indexes for the listing, serializer and identity hot paths.
+
+* Leave_Applications(application_date, leave_application_id) - keyset pages
+* Leave_Applications(employee_id, application_date) - an employee's history
+* Leave_Applications(status, application_date) - admin status filters
+* Employees(user_id) - identity lookups
+* Leave_Reviews(leave_application_id) - batch review loading
+"""
+from app import db
+
+metadata = db.MetaData()
+
+# Just the indexed columns of tables created by 0001
+leave_applications = db.Table(
+    'Leave_Applications', metadata,
+    db.Column('leave_application_id', db.Integer, primary_key=True),
+    db.Column('employee_id', db.Integer),
+    db.Column('status', db.String(20)),
+    db.Column('application_date', db.TIMESTAMP)
+)
+employees = db.Table('Employees', metadata, db.Column('user_id', db.Integer))
+leave_reviews = db.Table('Leave_Reviews', metadata, db.Column('leave_application_id', db.Integer))
+
+INDEXES = [
+    db.Index('ix_leave_applications_application_date',
+             leave_applications.c.application_date, leave_applications.c.leave_application_id),
+    db.Index('ix_leave_applications_employee_date',
+             leave_applications.c.employee_id, leave_applications.c.application_date),
+    db.Index('ix_leave_applications_status_date',
+             leave_applications.c.status, leave_applications.c.application_date),
+    db.Index('ix_employees_user_id', employees.c.user_id),
+    db.Index('ix_leave_reviews_leave_application_id', leave_reviews.c.leave_application_id),
+]
+
+
+def upgrade(connection):
+    for index in INDEXES:
+        index.create(connection, checkfirst=True)
@@ -0,0 +1,23 @@
+"""Leave balance ledger (Leave_Balances).
+
+Backfill from existing applications afterwards with ``python rebuild_stats.py``.
+"""
+from app import db
+
+metadata = db.MetaData()
+
+# Foreign key target only (created by 0001); never created here
+db.Table('Employees', metadata, db.Column('employee_id', db.Integer, primary_key=True))
+
+leave_balances = db.Table(
+    'Leave_Balances', metadata,
+    db.Column('employee_id', db.Integer, db.ForeignKey('Employees.employee_id'), primary_key=True),
+    db.Column('leave_type', db.String(50), primary_key=True),
+    db.Column('year', db.Integer, primary_key=True),
+    db.Column('used_days', db.Float, nullable=False),
+    db.Column('pending_days', db.Float, nullable=False)
+)
+
+
+def upgrade(connection):
+    leave_balances.create(connection, checkfirst=True)
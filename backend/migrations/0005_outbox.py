@@ -0,0 +1,25 @@
+"""Notification outbox (Outbox_Messages), drained by ``dispatch_outbox.py``."""
+from app import db
+
+metadata = db.MetaData()
+
+outbox_messages = db.Table(
+    'Outbox_Messages', metadata,
+    db.Column('outbox_message_id', db.Integer, primary_key=True, autoincrement=True),
+    db.Column('idempotency_key', db.String(64), nullable=False, unique=True),
+    db.Column('channel', db.String(20), nullable=False),
+    db.Column('topic', db.String(64), nullable=False),
+    db.Column('payload', db.Text, nullable=False),
+    db.Column('status', db.String(20), nullable=False),
+    db.Column('attempts', db.Integer, nullable=False),
+    db.Column('next_attempt_at', db.DateTime, nullable=False),
+    db.Column('claim_token', db.String(32)),
+    db.Column('last_error', db.String(500)),
+    db.Column('created_at', db.DateTime, nullable=False),
+    db.Column('sent_at', db.DateTime),
+    db.Index('ix_outbox_messages_due', 'status', 'next_attempt_at')
+)
+
+
+def upgrade(connection):
+    outbox_messages.create(connection, checkfirst=True)
@@ -0,0 +1,25 @@
+from app import create_app, db
+from app import stats
+from app import occupancy
+from app import balances
+
+def rebuild_stats():
+    app = create_app()
+    with app.app_context():
+        try:
+            print("Rebuilding leave dashboard counters...")
+            buckets = stats.rebuild()
+            print(f"Leave dashboard counters rebuilt ({buckets} buckets)")
+            print("Rebuilding leave occupancy index...")
+            days = occupancy.rebuild()
+            print(f"Leave occupancy index rebuilt ({days} leave days)")
+            print("Rebuilding leave balance ledger...")
+            rows = balances.rebuild()
+            print(f"Leave balance ledger rebuilt ({rows} balances)")
+        except Exception as e:
+            print(f"Error rebuilding leave stats: {str(e)}")
+            db.session.rollback()
+            raise
+
+if __name__ == "__main__":
+    rebuild_stats()
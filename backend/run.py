@@ -1,6 +1,6 @@
 from app import create_app
 
-app = create_app()
-
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    # Created under the guard: password hashing workers re-import this script
+    app = create_app()
+    app.run(debug=True)
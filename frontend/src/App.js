@@ -12,6 +12,7 @@ function App() {
     } catch {
       localStorage.removeItem('user');
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
       return null;
     }
   });
@@ -21,6 +22,7 @@ function App() {
     if (!user) {
       localStorage.removeItem('user');
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
     }
   }, []);
 
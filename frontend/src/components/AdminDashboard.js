@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef, useCallback } from 'react';
 import { Bar } from 'react-chartjs-2';
 import {
   Chart as ChartJS,
@@ -10,7 +10,7 @@ import {
   Legend,
 } from 'chart.js';
 import ReviewApplication from './ReviewApplication';
-import { getApplications, reviewLeave } from '../services/api';
+import { getApplicationsPage, getLeaveStats, reviewLeave, searchEmployees, subscribeLeaveEvents } from '../services/api';
 
 ChartJS.register(
   CategoryScale,
@@ -21,23 +21,73 @@ ChartJS.register(
   Legend
 );
 
+const PAGE_SIZE = 50;
+
+// Query parameters for the listing filters, or null when the status and view
+// filters contradict each other and nothing can match
+const listParams = ({ employee, status, view }, userId) => {
+  const params = {};
+  if (employee) params.employee_id = employee.employee_id;
+  if (view === 'reviewed') params.reviewed_by = userId;
+  const wanted = view === 'pending' ? 'pending' : status;
+  if (wanted !== 'all') {
+    if (status !== 'all' && status !== wanted) return null;
+    params.status = wanted;
+  }
+  return params;
+};
+
+// Whether a row pushed by the event stream (or changed locally) belongs in
+// the listing the filters describe
+const matchesFilters = (application, { employee, status, view }, userId) => {
+  if (employee && application.employee_id !== employee.employee_id) return false;
+  if (status !== 'all' && application.status !== status) return false;
+  if (view === 'pending' && application.status !== 'pending') return false;
+  if (view === 'reviewed' && application.review?.reviewer?.id !== userId) return false;
+  return true;
+};
+
 function AdminDashboard() {
   const [searchTerm, setSearchTerm] = useState('');
+  const [suggestions, setSuggestions] = useState([]);
+  // The employee picked from the suggestions; the listing is filtered on the server
+  const [employeeFilter, setEmployeeFilter] = useState(null);
   const [statusFilter, setStatusFilter] = useState('all');
   const [viewFilter, setViewFilter] = useState('all');
+  // The same filters for the event handler, which is set up once
+  const filtersRef = useRef({ employee: null, status: 'all', view: 'all' });
+  // Responses to superseded requests (the filters changed meanwhile) are dropped
+  const requestRef = useRef(0);
   const [selectedApplication, setSelectedApplication] = useState(null);
   const [applications, setApplications] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [chartView, setChartView] = useState('week'); // 'week' or 'month'
 
   const currentUser = JSON.parse(localStorage.getItem('user'));
+  const userId = currentUser?.id;
+
+  // Replace the listing with the first page for the current filters
+  const fetchFirstPage = useCallback(async () => {
+    const request = ++requestRef.current;
+    const params = listParams(filtersRef.current, userId);
+    const data = params
+      ? await getApplicationsPage({ ...params, limit: PAGE_SIZE })
+      : { applications: [], next_cursor: null };
+    if (request === requestRef.current) {
+      setApplications(data.applications);
+      setNextCursor(data.next_cursor);
+    }
+  }, [userId]);
 
   useEffect(() => {
     const fetchApplications = async () => {
       try {
-        const data = await getApplications();
-        setApplications(data);
+        const [, statsData] = await Promise.all([fetchFirstPage(), getLeaveStats()]);
+        setStats(statsData);
         setLoading(false);
       } catch (err) {
         console.error('Failed to fetch applications:', err);
@@ -46,78 +96,100 @@ function AdminDashboard() {
       }
     };
 
+    // Apply pushed changes to the loaded rows instead of refetching the list;
+    // the stats come from pre-aggregated counters and are cheap to reload
+    const handleEvent = (type, event) => {
+      if (type === 'resync') {
+        fetchApplications();
+        return;
+      }
+      if (type === 'application.created') {
+        const { type: _, ...application } = event;
+        if (matchesFilters(application, filtersRef.current, userId)) {
+          setApplications(current => [application, ...current]);
+        }
+      } else if (type === 'application.reviewed') {
+        setApplications(current => current
+          .map(app =>
+            app.leave_application_id === event.leave_application_id
+              ? { ...app, status: event.status, review: { ...app.review, ...event.review } }
+              : app
+          )
+          .filter(app => matchesFilters(app, filtersRef.current, userId)));
+      }
+      getLeaveStats().then(setStats).catch(() => {});
+    };
+
     fetchApplications();
-  }, []);
+    return subscribeLeaveEvents(handleEvent);
+  }, [fetchFirstPage, userId]);
 
-  // Function to calculate working days between two dates
-  const calculateWorkingDays = (startDate, endDate) => {
-    const start = new Date(startDate);
-    const end = new Date(endDate);
-    let workingDays = 0;
-    const current = new Date(start);
+  const applyFilters = async (changes) => {
+    filtersRef.current = { ...filtersRef.current, ...changes };
+    try {
+      await fetchFirstPage();
+    } catch (err) {
+      setError(err.response?.data?.error || 'Failed to fetch applications');
+    }
+  };
 
-    while (current <= end) {
-      // Check if it's a weekday (Monday-Friday)
-      if (current.getDay() !== 0 && current.getDay() !== 6) {
-        workingDays++;
+  const loadMore = async () => {
+    const request = requestRef.current;
+    setLoadingMore(true);
+    try {
+      const params = listParams(filtersRef.current, userId);
+      const data = await getApplicationsPage({ ...params, limit: PAGE_SIZE, cursor: nextCursor });
+      if (request === requestRef.current) {
+        setApplications(current => [...current, ...data.applications]);
+        setNextCursor(data.next_cursor);
       }
-      current.setDate(current.getDate() + 1);
+    } catch (err) {
+      setError(err.response?.data?.error || 'Failed to fetch applications');
+    } finally {
+      setLoadingMore(false);
     }
-    return workingDays;
   };
 
-  // Function to get the current week's dates
-  const getCurrentWeekDates = () => {
-    const now = new Date();
-    const currentDay = now.getDay(); // 0 = Sunday, 1 = Monday, etc.
-    const diff = now.getDate() - currentDay + (currentDay === 0 ? -6 : 1); // Adjust when Sunday
-    
-    const monday = new Date(now.setDate(diff));
-    const weekDates = [];
-    
-    for (let i = 0; i < 5; i++) { // Monday to Friday
-      const date = new Date(monday);
-      date.setDate(monday.getDate() + i);
-      weekDates.push(date);
+  // Typeahead: ask the server once typing pauses
+  useEffect(() => {
+    const term = searchTerm.trim();
+    if (!term || (employeeFilter && term === employeeFilter.name)) {
+      setSuggestions([]);
+      return undefined;
     }
-    
-    return weekDates;
-  };
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      searchEmployees(term)
+        .then(results => { if (!cancelled) setSuggestions(results); })
+        .catch(() => { if (!cancelled) setSuggestions([]); });
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm, employeeFilter]);
 
-  // Function to check if a date falls within a leave period
-  const isDateInLeavePeriod = (date, startDate, endDate) => {
-    const checkDate = new Date(date);
-    const start = new Date(startDate);
-    const end = new Date(endDate);
-    
-    // Reset time part for accurate date comparison
-    checkDate.setHours(0, 0, 0, 0);
-    start.setHours(0, 0, 0, 0);
-    end.setHours(0, 0, 0, 0);
-    
-    return checkDate >= start && checkDate <= end;
+  const applyEmployeeFilter = (employee, term = employee ? employee.name : '') => {
+    setEmployeeFilter(employee);
+    setSearchTerm(term);
+    setSuggestions([]);
+    applyFilters({ employee });
   };
 
-  // Function to get month names
-  const getMonthData = () => {
-    const months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
-    const currentMonth = new Date().getMonth();
-    const monthsToShow = months.slice(currentMonth - 5, currentMonth + 1); // Show last 6 months
-    return monthsToShow;
+  // Editing the box after picking someone drops back to the full listing
+  const handleSearchChange = (value) => {
+    if (employeeFilter && value !== employeeFilter.name) {
+      applyEmployeeFilter(null, value);
+    } else {
+      setSearchTerm(value);
+    }
   };
 
-  // Calculate leave data for the bar chart
-  const calculateChartData = (applications) => {
+  // Build the bar chart from the server-side daily/monthly counters
+  const calculateChartData = (stats) => {
     if (chartView === 'week') {
-      const weekDates = getCurrentWeekDates();
       const weekdayNames = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri'];
-      const acceptedApplications = applications.filter(app => app.status === 'accepted');
-      
-      const dailyCounts = weekDates.map((date) => {
-        return acceptedApplications.filter(app => 
-          isDateInLeavePeriod(date, app.start_date, app.end_date)
-        ).length;
-      });
+      const dailyCounts = (stats?.daily || []).map(bucket => bucket.count);
 
       return {
         labels: weekdayNames,
@@ -133,17 +205,12 @@ function AdminDashboard() {
       };
     } else {
       // Monthly view
-      const months = getMonthData();
-      const acceptedApplications = applications.filter(app => app.status === 'accepted');
-      
-      const monthlyCounts = months.map(month => {
-        return acceptedApplications.filter(app => {
-          const startDate = new Date(app.start_date);
-          const monthIndex = startDate.getMonth();
-          const monthName = new Date(startDate.getFullYear(), monthIndex).toLocaleString('default', { month: 'short' });
-          return monthName === month;
-        }).length;
+      const monthly = stats?.monthly || [];
+      const months = monthly.map(bucket => {
+        const [year, month] = bucket.month.split('-');
+        return new Date(Number(year), Number(month) - 1).toLocaleString('default', { month: 'short' });
       });
+      const monthlyCounts = monthly.map(bucket => bucket.count);
 
       return {
         labels: months,
@@ -189,21 +256,6 @@ function AdminDashboard() {
     },
   };
 
-  const filteredApplications = applications.filter(app => {
-    const employeeName = app.employee?.name || '';
-    const matchesSearch = employeeName.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesStatus = statusFilter === 'all' || app.status.toLowerCase() === statusFilter.toLowerCase();
-    
-    // Filter based on review status
-    const matchesView = viewFilter === 'all' 
-      ? true 
-      : viewFilter === 'pending' 
-        ? app.status === 'pending'
-        : app.review?.reviewer?.id === currentUser.id;
-
-    return matchesSearch && matchesStatus && matchesView;
-  });
-
   const handleReview = (applicationId) => {
     const application = applications.find(app => app.leave_application_id === applicationId);
     setSelectedApplication(application);
@@ -213,12 +265,14 @@ function AdminDashboard() {
     try {
       await reviewLeave(applicationId, { status: newStatus.toLowerCase(), comments });
       
-      // Update local state
-      const updatedApplications = applications.map(app => 
-        app.leave_application_id === applicationId 
-          ? { ...app, status: newStatus.toLowerCase() }
-          : app
-      );
+      // Update local state; a row the filters no longer match drops out
+      const updatedApplications = applications
+        .map(app =>
+          app.leave_application_id === applicationId
+            ? { ...app, status: newStatus.toLowerCase() }
+            : app
+        )
+        .filter(app => matchesFilters(app, filtersRef.current, userId));
       setApplications(updatedApplications);
       setSelectedApplication(null);
     } catch (err) {
@@ -226,9 +280,9 @@ function AdminDashboard() {
     }
   };
 
-  // Function to format duration display
-  const formatDuration = (startDate, endDate) => {
-    const workingDays = calculateWorkingDays(startDate, endDate);
+  // Function to format duration display; working days come from the server,
+  // which counts them against the employee's holiday calendar
+  const formatDuration = (startDate, endDate, workingDays) => {
     return (
       <div>
         <div className="text-sm text-gray-900">
@@ -262,20 +316,45 @@ function AdminDashboard() {
       {/* Search and Filter Section */}
       <div className="bg-white p-4 rounded-lg shadow-md">
         <div className="flex flex-col md:flex-row gap-4">
-          <div className="flex-1">
+          <div className="flex-1 relative">
             <input
               type="text"
-              placeholder="Search by employee name..."
+              placeholder="Search employees by name, department or email..."
               className="w-full p-2 border rounded-md"
               value={searchTerm}
-              onChange={(e) => setSearchTerm(e.target.value)}
+              onChange={(e) => handleSearchChange(e.target.value)}
             />
+            {employeeFilter && (
+              <button
+                className="absolute right-2 top-2 text-sm text-gray-500 hover:text-gray-800"
+                onClick={() => applyEmployeeFilter(null)}
+              >
+                Clear
+              </button>
+            )}
+            {suggestions.length > 0 && (
+              <ul className="absolute z-10 w-full mt-1 bg-white border rounded-md shadow-md">
+                {suggestions.map((employee) => (
+                  <li
+                    key={employee.employee_id}
+                    className="px-3 py-2 cursor-pointer hover:bg-gray-100"
+                    onClick={() => applyEmployeeFilter(employee)}
+                  >
+                    <div className="text-sm text-gray-900">{employee.name}</div>
+                    <div className="text-xs text-gray-500">{employee.department} · {employee.email}</div>
+                  </li>
+                ))}
+              </ul>
+            )}
           </div>
           <div className="w-full md:w-48">
             <select
               className="w-full p-2 border rounded-md"
               value={statusFilter}
-              onChange={(e) => setStatusFilter(e.target.value)}
+              onChange={(e) => {
+                setStatusFilter(e.target.value);
+                applyFilters({ status: e.target.value });
+              }}
             >
               <option value="all">All Status</option>
               <option value="pending">Pending</option>
@@ -287,7 +366,10 @@ function AdminDashboard() {
             <select
               className="w-full p-2 border rounded-md"
               value={viewFilter}
-              onChange={(e) => setViewFilter(e.target.value)}
+              onChange={(e) => {
+                setViewFilter(e.target.value);
+                applyFilters({ view: e.target.value });
+              }}
             >
               <option value="all">All Applications</option>
               <option value="pending">Pending Review</option>
@@ -330,7 +412,7 @@ function AdminDashboard() {
           </div>
         </div>
         <div className="h-[400px]"> {/* Increased height */}
-          <Bar data={calculateChartData(applications)} options={chartOptions} />
+          <Bar data={calculateChartData(stats)} options={chartOptions} />
         </div>
       </div>
 
@@ -364,7 +446,7 @@ function AdminDashboard() {
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
-              {filteredApplications.map((application) => (
+              {applications.map((application) => (
                 <tr key={application.leave_application_id}>
                   <td className="px-6 py-4 whitespace-nowrap">
                     {application.employee?.name || 'N/A'}
@@ -373,7 +455,7 @@ function AdminDashboard() {
                     {application.leave_type}
                   </td>
                   <td className="px-6 py-4 whitespace-nowrap">
-                    {formatDuration(application.start_date, application.end_date)}
+                    {formatDuration(application.start_date, application.end_date, application.working_days)}
                   </td>
                   <td className="px-6 py-4">
                     <div className="max-w-xs truncate">
@@ -406,6 +488,17 @@ function AdminDashboard() {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="p-4 text-center border-t">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 text-sm text-indigo-600 hover:text-indigo-900 disabled:text-gray-400"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
 
       {selectedApplication && (
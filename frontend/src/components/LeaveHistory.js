@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getApplications } from '../services/api';
+import { getApplications, subscribeLeaveEvents } from '../services/api';
 
 const LeaveHistory = () => {
     const [applications, setApplications] = useState([]);
@@ -39,8 +39,32 @@ const LeaveHistory = () => {
             }
         };
 
+        // Employees patch their own rows from pushed events; the admin view
+        // needs full review details, so it refetches after its own reviews
+        const handleEvent = (type, event) => {
+            if (type === 'resync') {
+                fetchApplications();
+            } else if (user.role === 'admin') {
+                if (type === 'application.reviewed' && Number(event.review.reviewer.id) === Number(user.id)) {
+                    fetchApplications();
+                }
+            } else if (type === 'application.created') {
+                const { type: _, ...application } = event;
+                setApplications(current => [application, ...current]);
+            } else if (type === 'application.reviewed') {
+                setApplications(current => current.map(app =>
+                    app.leave_application_id === event.leave_application_id
+                        ? { ...app, status: event.status, review: { ...app.review, ...event.review } }
+                        : app
+                ));
+            }
+        };
+
         fetchApplications();
-    }, [user]);
+        return subscribeLeaveEvents(handleEvent);
+        // `user` is re-parsed on every render; only its identity matters here
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [user.id, user.role]);
 
     if (loading) {
         return (
@@ -6,7 +6,7 @@ import LeaveHistory from '../components/LeaveHistory';
 import RequestLeave from '../components/RequestLeave';
 import AdminDashboard from '../components/AdminDashboard';
 import Footer from '../components/Footer';
-import { getApplications } from '../services/api';
+import { getLeaveBalances } from '../services/api';
 
 function Dashboard({ user, setUser }) {
   const navigate = useNavigate();
@@ -19,41 +19,22 @@ function Dashboard({ user, setUser }) {
   });
   const [loading, setLoading] = useState(true);
 
-  // Function to calculate working days between two dates
-  const calculateWorkingDays = (startDate, endDate) => {
-    const start = new Date(startDate);
-    const end = new Date(endDate);
-    let workingDays = 0;
-    const current = new Date(start);
-
-    while (current <= end) {
-      // Check if it's a weekday (Monday-Friday)
-      if (current.getDay() !== 0 && current.getDay() !== 6) {
-        workingDays++;
-      }
-      current.setDate(current.getDate() + 1);
-    }
-    return workingDays;
-  };
-
   useEffect(() => {
     const calculateLeaveMetrics = async () => {
       try {
         if (user.role === 'employee') {
-          const applications = await getApplications();
-          
-          // Calculate total used leave days from accepted applications
-          const usedDays = applications
-            .filter(app => app.status === 'accepted')
-            .reduce((total, app) => {
-              return total + calculateWorkingDays(app.start_date, app.end_date);
-            }, 0);
+          // Balances are kept by the server as a ledger of accepted and
+          // pending working days per leave type
+          const { balances } = await getLeaveBalances();
+          const annual = balances.find(balance => balance.leave_type === 'annual');
 
-          setLeaveMetrics({
-            allowed: 30,
-            used: usedDays,
-            remaining: Math.max(30 - usedDays, 0)
-          });
+          if (annual && annual.allowance !== null) {
+            setLeaveMetrics({
+              allowed: annual.allowance,
+              used: annual.used,
+              remaining: annual.remaining
+            });
+          }
         }
         setLoading(false);
       } catch (error) {
@@ -67,6 +48,7 @@ function Dashboard({ user, setUser }) {
 
   const handleLogout = () => {
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     localStorage.removeItem('user');
     setUser(null);
     navigate('/login');
@@ -27,6 +27,7 @@ function Login({ setUser }) {
       }
 
       localStorage.setItem('token', response.access_token);
+      localStorage.setItem('refreshToken', response.refresh_token);
       localStorage.setItem('user', JSON.stringify(response.user));
       
       setUser(response.user);
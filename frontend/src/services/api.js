@@ -23,14 +23,52 @@ api.interceptors.request.use(
   }
 );
 
-// Add response interceptor for error handling
+const clearSession = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refreshToken');
+  localStorage.removeItem('user');
+  window.location.href = '/login';
+};
+
+// Concurrent 401s share one refresh call; the server rotates refresh tokens,
+// so a second refresh with the same token would be rejected.
+let refreshPromise = null;
+
+const refreshTokens = async () => {
+  const refreshToken = localStorage.getItem('refreshToken');
+  if (!refreshToken) {
+    throw new Error('No refresh token');
+  }
+  const response = await axios.post(`${API_URL}/auth/refresh`, null, {
+    headers: { Authorization: `Bearer ${refreshToken}` },
+  });
+  localStorage.setItem('token', response.data.access_token);
+  localStorage.setItem('refreshToken', response.data.refresh_token);
+  return response.data.access_token;
+};
+
+// Add response interceptor for error handling: on an expired access token,
+// refresh once and replay the request instead of forcing a password login
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status === 401 && original && !original._retried) {
+      original._retried = true;
+      try {
+        refreshPromise = refreshPromise || refreshTokens();
+        const token = await refreshPromise;
+        original.headers.Authorization = `Bearer ${token}`;
+        return api(original);
+      } catch (refreshError) {
+        clearSession();
+        return Promise.reject(refreshError);
+      } finally {
+        refreshPromise = null;
+      }
+    }
     if (error.response?.status === 401) {
-      localStorage.removeItem('token');
-      localStorage.removeItem('user');
-      window.location.href = '/login';
+      clearSession();
     }
     return Promise.reject(error);
   }
@@ -87,8 +125,50 @@ export const requestLeave = async (leaveData) => {
   }
 };
 
-export const getApplications = async () => {
-  const response = await api.get('/leave/applications');
+// Largest `limit` the listing accepts (MAX_PAGE_SIZE in routes/leave.py)
+const MAX_PAGE_SIZE = 200;
+
+// Fetch one keyset page of applications. `params` may carry the server-side
+// filters (status, department, employee_id, reviewed_by, leave_type,
+// date_from, date_to), `limit` and the `cursor` returned as `next_cursor` by
+// the previous page.
+export const getApplicationsPage = async (params = {}) => {
+  const response = await api.get('/leave/applications', { params });
+  return response.data;
+};
+
+// Every application matching `params`, following `next_cursor` page by page
+// (at the server's largest page size) until the list is exhausted. Only for
+// lists known to be short, such as one employee's own history; long listings
+// should page with getApplicationsPage.
+export const getApplications = async (params = {}) => {
+  const applications = [];
+  let cursor;
+  do {
+    const data = await getApplicationsPage({ limit: MAX_PAGE_SIZE, ...params, ...(cursor ? { cursor } : {}) });
+    applications.push(...data.applications);
+    cursor = data.next_cursor;
+  } while (cursor);
+  return applications;
+};
+
+// Pre-aggregated dashboard counters. `params` may set date_from/date_to
+// (YYYY-MM-DD) for daily buckets and month_from/month_to (YYYY-MM).
+export const getLeaveStats = async (params = {}) => {
+  const response = await api.get('/leave/stats', { params });
+  return response.data;
+};
+
+// Typeahead over employee names, departments and emails (admins only)
+export const searchEmployees = async (q, limit = 8) => {
+  const response = await api.get('/employees/search', { params: { q, limit } });
+  return response.data.results;
+};
+
+// Allowance, used, pending and remaining days per leave type for `year`
+// (default: this year). Admins may pass `employee_id`.
+export const getLeaveBalances = async (params = {}) => {
+  const response = await api.get('/leave/balances', { params });
   return response.data;
 };
 
@@ -97,4 +177,85 @@ export const reviewLeave = async (leaveId, reviewData) => {
   return response.data;
 };
 
+// Review many applications at once: [{ leave_id, status, comments }, ...]
+export const reviewLeaves = async (reviews) => {
+  const response = await api.put('/leave/review', reviews);
+  return response.data;
+};
+
+// Live changes from the /leave/events Server-Sent Events stream. It is read
+// with fetch rather than EventSource so the access token can travel in the
+// Authorization header. Reconnects with Last-Event-ID after the stream ends
+// (the server closes it before the token expires). `onEvent(type, data)` gets
+// 'application.created', 'application.reviewed' and 'resync' (refetch
+// everything). Returns a function that stops the subscription.
+export const subscribeLeaveEvents = (onEvent) => {
+  let stopped = false;
+  let controller = null;
+  let lastEventId = null;
+  let retry = 3000;
+
+  const dispatch = (block) => {
+    let type = 'message';
+    let data = '';
+    for (const line of block.split('\n')) {
+      if (line.startsWith('id: ')) lastEventId = line.slice(4);
+      else if (line.startsWith('event: ')) type = line.slice(7);
+      else if (line.startsWith('data: ')) data += line.slice(6);
+      else if (line.startsWith('retry: ')) retry = Number(line.slice(7));
+    }
+    if (data && type !== 'ready') {
+      onEvent(type, JSON.parse(data));
+    }
+  };
+
+  const connect = async () => {
+    while (!stopped) {
+      controller = new AbortController();
+      try {
+        const headers = { Authorization: `Bearer ${localStorage.getItem('token')}` };
+        if (lastEventId) {
+          headers['Last-Event-ID'] = lastEventId;
+        }
+        const response = await fetch(`${API_URL}/leave/events`, { headers, signal: controller.signal });
+        if (response.status === 401) {
+          try {
+            refreshPromise = refreshPromise || refreshTokens();
+            await refreshPromise;
+          } catch (refreshError) {
+            clearSession();
+            return;
+          } finally {
+            refreshPromise = null;
+          }
+          continue;
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let end;
+          while ((end = buffer.indexOf('\n\n')) >= 0) {
+            dispatch(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+        }
+      } catch (error) {
+        if (stopped) return;
+        console.error('Leave event stream error:', error);
+      }
+      await new Promise((resolve) => setTimeout(resolve, retry));
+    }
+  };
+
+  connect();
+  return () => {
+    stopped = true;
+    if (controller) controller.abort();
+  };
+};
+
 export default api; 
\ No newline at end of file